@@ -11,37 +11,73 @@ logger = logging.getLogger("lingt.access.spreadsheet_output")
 
 class SpreadsheetOutput:
     """Sends output to the Calc spreadsheet."""
+
+    # Each call across the UNO bridge is slow, so rows are written in as
+    # few blocks as possible.  Blocks are limited to about this many
+    # characters so that very large lists do not need too much memory
+    # while being sent.
+    BLOCK_CHARS = 4 * 1024 * 1024
+
     def __init__(self, calcUnoObjs):
         self.unoObjs = calcUnoObjs
 
     def outputToColumn(self, colLetter, stringList, skipFirstRow=True):
         """Takes a list of strings."""
         logger.debug(util.funcName('begin'))
+        if skipFirstRow:
+            firstRow = 1  # start at second row
+        else:
+            firstRow = 0
+        try:
+            self.outputRows(
+                colLetter, firstRow, [(strval,) for strval in stringList])
+        except RuntimeException:
+            raise exceptions.DocAccessError()
+        logger.debug(util.funcName('end'))
 
-        chunkSize = 25  # make this value bigger or smaller for optimization
-        for i1 in range(0, len(stringList), chunkSize):
-            i2 = i1 + chunkSize - 1
-            if i2 >= len(stringList):
-                i2 = len(stringList) - 1
+    def outputRows(self, colLetter, firstRow, rows, rowsDone=None):
+        """Write a list of tuples that all have the same length,
+        one tuple for each row.
+        Raises com.sun.star.uno.RuntimeException.
 
-            data = []
-            for i in range(i1, i2 + 1):
-                data.append((stringList[i],))
-            if skipFirstRow:
-                offset = 2  # start at second row
-            else:
-                offset = 1
-            row1 = str(i1 + offset)
-            row2 = str(i2 + offset)
-            rangeName = colLetter + row1 + ":" + colLetter + row2
-            logger.debug(rangeName)
-            logger.debug(repr(data))
-            try:
-                oRange = self.unoObjs.sheet.getCellRangeByName(rangeName)
-                oRange.setDataArray(tuple(data))
-            except RuntimeException:
-                raise exceptions.DocAccessError()
-        logger.debug(util.funcName('end'))
+        :param colLetter: column of the first value in each row
+        :param firstRow: 0-based index of the row to write the first tuple
+        :param rowsDone: called with the number of rows written so far
+                         after each block is written
+        """
+        if not rows:
+            return
+        firstCol = ord(colLetter) - ord('A')
+        lastCol = firstCol + len(rows[0]) - 1
+        for i1, i2 in self.blockBounds(rows):
+            logger.debug(
+                "Writing rows %d to %d", firstRow + i1, firstRow + i2 - 1)
+            logger.debug("%r", rows[i1:i2])  # only formatted if enabled
+            oRange = self.unoObjs.sheet.getCellRangeByPosition(
+                firstCol, firstRow + i1, lastCol, firstRow + i2 - 1)
+            oRange.setDataArray(tuple(rows[i1:i2]))
+            if rowsDone:
+                rowsDone(i2)
+
+    def blockBounds(self, rows):
+        """Returns a list of (start, stop) indices of rows for each block."""
+        bounds = []
+        blockStart = 0
+        blockChars = 0
+        for row_i, row in enumerate(rows):
+            rowChars = len(row)
+            for value in row:
+                if isinstance(value, str):
+                    rowChars += len(value)
+                else:
+                    rowChars += 8
+            if blockChars and blockChars + rowChars > self.BLOCK_CHARS:
+                bounds.append((blockStart, row_i))
+                blockStart = row_i
+                blockChars = 0
+            blockChars += rowChars
+        bounds.append((blockStart, len(rows)))
+        return bounds
 
     def outputString(self, colLetter, row, strval):
         """This will probably work fine for numbers too."""
@@ -27,55 +27,55 @@ class SpreadsheetReader:
         Stops when no more strings are below in that column.
         """
         logger.debug(util.funcName('begin'))
+        return self.read_columns([colLetter], skipFirstRow)[0]
 
-        colNum = ord(colLetter) - ord('A')
-        try:
-            oColumn = self.unoObjs.sheet.getColumns().getByIndex(colNum)
-            logger.debug("Using column %s", oColumn.getName())
-            oRanges = self.unoObjs.document.createInstance(
-                "com.sun.star.sheet.SheetCellRanges")
-            oRanges.insertByName("", oColumn)
-            cellFlags = STRING | NUM_VAL | DATETIME   # any string or number
-            oCellRanges = oRanges.queryContentCells(cellFlags)
-            if oCellRanges.getCount() == 0:
-                logger.debug("No data found.")
-                return []
-            rangeAddress = oCellRanges.getRangeAddresses()[-1]
-            rowEnd = rangeAddress.EndRow + 1   # EndRow is 0-based
-            logger.debug("Found data up to row %d", rowEnd)
-            rowStart = 1
-            if skipFirstRow:
-                rowStart = 2
-            listLen = rowEnd - rowStart + 1
-        except RuntimeException:
-            raise exceptions.DocAccessError()
-        return self.getColumnStringListByLen(colLetter, skipFirstRow, listLen)
+    def read_columns(self, colLetters, skipFirstRow):
+        """Returns a list of values for each column in colLetters.
+        The lists all have the same length, stopping when no more strings
+        or numbers are below in any of the columns.  Cells may be empty.
 
-    def getColumnStringListByLen(self, colLetter, skipFirstRow, listLen):
-        """Returns a list of length listLen of strings.
-        Cells may be empty.
+        All of the columns are read with one call, so this is faster than
+        reading each column separately.
         """
-        logger.debug(util.funcName('begin'))
-        row1 = 1
+        logger.debug(util.funcName('begin', args=colLetters))
+        colNums = [ord(colLetter) - ord('A') for colLetter in colLetters]
+        rowStart = 0
         if skipFirstRow:
-            row1 = 2
-        row2 = row1 + listLen - 1
-        if row2 < row1:
-            logger.debug("Range too small to contain data.")
-            return []
-        rangeName = "%s%d:%s%d" % (colLetter, row1, colLetter, row2)
-        logger.debug(rangeName)
+            rowStart = 1
         try:
-            oRange = self.unoObjs.sheet.getCellRangeByName(rangeName)
+            rowEnd = self._lastContentRow(colNums)
+            if rowEnd < rowStart:
+                logger.debug("No data found.")
+                return [[] for colNum in colNums]
+            colStart = min(colNums)
+            oRange = self.unoObjs.sheet.getCellRangeByPosition(
+                colStart, rowStart, max(colNums), rowEnd)
             rowTuples = oRange.getDataArray()
         except RuntimeException:
             raise exceptions.DocAccessError()
-        if len(rowTuples) == 0:
-            logger.debug("Could not get data.")
-            return []
-        columnTuples = list(zip(*rowTuples))  # arrange the data by columns
         logger.debug(util.funcName('end'))
-        return list(columnTuples[0])
+        return [
+            [rowTuple[colNum - colStart] for rowTuple in rowTuples]
+            for colNum in colNums]
+
+    def _lastContentRow(self, colNums):
+        """Returns the 0-based index of the last row that has a string or
+        number in any of the columns, or -1 if they are all empty.
+        """
+        oRanges = self.unoObjs.document.createInstance(
+            "com.sun.star.sheet.SheetCellRanges")
+        oColumns = self.unoObjs.sheet.getColumns()
+        for colNum in sorted(set(colNums)):
+            oColumn = oColumns.getByIndex(colNum)
+            logger.debug("Using column %s", oColumn.getName())
+            oRanges.addRangeAddress(oColumn.getRangeAddress(), False)
+        cellFlags = STRING | NUM_VAL | DATETIME   # any string or number
+        oCellRanges = oRanges.queryContentCells(cellFlags)
+        rowEnd = -1
+        for rangeAddress in oCellRanges.getRangeAddresses():
+            rowEnd = max(rowEnd, rangeAddress.EndRow)
+        logger.debug("Found data up to row %d", rowEnd + 1)
+        return rowEnd
 
 
 class CalcFileReader(FileReader):
@@ -105,18 +105,24 @@ class CalcFileReader(FileReader):
             raise exceptions.FileAccessError(
                 "Error reading file %s", self.filepath)
         reader = SpreadsheetReader(self.calcUnoObjs)
-        self.progressBar.updatePercent(60)
-        for whatToGrab in self.fileconfig.thingsToGrab:
-            if whatToGrab.grabType == wordlist_structs.WhatToGrab.COLUMN:
-                stringList = reader.getColumnStringList(
-                    whatToGrab.whichOne, self.fileconfig.skipFirstRow)
-                for text in stringList:
-                    if text != "":
-                        ## Add word
-                        word = wordlist_structs.WordInList()
-                        word.text = text
-                        word.source = self.filepath
-                        self.data.append(word)
+        self.updatePercent(60)
+        colLetters = [
+            whatToGrab.whichOne
+            for whatToGrab in self.fileconfig.thingsToGrab
+            if whatToGrab.grabType == wordlist_structs.WhatToGrab.COLUMN]
+        if colLetters:
+            columns = reader.read_columns(
+                colLetters, self.fileconfig.skipFirstRow)
+        else:
+            columns = []
+        for stringList in columns:
+            for text in stringList:
+                if text != "":
+                    ## Add word
+                    word = wordlist_structs.WordInList()
+                    word.text = text
+                    word.source = self.filepath
+                    self.data.append(word)
         logger.debug("Setting visible.")
         self.calcUnoObjs.window.setVisible(True)
 
@@ -42,8 +42,10 @@ class WordlistIO:
         progressBarCalc.show()
         self.progressRanges = ProgressRanges(
             [progressBarWriter, progressBarCalc])
+        # Half of the progress is for preparing rows and half for
+        # writing them.
         self.progressRanges.initRanges(
-            progressBarWriter.getPercent() + 20, 95, len(wordList))
+            progressBarWriter.getPercent() + 20, 95, 2 * len(wordList))
         self.progressRanges.updateStart()
         try:
             self._outputList(wordList)
@@ -66,19 +68,24 @@ class WordlistIO:
         self.unoObjs.dispatcher.executeDispatch(
             self.listDoc.frame, ".uno:FreezePanes", "", 0, ())
 
-        CHUNK_SIZE = 25  # make this value bigger or smaller for optimization
-        #CHUNK_SIZE = 1  # useful for debugging
-        for word_i1 in range(0, len(wordList), CHUNK_SIZE):
-            word_i2 = word_i1 + CHUNK_SIZE - 1
-            if word_i2 >= len(wordList):
-                word_i2 = len(wordList) - 1
-            self._fillInData(wordList, word_i1, word_i2)
+        data = self._makeRows(wordList)
+        logger.debug("Adding %d rows", len(data))
+        outputter = SpreadsheetOutput(self.listDoc)
+        firstRow = 1  # start at second row
+        try:
+            outputter.outputRows(
+                'A', firstRow, data,
+                lambda rowsDone: self.progressRanges.update(
+                    len(wordList) + rowsDone))
+        except RuntimeException as exc:
+            raise exceptions.FileAccessError(
+                "There was a problem while writing the list.\n\n%s", exc)
 
-    def _fillInData(self, wordList, word_i1, word_i2):
+    def _makeRows(self, wordList):
+        """Returns a list of row tuples to write to the spreadsheet."""
         data = []
-        for word_i in range(word_i1, word_i2 + 1):
-            word = wordList[word_i]
-            colOrd = self.colOrder  # shorthand variable name
+        colOrd = self.colOrder  # shorthand variable name
+        for word_i, word in enumerate(wordList):
             colOrd.resetRowData()
             colOrd.setRowVal('colWord', word.text)
             colOrd.setRowVal('colOccur', word.occurrences)
@@ -86,20 +93,8 @@ class WordlistIO:
             colOrd.setRowVal('colChange', word.correction)
             colOrd.setRowVal('colSrc', word.sources_str())
             data.append(colOrd.getRowTuple())
-
-        row1 = word_i1 + 2  # start at second row, so index 0 is row 2
-        row2 = word_i2 + 2
-        col2 = chr(ord('A') + len(self.colOrder.COLUMNS) - 1)
-        rangeName = "A%d:%s%d" % (row1, col2, row2)
-        logger.debug("Adding %d rows to range %s", len(data), rangeName)
-        #logger.debug(repr(data))
-        oRange = self.sheet.getCellRangeByName(rangeName)
-        try:
-            oRange.setDataArray(tuple(data))
-        except RuntimeException as exc:
-            raise exceptions.FileAccessError(
-                "There was a problem while writing the list.\n\n%s", exc)
-        self.progressRanges.update(word_i1)
+            self.progressRanges.update(word_i)
+        return data
 
     def readList(self):
         """Expects input spreadsheet to have columns generated by
@@ -110,37 +105,29 @@ class WordlistIO:
         logger.debug(util.funcName('begin'))
 
         colOrd = self.colOrder  # shorthand variable name
-        colLetterWord = colOrd.getColLetter('colWord')
+        colKeys = list(colOrd.COLUMNS.keys())
         reader = SpreadsheetReader(self.unoObjs)
-        stringList = reader.getColumnStringList(colLetterWord, True)
-        if len(stringList) == 0:
+        columns = dict(zip(colKeys, reader.read_columns(
+            [colOrd.getColLetter(colKey) for colKey in colKeys], True)))
+        # The list ends at the last word, even if other columns are longer.
+        listLen = len(columns['colWord'])
+        while listLen > 0 and columns['colWord'][listLen - 1] == "":
+            listLen -= 1
+        if listLen == 0:
             logger.debug("No data found.")
             return []
-        row1 = 2    # first row is heading, second row is beginning of data
-        row2 = row1 + len(stringList) - 1
-        rangeName = "%s%d:%s%d" % ('A', row1, colOrd.maxColLetter(), row2)
-        try:
-            oRange = self.unoObjs.sheet.getCellRangeByName(rangeName)
-            rowTuples = oRange.getDataArray()
-        except RuntimeError as exc:
-            self.msgbox.display("Error reading the list.\n\n%s", str(exc))
-            return []
-        if len(rowTuples) == 0:
-            logger.debug("Could not get data.")
-            return []
 
         datalist = []
-        for rowTuple in rowTuples:
-            colOrd.setRowTuple(rowTuple)
+        for row_i in range(listLen):
             wordInList = WordInList()
-            wordInList.text = colOrd.getRowVal('colWord')
-            wordInList.occurrences = colOrd.getRowVal('colOccur')
-            wordInList.correction = colOrd.getRowVal('colChange')
-            wordInList.converted1 = colOrd.getRowVal('colConv1')
-            wordInList.converted2 = colOrd.getRowVal('colConv2')
-            wordInList.setSources(colOrd.getRowVal('colSrc'))
-            wordInList.setSimilarWords(colOrd.getRowVal('colSimilar'))
-            wordInList.setIsCorrect(colOrd.getRowVal('colOk'))
+            wordInList.text = columns['colWord'][row_i]
+            wordInList.occurrences = columns['colOccur'][row_i]
+            wordInList.correction = columns['colChange'][row_i]
+            wordInList.converted1 = columns['colConv1'][row_i]
+            wordInList.converted2 = columns['colConv2'][row_i]
+            wordInList.setSources(columns['colSrc'][row_i])
+            wordInList.setSimilarWords(columns['colSimilar'][row_i])
+            wordInList.setIsCorrect(columns['colOk'][row_i])
             datalist.append(wordInList)
         return datalist
 
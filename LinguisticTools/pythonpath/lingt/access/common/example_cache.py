@@ -0,0 +1,177 @@
+"""
+Keep examples read from phonology and interlinear files on disk,
+so that the files do not need to be parsed again until they change.
+
+Each cache entry is a pickle file named after a hash of the file paths.
+The entry also stores the settings used to read the files and the size
+and modification time of each file, so if any file or setting changes,
+the entry is no longer valid and gets replaced the next time the files
+are read.  Only the most recently used entries are kept.
+
+This module exports:
+    ExampleCache
+    getCacheFolder()
+"""
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+
+import uno
+
+from lingt.access.writer.uservars import InterlinTags, PhonologyTags
+
+logger = logging.getLogger("lingt.access.example_cache")
+
+CACHE_SUBFOLDER = os.path.join("LinguisticTools", "examples_cache")
+
+def getCacheFolder(unoObjs, subfolder=CACHE_SUBFOLDER):
+    """Returns a folder in the LibreOffice user profile,
+    or in the system temporary folder if the profile cannot be found.
+    """
+    try:
+        pathSubst = unoObjs.smgr.createInstanceWithContext(
+            "com.sun.star.util.PathSubstitution", unoObjs.ctx)
+        userUrl = pathSubst.substituteVariables("$(user)", True)
+        userFolder = uno.fileUrlToSystemPath(userUrl)
+    except Exception as exc:
+        logger.warning("Could not get user profile folder: %s", exc)
+        userFolder = tempfile.gettempdir()
+    return os.path.join(userFolder, subfolder)
+
+class ExampleCache:
+    """Stores the results of reading linguistic example files.
+    Nothing is read from disk until load() is called.
+    Problems with the cache are logged and otherwise ignored,
+    because the files can always be read again instead.
+    """
+    CACHE_VERSION = 1  # increase when the structure of examples changes
+    MAX_ENTRIES = 20  # older entries are deleted
+
+    def __init__(self, folder):
+        self.folder = folder
+
+    @staticmethod
+    def interlinKey(inSettings, userVars):
+        """Returns a tuple of everything that affects the results of
+        reading interlinear examples.
+
+        :param inSettings: type fileitemlist.InterlinInputSettings
+        """
+        fieldTags = InterlinTags(userVars).loadUserVars()
+        return (
+            'interlinear',
+            tuple(
+                (fileItem.filepath, fileItem.prefix, fileItem.use_segnum)
+                for fileItem in inSettings.fileList),
+            inSettings.separateMorphColumns,
+            inSettings.get_showMorphemeBreaks(),
+            inSettings.SFM_baseline_word1,
+            tuple(sorted(fieldTags.items())))
+
+    @staticmethod
+    def phonologyKey(inSettings, userVars):
+        """Returns a tuple of everything that affects the results of
+        reading phonology examples.
+
+        :param inSettings: type lingex_structs.PhonInputSettings
+        """
+        fieldTags = PhonologyTags(userVars).loadUserVars()
+        return (
+            'phonology',
+            ((inSettings.filepath,),),
+            inSettings.phoneticWS,
+            inSettings.isLexemePhonetic,
+            inSettings.refNumIn,
+            userVars.getInt("ExperTrans_Phonemic"),
+            tuple(sorted(fieldTags.items())))
+
+    def load(self, key):
+        """Returns a tuple (examplesDict, suggestions, duplicate_refnums),
+        or None if there is no valid entry for the key.
+        """
+        filepath = self._entryPath(key)
+        if not os.path.exists(filepath):
+            return None
+        try:
+            with open(filepath, 'rb') as infile:
+                entry = pickle.load(infile)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError,
+                ImportError) as exc:
+            logger.warning("Could not load %s: %s", filepath, exc)
+            return None
+        if (entry.get('version') != self.CACHE_VERSION
+                or entry.get('key') != key
+                or entry.get('fileStats') != self._fileStats(key)):
+            logger.debug("Cache entry is out of date.")
+            return None
+        logger.debug("Loaded examples from %s", filepath)
+        try:
+            # Mark as recently used, so that it is not pruned.
+            os.utime(filepath)
+        except OSError as exc:
+            logger.warning("Could not touch %s: %s", filepath, exc)
+        return (
+            entry['examplesDict'], entry['suggestions'],
+            entry['duplicate_refnums'])
+
+    def store(self, key, examplesDict, suggestions, duplicate_refnums):
+        entry = {
+            'version': self.CACHE_VERSION,
+            'key': key,
+            'fileStats': self._fileStats(key),
+            'examplesDict': examplesDict,
+            'suggestions': suggestions,
+            'duplicate_refnums': duplicate_refnums,
+            }
+        filepath = self._entryPath(key)
+        tmpFilepath = filepath + ".tmp"
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            with open(tmpFilepath, 'wb') as outfile:
+                pickle.dump(entry, outfile, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmpFilepath, filepath)
+            logger.debug("Stored examples in %s", filepath)
+        except (OSError, pickle.PicklingError) as exc:
+            logger.warning("Could not store %s: %s", filepath, exc)
+            return
+        self._prune()
+
+    def _prune(self):
+        """Delete the least recently used entries beyond MAX_ENTRIES."""
+        try:
+            entries = [
+                dirEntry for dirEntry in os.scandir(self.folder)
+                if dirEntry.name.endswith(".pickle")]
+            entries.sort(
+                key=lambda dirEntry: dirEntry.stat().st_mtime_ns,
+                reverse=True)
+            for dirEntry in entries[self.MAX_ENTRIES:]:
+                logger.debug("Deleting old entry %s", dirEntry.path)
+                os.remove(dirEntry.path)
+        except OSError as exc:
+            logger.warning("Could not prune %s: %s", self.folder, exc)
+
+    def _entryPath(self, key):
+        """The name depends only on the kind of examples and the file paths,
+        so an entry for the same files with other settings gets replaced.
+        """
+        sources = (key[0], tuple(fileTuple[0] for fileTuple in key[1]))
+        digest = hashlib.sha1(repr(sources).encode('utf-8')).hexdigest()
+        return os.path.join(self.folder, digest + ".pickle")
+
+    @staticmethod
+    def _fileStats(key):
+        """Returns size and modification time of each file in the key.
+        The second element of each key is a tuple whose items each start
+        with a file path.
+        """
+        stats = []
+        for fileTuple in key[1]:
+            try:
+                statResult = os.stat(fileTuple[0])
+                stats.append((statResult.st_size, statResult.st_mtime_ns))
+            except OSError:
+                stats.append(None)
+        return tuple(stats)
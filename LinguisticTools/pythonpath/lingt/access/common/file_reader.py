@@ -5,7 +5,7 @@ import logging
 
 from lingt.app import exceptions
 from lingt.ui.common.messagebox import MessageBox
-from lingt.ui.common.progressbar import ProgressBar
+from lingt.ui.common.progressbar import NullProgressBar, ProgressBar
 from lingt.utils import util
 
 logger = logging.getLogger("lingt.access.file_reader")
@@ -18,12 +18,18 @@ class FileReader:
     SUPPORTED_FORMATS = []  # list of tuples of name, text description
 
     def __init__(self, unoObjs):
+        """Set unoObjs to None to read without UNO, for example in a worker
+        process.  Messages and progress are then not displayed.
+        """
         if self.__class__ is FileReader:
             # The base class should not be instantiated.
             raise NotImplementedError()
         self.unoObjs = unoObjs
-        self.msgbox = MessageBox(unoObjs)
-        self.progressBar = ProgressBar(unoObjs, "Loading data...")
+        self.msgbox = None
+        self.progressBar = NullProgressBar()
+        if unoObjs:
+            self.msgbox = MessageBox(unoObjs)
+            self.progressBar = ProgressBar(unoObjs, "Loading data...")
         self.data = None  # typically a list or dict
         self.dom = None
         self.filepath = ""
@@ -35,22 +41,26 @@ class FileReader:
 
     def read(self):
         logger.debug(util.funcName('begin'))
-        if self.progressBar:
-            self.progressBar.show()
-            self.progressBar.updateBeginning()
-            self.progressBar.updatePercent(20)
+        self.progressBar.show()
+        self.progressBar.updateBeginning()
+        self.updatePercent(20)
         self._initData()
         try:
             self._read()
             self._verifyDataFound()
-            if self.progressBar:
-                self.progressBar.updateFinishing()
+            self.progressBar.updateFinishing()
         finally:
-            if self.progressBar:
-                self.progressBar.close()
+            self.progressBar.close()
         logger.debug(util.funcName('end'))
         return self.data
 
+    def updatePercent(self, percent):
+        """Called between the steps of reading, so the value is displayed
+        even if the bar was updated very recently.
+        """
+        self.progressBar.updatePercent(percent)
+        self.progressBar.flush()
+
     def _initData(self):
         # All derived classes should implement this method.
         raise NotImplementedError()
@@ -5,21 +5,41 @@ On Linux the library is libecdriver.so
 
 This module exports:
     ConverterSettings
+    ConversionCache
+    ConversionWorkers
     SEC_wrapper
     ProcessTypeFlags
     ConvType
 """
+import collections
+import concurrent.futures
 import ctypes
+import hashlib
 import logging
 import os
+import pickle
 import platform
 
+from lingt.access.common.example_cache import getCacheFolder
 from lingt.access.writer.uservars import Syncable
 from lingt.app import exceptions
+from lingt.utils import procpool
 from lingt.utils import util
 
 logger = logging.getLogger("lingt.access.sec_wrapper")
 
+# Size in characters of the buffer for conversion results.
+MIN_BUFFER_SIZE = 10000
+MAX_BUFFER_SIZE = 16 * 1024 * 1024
+
+# Put between strings to convert several of them in a single call.
+# Newlines keep the context of each string separate for converters such as
+# TECkit, and the control character in between is not likely to be changed.
+BATCH_SEPARATOR = "\n\x1f\n"
+BATCH_MAX_CHARS = 20000
+
+CONVERSIONS_SUBFOLDER = os.path.join("LinguisticTools", "conversions_cache")
+
 class ConverterSettings(Syncable):
     def __init__(self, userVars):
         Syncable.__init__(self, userVars)
@@ -63,6 +83,169 @@ class ConverterSettings(Syncable):
         self.normForm = self.userVars.getInt('ConvNormForm')
 
 
+class ConversionCache:
+    """Remembers results of conversions, because the same words usually
+    get converted many times.
+    Keys are ConverterSettings.attrs() and the input string.
+
+    The most recently used results are kept in memory, but only until the
+    next conversion run starts, because the converter may have been changed
+    in between, for example by editing its map file.
+    Optionally, results can also be stored on disk to use in later sessions,
+    which only makes sense for converters that always give the same result,
+    such as TECkit maps and CC tables.
+    If a converter gets changed, delete the folder to clear stored results.
+    """
+    MAX_ENTRIES = 100000  # in memory for all converters
+    MAX_PERSISTED = 500000  # on disk for each converter
+    CACHE_VERSION = 1
+
+    def __init__(self, maxEntries=MAX_ENTRIES):
+        self.maxEntries = maxEntries
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.persistFolder = None
+        self.persisted = {}  # keys attrs, values dict of input to output
+        self.changedAttrs = set()  # keys of self.persisted to save
+
+    def startRun(self):
+        """Call before each conversion run.
+        Forgets results in memory and resets the statistics.
+        Results stored on disk are read again when needed.
+        """
+        self.entries.clear()
+        self.persisted = {}
+        self.changedAttrs = set()
+        self.resetStats()
+
+    def usePersistence(self, folder):
+        """Also store results on disk in the specified folder,
+        or set to None to keep results only in memory.
+        """
+        if folder != self.persistFolder:
+            self.persistFolder = folder
+            self.persisted = {}
+            self.changedAttrs = set()
+
+    def get(self, convAttrs, sInput):
+        """Returns the converted string, or None if not found."""
+        key = (convAttrs, sInput)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        if self.persistFolder:
+            sOutput = self._persistedDict(convAttrs).get(sInput)
+            if sOutput is not None:
+                self._remember(key, sOutput)
+                self.hits += 1
+                return sOutput
+        self.misses += 1
+        return None
+
+    def put(self, convAttrs, sInput, sOutput):
+        self._remember((convAttrs, sInput), sOutput)
+        if self.persistFolder:
+            conversions = self._persistedDict(convAttrs)
+            if len(conversions) < self.MAX_PERSISTED:
+                conversions[sInput] = sOutput
+                self.changedAttrs.add(convAttrs)
+
+    def _remember(self, key, sOutput):
+        self.entries[key] = sOutput
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxEntries:
+            self.entries.popitem(last=False)
+
+    def forget(self, convName):
+        """Remove results of the converter, because it may have changed."""
+        for key in list(self.entries):
+            if key[0][0] == convName:
+                del self.entries[key]
+        for convAttrs, conversions in self.persisted.items():
+            if convAttrs[0] == convName and conversions:
+                conversions.clear()
+                self.changedAttrs.add(convAttrs)
+
+    def getStats(self):
+        """Returns a tuple (hits, misses)."""
+        return self.hits, self.misses
+
+    def resetStats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def save(self):
+        """Write any new results to disk."""
+        if not self.persistFolder:
+            return
+        for convAttrs in self.changedAttrs:
+            entry = {
+                'version': self.CACHE_VERSION,
+                'attrs': convAttrs,
+                'conversions': self.persisted[convAttrs],
+                }
+            filepath = self._entryPath(convAttrs)
+            tmpFilepath = filepath + ".tmp"
+            try:
+                os.makedirs(self.persistFolder, exist_ok=True)
+                with open(tmpFilepath, 'wb') as outfile:
+                    pickle.dump(entry, outfile, pickle.HIGHEST_PROTOCOL)
+                os.replace(tmpFilepath, filepath)
+                logger.debug("Stored conversions in %s", filepath)
+            except (OSError, pickle.PicklingError) as exc:
+                logger.warning("Could not store %s: %s", filepath, exc)
+        self.changedAttrs = set()
+
+    def _persistedDict(self, convAttrs):
+        """Returns results stored on disk for the converter,
+        reading the file the first time.
+        """
+        if convAttrs not in self.persisted:
+            conversions = {}
+            entry = self._loadEntry(self._entryPath(convAttrs))
+            if entry and entry['attrs'] == convAttrs:
+                conversions = entry['conversions']
+            self.persisted[convAttrs] = conversions
+        return self.persisted[convAttrs]
+
+    def _loadEntry(self, filepath):
+        if not os.path.exists(filepath):
+            return None
+        try:
+            with open(filepath, 'rb') as infile:
+                entry = pickle.load(infile)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError,
+                ImportError) as exc:
+            logger.warning("Could not load %s: %s", filepath, exc)
+            return None
+        if entry.get('version') != self.CACHE_VERSION:
+            return None
+        return entry
+
+    def _entryPath(self, convAttrs):
+        digest = hashlib.sha1(repr(convAttrs).encode('utf-8')).hexdigest()
+        return os.path.join(self.persistFolder, digest + ".pickle")
+
+
+theConversionCache = ConversionCache()
+
+def setupConversionCache(unoObjs, userVars):
+    """Use the hidden user variable PersistConversions, which must be set
+    manually, to decide whether to store conversions on disk.
+    """
+    varname = 'PersistConversions'
+    if userVars.isEmpty(varname):
+        userVars.store(varname, "0")  # make sure it exists
+    if userVars.getInt(varname) == 1:
+        logger.debug("Storing conversions on disk.")
+        theConversionCache.usePersistence(
+            getCacheFolder(unoObjs, CONVERSIONS_SUBFOLDER))
+    else:
+        theConversionCache.usePersistence(None)
+
+
 class SEC_wrapper:
 
     def __init__(self, msgbox, userVars):
@@ -77,6 +260,9 @@ class SEC_wrapper:
         self.funcCleanup = None
         self.loaded = False
         self.config = ConverterSettings(userVars)
+        self.outputBuffer = None  # reused for each conversion
+        self.cache = theConversionCache
+        self.workers = None  # type ConversionWorkers
 
     def __del__(self):
         if self.loaded and self.funcCleanup is not None:
@@ -124,6 +310,12 @@ class SEC_wrapper:
             except OSError as exc:
                 raise exceptions.FileAccessError("Library error: %s.", exc)
 
+        self.loadFunctions(libecdriver, wide)
+
+    def loadFunctions(self, libecdriver, wide=''):
+        """Get functions from a loaded ECDriver library.
+        Tests can call this with a stub library instead of loadLibrary().
+        """
         logger.debug("Getting functions from library")
         try:
             self.funcIsEcInstalled = libecdriver.IsEcInstalled
@@ -250,6 +442,7 @@ class SEC_wrapper:
             c_convName, c_convSpec, c_convType, c_leftEnc, c_rightEnc,
             c_processType)
         verifyStatusOk(status)
+        self.cache.forget(mappingName)
         logger.debug(util.funcName('end'))
 
     def convert(self, sInput):
@@ -258,25 +451,199 @@ class SEC_wrapper:
         if not self.config.convName:
             raise exceptions.LogicError("No converter was specified.")
         logger.debug("Using conv name %r", self.config.convName)
+        logger.debug("%r", sInput)
+        convAttrs = self.config.attrs()
+        sOutput = self.cache.get(convAttrs, sInput)
+        if sOutput is None:
+            c_convName = getStringParam(self.config.convName)
+            sOutput = self._convertString(c_convName, sInput)
+            self.cache.put(convAttrs, sInput, sOutput)
+        logger.debug("%r", sOutput)
+        logger.debug(util.funcName('end'))
+        return sOutput
+
+    def convert_many(self, strings):
+        """Convert a list of strings, joining several of them together
+        for each call to ECDriver, which is much faster than calling
+        convert() for each string.
+        If the converter changes the separator, for example by mapping
+        control characters, then the strings of that batch are converted
+        one at a time instead.
+        Strings that were already converted are taken from the cache.
+
+        :returns: list of converted unicode strings in the same order
+        """
+        logger.debug(util.funcName('begin', args=len(strings)))
+        if not self.config.convName:
+            raise exceptions.LogicError("No converter was specified.")
+        convAttrs = self.config.attrs()
+        converted = {}  # keys are input, values are output
+        toConvert = []
+        for sInput in dict.fromkeys(strings):
+            sOutput = self.cache.get(convAttrs, sInput)
+            if sOutput is None:
+                toConvert.append(sInput)
+            else:
+                converted[sInput] = sOutput
+        # Repeated strings do not need to be converted again either.
+        self.cache.hits += len(strings) - len(converted) - len(toConvert)
+        if toConvert and self.workers is not None and self.workers.start():
+            outputs = self.workers.convert_many(self.config, toConvert)
+        else:
+            outputs = self._convertBatches(toConvert)
+        for sInput, sOutput in zip(toConvert, outputs):
+            converted[sInput] = sOutput
+            self.cache.put(convAttrs, sInput, sOutput)
+        logger.debug(util.funcName('end'))
+        return [converted[sInput] for sInput in strings]
+
+    def _convertBatches(self, strings):
         c_convName = getStringParam(self.config.convName)
-        logger.debug(repr(sInput))
+        results = []
+        for batch in makeBatches(strings):
+            if len(batch) == 1:
+                outputs = [self._convertString(c_convName, batch[0])]
+            else:
+                sOutput = self._convertString(
+                    c_convName, BATCH_SEPARATOR.join(batch))
+                outputs = sOutput.split(BATCH_SEPARATOR)
+            if len(outputs) != len(batch):
+                logger.debug(
+                    "Separator was changed.  Converting %d strings singly.",
+                    len(batch))
+                outputs = [
+                    self._convertString(c_convName, sInput)
+                    for sInput in batch]
+            results.extend(outputs)
+        return results
+
+    def _convertString(self, c_convName, sInput):
+        """Make one call to ECDriver.
+        The output buffer is kept for the next call, and if the result
+        might have been truncated, a larger buffer is used to call again.
+        """
         c_input = getStringParam(sInput)
         if c_input is None:
             raise exceptions.DataNotFoundError("No conversion result.")
-        # ECDriver will truncate the result if we go over this amount.
-        c_outSize = ctypes.c_int(10000)
-        bufOutput = createBuffer(c_outSize.value)
-        logger.debug("Calling ConvertString using %s.", self.config.convName)
-        status = self.funcConvertString(
-            c_convName, c_input, bufOutput, c_outSize)
-        verifyStatusOk(status)
-        sOutput = bufOutput.value
+        # ECDriver will truncate the result if it goes over the buffer size,
+        # so allow plenty of room for the result to be longer than the input.
+        minSize = max(len(sInput) * 4 + 1, MIN_BUFFER_SIZE)
+        while True:
+            bufOutput = self._getOutputBuffer(minSize)
+            c_outSize = ctypes.c_int(len(bufOutput))
+            status = self.funcConvertString(
+                c_convName, c_input, bufOutput, c_outSize)
+            verifyStatusOk(status)
+            sOutput = bufOutput.value
+            if len(sOutput) < len(bufOutput) - 1:
+                break
+            if len(bufOutput) >= MAX_BUFFER_SIZE:
+                logger.warning("Conversion result may be truncated.")
+                break
+            minSize = len(bufOutput) * 2
         if platform.system() != "Windows":
             sOutput = sOutput.decode("utf-8")
-        logger.debug(repr(sOutput))
-        logger.debug(util.funcName('end'))
         return sOutput
 
+    def _getOutputBuffer(self, minSize):
+        """Returns the pooled output buffer, making it larger if needed."""
+        if self.outputBuffer is None or len(self.outputBuffer) < minSize:
+            self.outputBuffer = createBuffer(min(minSize, MAX_BUFFER_SIZE))
+        return self.outputBuffer
+
+
+class ConversionWorkers:
+    """Runs converters in helper processes that each load the ECDriver
+    library, so that Office does not have to wait for each string, and
+    if a converter crashes, only the helper process is lost.
+    The processes are started when first needed.
+    """
+    MIN_STRINGS_PER_TASK = 100
+
+    def __init__(self, numWorkers, libfile=None):
+        """:param libfile: path of the ECDriver library to load instead of
+                           searching for it, for example a stub for testing
+        """
+        self.numWorkers = numWorkers
+        self.libfile = libfile
+        self.pool = None
+
+    def start(self):
+        """Returns True if the helper processes are running."""
+        if self.pool is None:
+            self.pool = procpool.getProcessPool(
+                self.numWorkers, minWorkers=1,
+                initializer=initConversionWorker, initargs=(self.libfile,))
+            if self.pool is None:
+                logger.warning("Converting in the Office process instead.")
+        return self.pool is not None
+
+    def convert_many(self, config, strings):
+        """Divide the strings among the helper processes.
+        :param config: type ConverterSettings
+        :returns: list of converted unicode strings in the same order
+        """
+        chunkSize = max(
+            self.MIN_STRINGS_PER_TASK, -(-len(strings) // self.numWorkers))
+        futures = [
+            self.pool.submit(
+                convertInWorker, config.attrs(),
+                strings[chunkStart:chunkStart + chunkSize])
+            for chunkStart in range(0, len(strings), chunkSize)]
+        results = []
+        try:
+            for future in futures:
+                results.extend(future.result())
+        except concurrent.futures.process.BrokenProcessPool as exc:
+            logger.exception(exc)
+            self.shutdown()
+            raise exceptions.FileAccessError(
+                "%s stopped unexpectedly.", config)
+        return results
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+
+def getConversionWorkers(userVars):
+    """Use the hidden user variable ConversionWorkers, which must be set
+    manually, to decide how many helper processes to use.
+    Returns None to convert in the Office process.
+    """
+    varname = 'ConversionWorkers'
+    if userVars.isEmpty(varname):
+        userVars.store(varname, "0")  # make sure it exists
+        return None
+    numWorkers = userVars.getInt(varname)
+    if numWorkers < 1:
+        return None
+    logger.debug("Using %d conversion processes.", numWorkers)
+    return ConversionWorkers(numWorkers)
+
+# The SEC_wrapper object of a helper process.
+_workerSecCall = None
+
+def initConversionWorker(libfile):
+    """Called at the start of each helper process."""
+    global _workerSecCall  # pylint: disable=global-statement
+    _workerSecCall = SEC_wrapper(None, None)
+    if libfile:
+        _workerSecCall.loadFunctions(ctypes.cdll.LoadLibrary(libfile))
+    else:
+        _workerSecCall.loadLibrary()
+
+def convertInWorker(convAttrs, strings):
+    """Called in a helper process.
+    :param convAttrs: from ConverterSettings.attrs()
+    """
+    config = ConverterSettings(None)
+    config.convName, config.forward, config.normForm = convAttrs
+    if _workerSecCall.config != config:
+        _workerSecCall.setConverter(config)
+    return _workerSecCall.convert_many(strings)
+
 
 class ErrStatus:
     """Possible values for error codes.
@@ -406,6 +773,30 @@ def getStringParam(strval):
             "Failed to encode string properly.")
 
 
+def makeBatches(strings):
+    """Group strings into lists to convert together.
+    A string that contains the separator gets a list to itself.
+    """
+    batch = []
+    batchChars = 0
+    for sInput in strings:
+        if BATCH_SEPARATOR in sInput:
+            if batch:
+                yield batch
+            yield [sInput]
+            batch = []
+            batchChars = 0
+            continue
+        if batch and batchChars + len(sInput) > BATCH_MAX_CHARS:
+            yield batch
+            batch = []
+            batchChars = 0
+        batch.append(sInput)
+        batchChars += len(sInput) + len(BATCH_SEPARATOR)
+    if batch:
+        yield batch
+
+
 def createBuffer(size):
     """Get a writable buffer that can be used to return a string from C++
     code.
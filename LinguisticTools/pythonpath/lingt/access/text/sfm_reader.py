@@ -34,7 +34,7 @@ class SFM_Reader(FileReader):
         if not os.path.exists(self.filepath):
             raise exceptions.FileAccessError(
                 "Cannot find file %s", self.filepath)
-        self.progressBar.updatePercent(30)
+        self.updatePercent(30)
         self.read_sfm_file()
         for dummy_marker, value in self.rawData:
             word = wordlist_structs.WordInList()
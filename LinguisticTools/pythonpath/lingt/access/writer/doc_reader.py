@@ -10,7 +10,8 @@ from com.sun.star.lang import IllegalArgumentException
 from com.sun.star.uno import RuntimeException
 
 from lingt.access.common.file_reader import FileReader
-from lingt.access.writer.textsearch import TextSearchSettings, TextSearch
+from lingt.access.writer.textsearch import (
+    SearchCondition, TextSearch, TextSearchSettings)
 from lingt.app import exceptions
 from lingt.app.data.wordlist_structs import WhatToGrab, WordInList
 from lingt.utils import util
@@ -71,31 +72,40 @@ class DocReader(FileReader):
     def read_document(self):
         """Sets self.data to list of WordInList objects."""
         logger.debug(util.funcName('begin'))
-        textRanges = []
         textSearch = TextSearch(
             self.doc, self.progressBar, checkForFormatting=False)
-        for whatToGrab in self.fileconfig.thingsToGrab:
+        rangesOfItem = {}  # key is index in thingsToGrab
+        conditions = []
+        conditionItems = []
+        for itemIndex, whatToGrab in enumerate(self.fileconfig.thingsToGrab):
             searchConfig = TextSearchSettings()
             searchConfig.matchesLimit = self.matchesLimit
             if whatToGrab.grabType == WhatToGrab.PARASTYLE:
                 searchConfig.style = whatToGrab.whichOne
-                textSearch.setConfig(searchConfig)
-                textSearch.scopeParaStyle()
+                scopeType = SearchCondition.PARASTYLE
             elif whatToGrab.grabType == WhatToGrab.CHARSTYLE:
                 searchConfig.style = whatToGrab.whichOne
-                textSearch.setConfig(searchConfig)
-                textSearch.scopeCharStyle()
+                scopeType = SearchCondition.CHARSTYLE
             elif whatToGrab.grabType == WhatToGrab.FONT:
                 searchConfig.fontName = whatToGrab.whichOne
                 searchConfig.fontType = whatToGrab.fontType
-                textSearch.setConfig(searchConfig)
-                textSearch.scopeFont()
+                scopeType = SearchCondition.FONT
             elif (whatToGrab.grabType == WhatToGrab.PART and
                   whatToGrab.whichOne == WhatToGrab.WHOLE_DOC):
                 textSearch.scopeWholeDocTraverse()
+                rangesOfItem[itemIndex] = textSearch.getRanges()
+                continue
             else:
                 continue
-            textRanges.extend(textSearch.getRanges())
+            conditions.append(SearchCondition(scopeType, searchConfig))
+            conditionItems.append(itemIndex)
+        if conditions:
+            # Look for all styles and fonts in one pass through the document.
+            rangeLists = textSearch.scopeMultiple(conditions)
+            rangesOfItem.update(zip(conditionItems, rangeLists))
+        textRanges = []
+        for itemIndex in sorted(rangesOfItem):
+            textRanges.extend(rangesOfItem[itemIndex])
 
         logger.debug("Got %d ranges.", len(textRanges))
         for txtRange in textRanges:    # txtRange is of type search.TxtRange
@@ -1,13 +1,21 @@
 """
 Does the following so that ODT files can be read and modified as XML:
 - Save files such as .rtf and .doc into .odt format.
-- Unzip .odt XML files into a (temporary) folder inside destination folder.
+- Read the XML files from the .odt, either directly from the zip file
+  or by unzipping into a (temporary) folder inside destination folder.
 - Zip back into .odt
 Actual reading and modifying of the XML is done in the odt_converter module.
+
+The methods readXml() and writeChanges() do not call UNO, so several files
+can be processed at the same time in worker threads.
+The other methods should be called from the main thread.
 """
+import copy
 import logging
 import os
 import shutil
+import struct
+import time
 import zipfile
 
 import uno
@@ -17,6 +25,7 @@ from com.sun.star.util import CloseVetoException
 from lingt.access.writer import doc_reader
 from lingt.access.xml.odt_converter import OdtReader, OdtChanger
 from lingt.app import exceptions
+from lingt.ui.common.progressbar import NullProgressBar
 from lingt.utils import util
 
 logger = logging.getLogger("lingt.access.DocToXml")
@@ -27,59 +36,74 @@ class DocToXml:
         ('writerdoc', "Document (.odt .doc .docx .rtf) for Writer")]
 
     def __init__(self, unoObjs, msgbox, fileconfig, outdir, scopeType,
-                 progressRange):
+                 extractFiles=False):
+        """
+        :param extractFiles: unzip all files into a temporary folder,
+                             which can be useful to look at the XML
+        """
         self.unoObjs = unoObjs
         self.msgbox = msgbox
         self.fileconfig = fileconfig   # type fileitemlist.BulkFileItem
         self.outdir = outdir
         self.scopeType = scopeType
-        self.progressRange = progressRange
-        self.progressRange_partNum = 0
+        self.extractFiles = extractFiles
         self.tempDir = ""
-        self.tempBaseDir = ""
+        self.tempBaseDir = os.path.join(self.outdir, 'LOLT Converted Files')
         self.odt_reader = None
 
-    def read(self):
-        """Read in the data.
-        Returns list with elements of type FontItem.
-        Tries to overcome several zipfile reading exceptions that may occur.
+    def prepare(self):
+        """Make the temporary folder if needed, and make the reader.
+        Returns False if the file cannot be read.
         """
         logger.debug(util.funcName('begin'))
-        try:
-            self.make_temp_dir()
-        except exceptions.FileAccessError as exc:
-            self.msgbox.displayExc(exc)
-            return []
-        data = None
-        self.progressRange_partNum = 0
-        try:
-            data = self.readFile()
-        except zipfile.BadZipFile as exc:
-            logger.warning(exc)
-            self.convert_to_odt()
-            data = self.readFile()
-        except exceptions.FileAccessError as exc:
-            if exc.msg.startswith("Error reading file"):
-                logger.warning(exc)
-                self.convert_to_odt()
-                data = self.readFile()
-            else:
-                raise exc
-        except FileNotFoundError as exc:
+        if self.extractFiles:
+            try:
+                self.make_temp_dir()
+            except exceptions.FileAccessError as exc:
+                self.msgbox.displayExc(exc)
+                return False
+        self.odt_reader = OdtReader(self.tempDir, self.scopeType, self.unoObjs)
+        # The progress bar of the caller shows how many files have been read.
+        self.odt_reader.progressBar = NullProgressBar()
+        return True
+
+    def readXml(self):
+        """Read the data.
+        Returns list with elements of type ProcessingStyleItem.
+        If an exception is raised, pass it to recoverRead().
+        """
+        if self.extractFiles:
+            with zipfile.ZipFile(self.fileconfig.filepath, 'r') as zipper:
+                zipper.extractall(self.tempDir)
+        else:
+            self.odt_reader.odtFilepath = self.fileconfig.filepath
+        return self.odt_reader.read()
+
+    def recoverRead(self, exc):
+        """Tries to overcome several zipfile reading exceptions that may occur
+        by saving the file in .odt format and reading it again.
+        """
+        if isinstance(exc, FileNotFoundError):
             raise exceptions.FileAccessError(str(exc))
-        #self.cleanup()
-        logger.debug(util.funcName('end'))
-        return data
+        if not (isinstance(exc, zipfile.BadZipFile) or (
+                isinstance(exc, exceptions.FileAccessError)
+                and exc.msg.startswith("Error reading file"))):
+            raise exc
+        logger.warning(exc)
+        self.convert_to_odt()
+        return self.readXml()
 
-    def make_temp_dir(self):
-        """Make temporary directory to extract .odt file contents."""
-        self.tempBaseDir = os.path.join(self.outdir, 'LOLT Converted Files')
+    def make_temp_base_dir(self):
         if not os.path.exists(self.tempBaseDir):
             try:
                 os.makedirs(self.tempBaseDir)
             except OSError:
                 raise exceptions.FileAccessError(
                     "Could not create temporary folder %s", self.tempBaseDir)
+
+    def make_temp_dir(self):
+        """Make temporary directory to extract .odt file contents."""
+        self.make_temp_base_dir()
         MAX_FOLDERS = 1000
         for folderNum in range(1, MAX_FOLDERS):
             tempDirCandidate = os.path.join(self.tempBaseDir, "%03d" % folderNum)
@@ -95,22 +119,10 @@ class DocToXml:
             raise exceptions.FileAccessError(
                 "Could not create temporary folder %s", self.tempDir)
 
-    def incrementProgressPart(self):
-        self.progressRange_partNum += 1
-        self.progressRange.updatePart(self.progressRange_partNum)
-
-    def readFile(self):
-        with zipfile.ZipFile(self.fileconfig.filepath, 'r') as zipper:
-            zipper.extractall(self.tempDir)
-        self.incrementProgressPart()
-        self.odt_reader = OdtReader(
-            self.tempDir, self.scopeType, self.unoObjs)
-        return self.odt_reader.read()
-
     def convert_to_odt(self):
         """Opens a file such as .doc, saves as .odt and then closes it."""
         logger.debug(util.funcName('begin'))
-        self.incrementProgressPart()
+        self.make_temp_base_dir()
         basename = os.path.basename(self.fileconfig.filepath)
         name, dummy_ext = os.path.splitext(basename)
         newpath = os.path.join(self.tempBaseDir, name + "_converted.odt")
@@ -138,10 +150,13 @@ class DocToXml:
         except CloseVetoException:
             logger.warning("Could not close %s", newpath)
         self.fileconfig.filepath = newpath
-        self.incrementProgressPart()
         logger.debug(util.funcName('end'))
 
-    def makeChanges(self, fontChanges):
+    def writeChanges(self, fontChanges):
+        """Change the XML files and zip them into a new ODT file
+        in the output folder.
+        Returns the number of changes made.
+        """
         logger.debug(util.funcName('begin'))
         if not self.odt_reader:
             logger.warning("No odt_reader.")
@@ -152,24 +167,29 @@ class DocToXml:
 
         ## Zip the XML files back into a single ODT file
 
-        resultFilepath = ""
+        basename, extension = os.path.splitext(
+            os.path.basename(self.fileconfig.filepath))
         MAX_TRIES = 1000
         for fileNum in range(1, MAX_TRIES):
-            basename, extension = os.path.splitext(
-                os.path.basename(self.fileconfig.filepath))
             filename = "%s_%03d%s" % (basename, fileNum, extension)
-            resultCandidate = os.path.join(self.outdir, filename)
-            if not os.path.exists(resultCandidate):
-                resultFilepath = resultCandidate
+            resultFilepath = os.path.join(self.outdir, filename)
+            try:
+                # Mode 'x' fails if another thread already created the file.
+                zipper = zipfile.ZipFile(resultFilepath, 'x')
                 break
-        if not resultFilepath:
-            self.msgbox.display(
-                "Too many files named like %s.", resultCandidate)
-            return 0
+            except FileExistsError:
+                continue
+        else:
+            raise exceptions.FileAccessError(
+                "Too many files named like %s.", resultFilepath)
         logger.debug("Writing to file %s", resultFilepath)
-        with zipfile.ZipFile(resultFilepath, 'w') as zipper:
-            for abs_path, rel_path in paths_to_all_files(self.tempDir):
-                zipper.write(abs_path, rel_path)
+        with zipper:
+            if self.extractFiles:
+                for abs_path, rel_path in paths_to_all_files(self.tempDir):
+                    zipper.write(abs_path, rel_path)
+            else:
+                copy_odt(
+                    self.fileconfig.filepath, zipper, changer.changedFiles)
         logger.debug(util.funcName('end'))
         return numChanges
 
@@ -193,3 +213,72 @@ def paths_to_all_files(infolder):
             rel_path = os.path.relpath(abs_path, infolder)
             results.append((abs_path, rel_path))
     return results
+
+
+def copy_odt(srcpath, zipOut, changedFiles):
+    """Write the contents of the .odt file srcpath to zipOut.
+    Files in changedFiles are replaced by the new XML, and other files are
+    copied without decompressing and compressing them again.
+    As required by ODF, the mimetype file is written first and
+    is not compressed.
+
+    :param changedFiles: keys are filenames, values are bytes
+    """
+    with zipfile.ZipFile(srcpath, 'r') as zipIn:
+        # sorting is stable, so the order of the other files does not change
+        infos = sorted(
+            zipIn.infolist(), key=lambda info: info.filename != "mimetype")
+        for info in infos:
+            if info.filename in changedFiles:
+                newInfo = zipfile.ZipInfo(
+                    info.filename, date_time=time.localtime()[:6])
+                newInfo.compress_type = zipfile.ZIP_DEFLATED
+                newInfo.external_attr = info.external_attr
+                zipOut.writestr(newInfo, changedFiles[info.filename])
+            elif (info.filename == "mimetype"
+                  and info.compress_type != zipfile.ZIP_STORED):
+                zipOut.writestr(
+                    info.filename, zipIn.read(info),
+                    compress_type=zipfile.ZIP_STORED)
+            else:
+                copy_raw_member(zipIn, zipOut, info)
+
+
+# Undocumented attributes of zipfile.ZipFile used by copy_raw_member().
+RAW_COPY_ATTRS = ('fp', 'start_dir', 'filelist', 'NameToInfo', '_didModify')
+
+def can_copy_raw(zipIn, zipOut):
+    return (hasattr(zipIn, 'fp')
+            and all(hasattr(zipOut, attr) for attr in RAW_COPY_ATTRS))
+
+def copy_raw_member(zipIn, zipOut, info):
+    """Copy the compressed data of a file from one zip file to another.
+    The zipfile module does not provide a way to do this, so the local
+    header is written here and zipOut is updated as
+    ZipFile.writestr() would do.
+    If the zipfile module does not have the attributes needed for this,
+    then the file is decompressed and compressed again instead.
+    """
+    if not can_copy_raw(zipIn, zipOut):
+        logger.debug("Cannot copy %s without decompressing.", info.filename)
+        zipOut.writestr(copy.copy(info), zipIn.read(info))
+        return
+    zipIn.fp.seek(info.header_offset)
+    header = zipIn.fp.read(zipfile.sizeFileHeader)
+    if header[:4] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile("Bad header for %s" % info.filename)
+    nameLength, extraLength = struct.unpack("<HH", header[26:30])
+    zipIn.fp.seek(nameLength + extraLength, os.SEEK_CUR)
+    compressedData = zipIn.fp.read(info.compress_size)
+
+    newInfo = copy.copy(info)
+    # The sizes are known, so a data descriptor after the data is not needed.
+    newInfo.flag_bits &= ~0x08
+    zipOut.fp.seek(zipOut.start_dir)
+    newInfo.header_offset = zipOut.fp.tell()
+    zipOut.fp.write(newInfo.FileHeader())
+    zipOut.fp.write(compressedData)
+    zipOut.start_dir = zipOut.fp.tell()
+    zipOut.filelist.append(newInfo)
+    zipOut.NameToInfo[newInfo.filename] = newInfo
+    zipOut._didModify = True  # pylint: disable=protected-access
@@ -5,6 +5,7 @@ import logging
 import re
 
 from lingt.access.common import iteruno
+from lingt.access.writer.textmodel import DocTextModel
 from lingt.access.writer.traveler import VCLocation
 from lingt.ui.common.messagebox import MessageBox
 from lingt.ui.common.progressbar import ProgressBar, ProgressRange
@@ -247,19 +248,26 @@ class AbbrevSearch:
         logger.debug("AbbrevSearch init() finished")
 
     def findOccurrences(self, abbrevList):
-        """Modifies abbrevList."""
+        """Modifies abbrevList.
+        The text of the document is read once, and then each abbreviation
+        is counted in python, rather than searching the document for each
+        abbreviation.
+        """
         progressBar = ProgressBar(self.unoObjs, "Searching for occurrences...")
         progressBar.show()
         progressBar.updateBeginning()
+        textModel = DocTextModel(self.unoObjs)
+        textModel.load()
+        progressBar.updatePercent(20)
         progressRange = ProgressRange(ops=len(abbrevList), pbar=progressBar)
         for abbrevIndex, abbrev in enumerate(abbrevList):
-            search = self.unoObjs.document.createSearchDescriptor()
-            search.SearchString = abbrev.abbrevText
-            search.SearchCaseSensitive = False
-            search.SearchWords = True
-
-            selectionsFound = self.unoObjs.document.findAll(search)
-            occurrences = selectionsFound.getCount()
+            occurrences = 0
+            if abbrev.abbrevText:
+                # case insensitive, whole words only
+                wordRegex = re.compile(
+                    r"(?<!\w)" + re.escape(abbrev.abbrevText) + r"(?!\w)",
+                    re.IGNORECASE)
+                occurrences = textModel.count(wordRegex)
             abbrevList.setOccurrences(abbrevIndex, occurrences)
             progressRange.update(abbrevIndex)
         progressBar.updateFinishing()
@@ -47,6 +47,7 @@ class TextChanger:
         self.selsCount = 0
         self.askEach = False
         self.colorize = settings.colorize
+        self.convertedStrings = {}  # keys are input, values are output
 
     def setConverterCall(self, secCall):
         self.secCall = secCall
@@ -74,6 +75,13 @@ class TextChanger:
         rangeLastChanged = None
         progressRange = ProgressRange(
             start=40, stop=90, ops=len(ranges), pbar=self.progressBar)
+        self.convertedStrings = {}
+        if self.secCall is not None and not self.askEach:
+            try:
+                self.convertAll(ranges)
+            except exceptions.FileAccessError as exc:
+                logger.exception(exc)
+                return self.numChanges, self.numStyleChanges
 
         rangeNum = 1
         for txtRange in ranges:
@@ -109,6 +117,21 @@ class TextChanger:
         logger.debug(util.funcName('end'))
         return self.numChanges, self.numStyleChanges
 
+    def convertAll(self, ranges):
+        """Convert the strings of all ranges with as few calls to SEC as
+        possible.  This is not done when asking about each change, since the
+        user may decide to stop after the first few ranges.
+        """
+        inputStrings = set()
+        for txtRange in ranges:
+            try:
+                inputStrings.add(txtRange.sel.getString())
+            except (RuntimeException, IllegalArgumentException):
+                logger.warning("Failed to get text range.")
+        inputStrings = list(inputStrings)
+        self.convertedStrings = dict(
+            zip(inputStrings, self.secCall.convert_many(inputStrings)))
+
     def changeTextRange(self, txtRange):
         logger.debug(util.funcName('begin'))
         oSel = txtRange.sel
@@ -152,7 +175,10 @@ class TextChanger:
 
         changedText = False
         if self.secCall is not None:
-            outValue = self.secCall.convert(inValue)
+            if inValue in self.convertedStrings:
+                outValue = self.convertedStrings[inValue]
+            else:
+                outValue = self.secCall.convert(inValue)
             changedText = True
             if outValue == inValue:
                 changedText = False
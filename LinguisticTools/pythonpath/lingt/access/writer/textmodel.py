@@ -0,0 +1,211 @@
+"""
+Keep a copy of the text of a Writer document in python.
+
+Searching a document range by range takes many small calls to the
+document, and each one crosses the UNO bridge.  Instead, a DocTextModel
+reads all text portions in one pass.  Searching and deciding what to
+change can then be done in python, and only the resulting changes are
+written back to the document, all at once.
+
+This module exports:
+    DocTextModel
+    TextEdit
+"""
+import bisect
+import logging
+
+from com.sun.star.lang import IllegalArgumentException
+from com.sun.star.uno import RuntimeException
+
+from lingt.access.writer import textchanges
+from lingt.access.writer.textsearch import DocumentEnumerator
+from lingt.app import exceptions
+from lingt.utils import util
+
+logger = logging.getLogger("lingt.access.textmodel")
+
+class TextPortionModel:
+    """A text portion that has a single formatting."""
+    def __init__(self, start, attrsIndex, anchor):
+        self.start = start  # offset in the text of the paragraph
+        self.attrsIndex = attrsIndex  # index in DocTextModel.attrTuples
+        self.anchor = anchor  # the UNO text portion
+
+
+class ParagraphModel:
+    """The text of a paragraph, or of part of a paragraph if the text is
+    interrupted by something such as a footnote anchor or frame.
+    """
+    def __init__(self):
+        self.text = ""
+        self.portions = []  # TextPortionModel objects
+        self.portionStarts = []  # start of each portion, for bisecting
+
+    def portionAt(self, offset):
+        """Returns the portion that contains the offset."""
+        index = bisect.bisect_right(self.portionStarts, offset) - 1
+        return self.portions[max(index, 0)]
+
+
+class TextEdit:
+    """A change to make in the document.
+    The anchor is the text portion where the change starts, as it was when
+    the model was loaded, so that the change can be made without searching
+    for it again.
+    """
+    def __init__(self, paraIndex, start, end, newText, anchor, anchorOffset):
+        self.paraIndex = paraIndex
+        self.start = start  # offset in the text of the paragraph
+        self.end = end
+        self.newText = newText
+        self.anchor = anchor
+        self.anchorOffset = anchorOffset  # where the change starts in anchor
+
+
+class DocTextModel:
+    """The text and attributes of all text portions in a document,
+    read with one pass through the document.
+    Attributes of a portion are stored as an index into a list of distinct
+    tuples of values, because most portions share the same attributes.
+    Only the attributes given to the constructor are read, so that callers
+    that only need the text do not read attributes of every portion.
+    """
+    ATTR_NAMES = (
+        'CharFontName', 'CharFontNameAsian', 'CharFontNameComplex',
+        'CharLocale', 'CharLocaleAsian', 'CharLocaleComplex',
+        'CharStyleName', 'ParaStyleName')
+    # For these attributes, only the language is stored.
+    LOCALE_ATTRS = ('CharLocale', 'CharLocaleComplex', 'CharLocaleAsian')
+
+    def __init__(self, unoObjs, attrNames=()):
+        """:param attrNames: attributes to read, from ATTR_NAMES"""
+        self.unoObjs = unoObjs
+        # Sorted, because getPropertyValues() requires sorted names.
+        self.attrNames = tuple(sorted(attrNames))
+        for attrName in self.attrNames:
+            if attrName not in self.ATTR_NAMES:
+                raise exceptions.LogicError(
+                    "Unexpected attribute %s", attrName)
+        self.paragraphs = []  # ParagraphModel objects
+        self.attrTuples = []  # distinct tuples of values of attrNames
+        self.attrIndexes = {}  # keys are tuples, values are indexes
+
+    def load(self):
+        """Read the text portions of the document, including headers,
+        footers and footnotes, which is what findAll() searches.
+        Changes made to the document after this are not seen by the model
+        unless it is loaded again.
+        """
+        logger.debug(util.funcName('begin'))
+        self.paragraphs = []
+        docEnum = DocumentEnumerator(self.unoObjs)
+        self.readTextRuns(docEnum.documentTextRuns())
+        self.readTextRuns(docEnum.headerFooterTextRuns())
+        self.readTextRuns(docEnum.footnoteTextRuns())
+        logger.debug(
+            util.funcName('end', args=(
+                len(self.paragraphs), len(self.attrTuples))))
+
+    def readTextRuns(self, textRuns):
+        """:param textRuns: lists of neighboring text portions"""
+        localeIndexes = [
+            self.attrNames.index(attrName)
+            for attrName in self.LOCALE_ATTRS
+            if attrName in self.attrNames]
+        for textRun in textRuns:
+            para = ParagraphModel()
+            strings = []
+            offset = 0
+            for textSection in textRun:
+                values = []
+                if self.attrNames:
+                    values = list(
+                        textSection.getPropertyValues(self.attrNames))
+                for attrIndex in localeIndexes:
+                    values[attrIndex] = values[attrIndex].Language
+                para.portions.append(TextPortionModel(
+                    offset, self.internAttrs(tuple(values)), textSection))
+                para.portionStarts.append(offset)
+                string = textSection.getString()
+                strings.append(string)
+                offset += len(string)
+            para.text = "".join(strings)
+            self.paragraphs.append(para)
+
+    def internAttrs(self, attrTuple):
+        """Returns the index of the tuple in self.attrTuples,
+        adding it if needed.
+        """
+        attrsIndex = self.attrIndexes.get(attrTuple)
+        if attrsIndex is None:
+            attrsIndex = len(self.attrTuples)
+            self.attrTuples.append(attrTuple)
+            self.attrIndexes[attrTuple] = attrsIndex
+        return attrsIndex
+
+    def getAttrs(self, portion):
+        """Returns a dict with keys from the attributes that were read.
+        :param portion: type TextPortionModel
+        """
+        return dict(zip(self.attrNames, self.attrTuples[portion.attrsIndex]))
+
+    def finditer(self, regex):
+        """Generate tuples (paraIndex, match) for a compiled regex.
+        Matches do not extend across paragraphs.
+        """
+        for paraIndex, para in enumerate(self.paragraphs):
+            for match in regex.finditer(para.text):
+                yield paraIndex, match
+
+    def count(self, regex):
+        """Returns the number of matches of a compiled regex."""
+        return sum(1 for dummy in self.finditer(regex))
+
+    def makeEdit(self, paraIndex, start, end, newText):
+        """Returns a TextEdit to replace text of a paragraph."""
+        para = self.paragraphs[paraIndex]
+        if not 0 <= start <= end <= len(para.text):
+            raise exceptions.LogicError(
+                "Cannot change %d-%d of paragraph %d.", start, end, paraIndex)
+        portion = para.portionAt(start)
+        return TextEdit(
+            paraIndex, start, end, newText, portion.anchor,
+            start - portion.start)
+
+    def applyEdits(self, edits):
+        """Make the changes in the document.
+        Changes are made starting from the end of the document, so that the
+        anchors of changes that have not been made yet do not move.
+        Changes that overlap a later change are skipped.
+        The model itself is not changed, so load() it again to see the
+        changes.
+
+        :param edits: list of TextEdit objects
+        :returns: number of changes made
+        """
+        logger.debug(util.funcName('begin', args=len(edits)))
+        numChanges = 0
+        prevEdit = None
+        for edit in sorted(
+                edits, key=lambda edit: (edit.paraIndex, edit.start),
+                reverse=True):
+            if (prevEdit is not None
+                    and edit.paraIndex == prevEdit.paraIndex
+                    and edit.end > prevEdit.start):
+                logger.warning(
+                    "Skipping overlapping change in paragraph %d.",
+                    edit.paraIndex)
+                continue
+            try:
+                oText = edit.anchor.getText()
+                cursor = oText.createTextCursorByRange(edit.anchor.getStart())
+                cursor.goRight(edit.anchorOffset, False)
+                cursor.goRight(edit.end - edit.start, True)
+            except (RuntimeException, IllegalArgumentException):
+                logger.warning("Failed to go to text range.")
+                continue
+            textchanges.changeString(cursor, edit.newText)
+            numChanges += 1
+            prevEdit = edit
+        logger.debug(util.funcName('end', args=numChanges))
+        return numChanges
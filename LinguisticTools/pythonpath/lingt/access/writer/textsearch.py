@@ -4,8 +4,12 @@ Writer document searches such as by font or full document.
 import logging
 import re
 
+from com.sun.star.beans.PropertyState import DIRECT_VALUE
+from com.sun.star.lang import IllegalArgumentException
+from com.sun.star.uno import RuntimeException
+
 from lingt.access.common import iteruno
-from lingt.access.writer.traveler import Traveler
+from lingt.access.writer import styles
 from lingt.app import exceptions
 from lingt.ui.common.progressbar import ProgressRange
 from lingt.utils import util
@@ -69,6 +73,7 @@ class TextSearch:
         pages.
         """
         logger.debug(util.funcName('begin'))
+        self.ranger.resetRanges()
         oText = self.unoObjs.text
         cursor = oText.createTextCursorByRange(oText.getStart())
         cursor.collapseToStart()
@@ -76,10 +81,11 @@ class TextSearch:
         cursLeft = oText.createTextCursorByRange(cursor.getStart())
         cursLeft.collapseToStart()
         while cursor.goRight(MANY_CHARACTERS, True):
-            while cursor.goRight(1, True):
-                # Find a wordbreak
-                if cursor.getString().endswith(" "):
-                    break
+            # Find a wordbreak.  This is much faster than going right one
+            # character at a time, because getting the string of the whole
+            # chunk after each step is slow.
+            if not cursor.isEndOfWord():
+                cursor.gotoEndOfWord(True)
             cursRight = oText.createTextCursorByRange(cursLeft.getStart())
             cursRight.collapseToStart()
             cursRight.gotoRange(cursor.getEnd(), True)
@@ -156,11 +162,14 @@ class TextSearch:
         For example, "Standard", not "Default Style".
         """
         logger.debug(util.funcName('begin', args=self.config.style))
-        for simpleTextSection in self.docEnum.documentSections():
-            if simpleTextSection.CharStyleName == self.config.style:
+        for simpleTextSection, (charStyleName,) in (
+                self.docEnum.documentSectionsWithProps(["CharStyleName"])):
+            if charStyleName == self.config.style:
                 logger.debug("Found style %s", self.config.style)
                 # TextPortions include the TextRange service.
                 self.ranger.addRange(simpleTextSection)
+                if limitReached(self.config, len(self.ranger.getRanges())):
+                    break
 
     def scopeComplexFont(self):
         """Similar to character styles,
@@ -168,18 +177,21 @@ class TextSearch:
         buggy, so we enumerate instead.
         """
         logger.debug(util.funcName('begin'))
-        for simpleTextSection in self.docEnum.documentSections():
-            if self.config.fontType == "Complex":
-                sectionFont = simpleTextSection.CharFontNameComplex
-            elif self.config.fontType == "Asian":
-                sectionFont = simpleTextSection.CharFontNameAsian
-            else:
-                raise exceptions.LogicError(
-                    "Unexpected font type %s.", self.config.fontType)
+        if self.config.fontType == "Complex":
+            attrName = "CharFontNameComplex"
+        elif self.config.fontType == "Asian":
+            attrName = "CharFontNameAsian"
+        else:
+            raise exceptions.LogicError(
+                "Unexpected font type %s.", self.config.fontType)
+        for simpleTextSection, (sectionFont,) in (
+                self.docEnum.documentSectionsWithProps([attrName])):
             if sectionFont == self.config.fontName:
                 logger.debug("Found font %s", self.config.fontName)
                 # TextPortions include the TextRange service.
                 self.ranger.addRange(simpleTextSection)
+                if limitReached(self.config, len(self.ranger.getRanges())):
+                    break
 
     def scopeLocale(self):
         """This is similar to searching for a character style."""
@@ -187,13 +199,50 @@ class TextSearch:
         lang = self.config.lang
         if not lang:
             raise exceptions.ChoiceProblem("No locale was specified.")
-        for simpleTextSection in self.docEnum.documentSections():
-            if lang in (
-                    simpleTextSection.CharLocale.Language,
-                    simpleTextSection.CharLocaleComplex.Language,
-                    simpleTextSection.CharLocaleAsian.Language):
+        for simpleTextSection, locales in (
+                self.docEnum.documentSectionsWithProps([
+                    "CharLocale", "CharLocaleAsian", "CharLocaleComplex"])):
+            if lang in (locale.Language for locale in locales):
                 # TextPortions include the TextRange service.
                 self.ranger.addRange(simpleTextSection)
+                if limitReached(self.config, len(self.ranger.getRanges())):
+                    break
+
+    def scopeMultiple(self, conditions):
+        """Search for several paragraph styles, character styles and fonts
+        with only one pass through the document, instead of one pass for
+        each.  Neighboring text sections that match the same condition
+        are joined into one range, so words are not split up.
+
+        :param conditions: list of SearchCondition objects
+        :returns: a list of ranges for each condition
+        """
+        logger.debug(util.funcName('begin', args=len(conditions)))
+        self.ranger.resetRanges()
+        for condition in conditions:
+            condition.loadValues(self.unoObjs)
+        propNames = tuple(sorted(set(
+            condition.propName for condition in conditions)))
+        rangeLists = [[] for condition in conditions]
+        for textRun in self.docEnum.documentTextRuns():
+            propValues = [
+                dict(zip(propNames, textSection.getPropertyValues(propNames)))
+                for textSection in textRun]
+            for condition, rangeList in zip(conditions, rangeLists):
+                if limitReached(condition.config, len(rangeList)):
+                    continue
+                matchesInRun = [
+                    condition.matches(
+                        textSection, values[condition.propName])
+                    for textSection, values in zip(textRun, propValues)]
+                for oSel in joinMatches(textRun, matchesInRun):
+                    self.ranger.addRange(oSel)
+                    rangeList.append(self.ranger.getRanges()[-1])
+            if all(limitReached(condition.config, len(rangeList))
+                   for condition, rangeList in zip(conditions, rangeLists)):
+                break
+        logger.debug(util.funcName('end'))
+        return rangeLists
 
     def scopeSFMs(self):
         sfm_str = re.sub(r'\\', r'', self.config.SFMs)
@@ -212,18 +261,16 @@ class TextSearch:
         logger.debug("Moving the start to after the SFM marker.")
         for txtRange in self.ranger.getRanges():
             oSel = txtRange.sel
-            oText = oSel.getText()
-            cursor = oText.createTextCursorByRange(oSel)
+            cursor = oSel.getText().createTextCursorByRange(oSel)
+            # The marker is followed by a space, for example "\\tx ".
+            markerLen = cursor.getString().find(" ") + 1
+            if markerLen == 0:
+                logger.debug("no space after marker")
+                continue
             cursor.collapseToStart()
-            while cursor.goRight(1, True):
-                if cursor.getString().endswith(" "):
-                    cursor.collapseToEnd()
-                    cursor.gotoRange(oSel.getEnd(), True)
-                    txtRange.sel = cursor
-                    break
-                if oText.compareRegionEnds(cursor, oSel.getEnd()) < 0:
-                    logger.debug("passed end")
-                    break
+            cursor.goRight(markerLen, False)
+            cursor.gotoRange(oSel.getEnd(), True)
+            txtRange.sel = cursor
 
     def doSearch(self, search):
         logger.debug(util.funcName('begin'))
@@ -244,80 +291,203 @@ class TextSearch:
             logger.debug("Found selection %d", selIndex)
             self.ranger.addRangesForCursor(selectionFound)
             progressRange.update(selIndex)
-            if (self.config.matchesLimit > 0
-                    and selIndex >= self.config.matchesLimit):
-                # Stop here.  This may help with large documents, doing a
-                # little at a time.
-                logger.debug("Stopping at this match")
+            if limitReached(self.config, selIndex + 1):
                 return
 
 
+class SearchCondition:
+    """One kind of text to look for when searching for several at once
+    with TextSearch.scopeMultiple().
+    """
+    PARASTYLE = 'ParaStyle'
+    CHARSTYLE = 'CharStyle'
+    FONT = 'Font'
+
+    def __init__(self, scopeType, searchConfig):
+        """:param searchConfig: type TextSearchSettings"""
+        self.scopeType = scopeType
+        self.config = searchConfig
+        self.propName = ""
+        self.values = set()  # property values that match
+        self.directOnly = False  # ignore values that come from styles
+
+    def loadValues(self, unoObjs):
+        """Determine which property to check and which values match."""
+        if self.scopeType == self.PARASTYLE:
+            # Either the display name or the underlying name may be given.
+            self.propName = "ParaStyleName"
+            self.values = set(
+                name for displayName, name in styles.getListOfStyles(
+                    'ParagraphStyles', unoObjs)
+                if self.config.style in (displayName, name))
+            self.values.add(self.config.style)
+        elif self.scopeType == self.CHARSTYLE:
+            self.propName = "CharStyleName"
+            self.values = {self.config.style}
+        elif self.scopeType == self.FONT:
+            if self.config.fontType == "Complex":
+                self.propName = "CharFontNameComplex"
+            elif self.config.fontType == "Asian":
+                self.propName = "CharFontNameAsian"
+            else:
+                # Like TextSearch.scopeFont(), only search direct formatting.
+                self.propName = "CharFontName"
+                self.directOnly = True
+            self.values = {self.config.fontName}
+        else:
+            raise exceptions.LogicError(
+                "Unexpected scope type %s.", self.scopeType)
+
+    def matches(self, textSection, value):
+        if value not in self.values:
+            return False
+        if self.directOnly:
+            return (textSection.getPropertyState(self.propName) ==
+                    DIRECT_VALUE)
+        return True
+
+
+def limitReached(searchConfig, numFound):
+    """Stopping at the match limit may help with large documents,
+    doing a little at a time.
+    :param searchConfig: type TextSearchSettings
+    """
+    if searchConfig.matchesLimit > 0 and numFound > searchConfig.matchesLimit:
+        logger.debug("Stopping at this match")
+        return True
+    return False
+
+
+def joinMatches(textRun, matchesInRun):
+    """Generate a text range for each group of neighboring text sections
+    that match.
+
+    :param textRun: list of text sections that are next to each other
+    :param matchesInRun: list of booleans, one for each text section
+    """
+    groupStart = None
+    for index, matched in enumerate(matchesInRun + [False]):
+        if matched and groupStart is None:
+            groupStart = index
+        elif not matched and groupStart is not None:
+            firstSection = textRun[groupStart]
+            lastSection = textRun[index - 1]
+            if firstSection is lastSection:
+                yield firstSection
+            else:
+                oText = firstSection.getText()
+                cursor = oText.createTextCursorByRange(
+                    firstSection.getStart())
+                cursor.gotoRange(lastSection.getEnd(), True)
+                yield cursor
+            groupStart = None
+
+
 class DocumentEnumerator:
     """
     Document enumeration can be more effecient and reliable than cursors.
+    Text sections are generated as they are found rather than collected
+    into a list, so callers can stop early.
     """
+    # Portions that mark a position but have no text of their own,
+    # so they do not interrupt the text around them.
+    MARKER_PORTIONS = (
+        "Bookmark", "Redline", "ReferenceMark", "DocumentIndexMark",
+        "SoftPageBreak", "InContentMetadata")
+
     def __init__(self, unoObjs):
         self.unoObjs = unoObjs
 
     def documentSections(self):
-        """Get all text sections for the document.
+        """Generate all text sections for the document.
         Each text section has a single type of formatting.
         """
         return self.textSectionsForParEnum(self.unoObjs.text)
 
+    def documentSectionsWithProps(self, propNames):
+        """Generate tuples (textSection, propValues) for the document,
+        where propValues are in the same order as propNames.
+        Getting all values with one call is much faster than reading each
+        property separately over the UNO bridge.
+        :param propNames: must be sorted, as getPropertyValues() requires
+        """
+        propNames = tuple(propNames)
+        for textSection in self.documentSections():
+            # TextPortions implement XMultiPropertySet.
+            yield textSection, textSection.getPropertyValues(propNames)
+
     def textSectionsForParEnum(self, oParEnumerator):
-        """Get text sections for all paragraphs that are enumerated by the
-        given object.
+        """Generate text sections for all paragraphs that are enumerated by
+        the given object.
         Do not pass a cursor inside a table as the oParEnumerator, because it
         will work but the entire table
         or paragraph will be enumerated, not just the selection.
         Instead use addRangesForCursor().
         """
-        textSections = []
-        i = 0
-        for oPar in iteruno.byEnum(oParEnumerator):
-            i += 1
+        for textRun in self.textRunsForParEnum(oParEnumerator):
+            yield from textRun
+
+    def documentTextRuns(self):
+        """Like documentSections(), but generates lists of text sections
+        that are next to each other in the same paragraph.
+        """
+        return self.textRunsForParEnum(self.unoObjs.text)
+
+    def textRunsForParEnum(self, oParEnumerator):
+        for i, oPar in enumerate(iteruno.byEnum(oParEnumerator), 1):
             logger.debug("par %d: %s", i, oPar.ImplementationName)
-            textSections += self.textSectionsOfPar(oPar)
-        return textSections
+            yield from self.textRunsOfPar(oPar)
 
-    def textSectionsOfPar(self, oPar, textSectionList=None):
+    def textRunsOfPar(self, oPar):
         """Recursively enumerate paragraphs, tables and frames.
         Tables may be nested.
+        Generates lists of text sections.  Each list ends at the end of a
+        paragraph or where something other than text, such as a frame, is
+        in the paragraph.
+        Markers such as bookmarks do not end the list.
         """
-        if textSectionList is None:
-            textSectionList = []
         if oPar.supportsService("com.sun.star.text.Paragraph"):
+            textRun = []
             for oTextPortion in iteruno.byEnum(oPar):
                 if oTextPortion.TextPortionType == "Text":
                     # TextPortions include the TextRange service.
                     logger.debug("simple text portion")
-                    textSectionList.append(oTextPortion)
-                elif oTextPortion.TextPortionType == "Frame":
+                    textRun.append(oTextPortion)
+                    continue
+                if oTextPortion.TextPortionType in self.MARKER_PORTIONS:
+                    continue
+                if textRun:
+                    yield textRun
+                    textRun = []
+                if oTextPortion.TextPortionType == "Frame":
                     logger.debug("Frame text portion")
                     oFrameEnum = oTextPortion.createContentEnumeration(
                         "com.sun.star.text.TextFrame")
                     # always only 1 item?
                     for oFrame in iteruno.fromEnum(oFrameEnum):
-                        self.textSectionsOfPar(oFrame, textSectionList)
+                        yield from self.textRunsOfPar(oFrame)
+            if textRun:
+                yield textRun
         elif oPar.supportsService("com.sun.star.text.TextTable"):
             oTable = oPar
             logger.debug("table %s", oTable.getName())
-            self.unoObjs.controller.select(oTable)  # go to first cell
             for cellName in oTable.getCellNames():
                 logger.debug("cell %s:%s", oTable.getName(), cellName)
                 oCell = oTable.getCellByName(cellName)
                 for oPar2 in iteruno.byEnum(oCell):
-                    self.textSectionsOfPar(oPar2, textSectionList)
+                    yield from self.textRunsOfPar(oPar2)
         elif oPar.supportsService("com.sun.star.text.TextFrame"):
             oFrame = oPar
             logger.debug("frame %s", oFrame.getName())
             for oPar2 in iteruno.byEnum(oFrame):
-                self.textSectionsOfPar(oPar2, textSectionList)
-        return textSectionList
+                yield from self.textRunsOfPar(oPar2)
 
     def footnotes(self):
-        textSections = []
+        for textRun in self.footnoteTextRuns():
+            yield from textRun
+
+    def footnoteTextRuns(self):
+        """Like documentTextRuns(), but for footnotes and endnotes."""
         logger.debug("looking for footnotes")
         footnotes = self.unoObjs.document.getFootnotes()
         endnotes = self.unoObjs.document.getEndnotes()
@@ -325,11 +495,32 @@ class DocumentEnumerator:
             for oNote in iteruno.byIndex(notes):
                 for oPar in iteruno.byEnum(oNote):
                     if oPar.supportsService("com.sun.star.text.Paragraph"):
-                        for oTextPortion in iteruno.byEnum(oPar):
-                            if oTextPortion.TextPortionType == "Text":
-                                # TextPortions include the TextRange service.
-                                textSections.append(oTextPortion)
-        return textSections
+                        yield from self.textRunsOfPar(oPar)
+
+    def headerFooterTextRuns(self):
+        """Like documentTextRuns(), but for headers and footers of the page
+        styles that are used in the document.
+        """
+        logger.debug("looking for headers and footers")
+        pageStyles = self.unoObjs.document.getStyleFamilies().getByName(
+            "PageStyles")
+        for oStyle in iteruno.byIndex(pageStyles):
+            if not oStyle.isInUse():
+                continue
+            hasFirst = oStyle.getPropertySetInfo().hasPropertyByName(
+                "FirstIsShared")
+            for part in ("Header", "Footer"):
+                if not oStyle.getPropertyValue(part + "IsOn"):
+                    continue
+                textNames = [part + "Text"]
+                if not oStyle.getPropertyValue(part + "IsShared"):
+                    textNames.append(part + "TextLeft")
+                if hasFirst and not oStyle.getPropertyValue("FirstIsShared"):
+                    textNames.append(part + "TextFirst")
+                for textName in textNames:
+                    oText = oStyle.getPropertyValue(textName)
+                    if oText is not None:
+                        yield from self.textRunsForParEnum(oText)
 
 
 class TxRanger:
@@ -338,9 +529,6 @@ class TxRanger:
         self.unoObjs = unoObjs
         self.checkForFormatting = checkForFormatting
         self.ranges = []  # list of TxtRange objects
-        self.traveler = None
-        self.chunker = None
-        self.selFormatting = None  # formatting of selected string
 
     def resetRanges(self):
         self.ranges = []
@@ -357,78 +545,10 @@ class TxRanger:
             self.addRange(oSel)
             logger.debug(util.funcName('return'))
             return
-        simpleTextRanges = []  # ranges that have only one formatting
-        self.traveler = Traveler(self.unoObjs)
-        self.traveler.createCursors(oSel)
-        self.chunker = Chunker()
-        self.selFormatting = None
-        while True:
-            #logger.debug(
-            #   "moreToGo %s", self.traveler.rangeRight.compareVC())
-            if (self.traveler.rangeRight.compareVC() == 0
-                    or self._formattingChanges()
-                    or self.chunker.tooBig()):
-                self.addCurrentRange(simpleTextRanges)
-                self.selFormatting = None
-            if self.traveler.rangeRight.compareVC() < 0:
-                if self.moveRight():
-                    self.chunker.stringLonger()
-                    continue
-            # We've reached the end of the string.
-            break
+        simpleTextRanges = FormattingSplitter(oSel).split()
         logger.debug(util.funcName('end'))
         self.addRangeList(simpleTextRanges)
 
-    def _formattingChanges(self):
-        """Check for formatting changes at the current location."""
-        oVC = self.unoObjs.viewcursor
-        splitAtFormattingChange = False
-        if not self.selFormatting:
-            self.selFormatting = Formatting(oVC)
-        oVCTextCurs = oVC.getText().createTextCursorByRange(oVC)
-        if oVCTextCurs.isEndOfParagraph():
-            logger.debug("at end of paragraph")
-            splitAtFormattingChange = True
-        elif self.traveler.rangeRight.compareVC() < 0:
-            # We need to look ahead because the different formatting is
-            # only seen when the cursor is on the right side of the
-            # character.
-            oVC.goRight(1, False)
-            #logger.debug(util.debug_tellNextChar(oVC))
-            nextFormatting = Formatting(oVC)
-            if not nextFormatting.sameCharForm(self.selFormatting):
-                logger.debug("found different formatting")
-                splitAtFormattingChange = True
-            oVC.goLeft(1, False)
-        return splitAtFormattingChange
-
-    def addCurrentRange(self, simpleTextRanges):
-        cursLeft = self.traveler.cursLeft
-        # select the string
-        cursLeft.gotoRange(self.unoObjs.viewcursor, True)
-        logger.debug(
-            "String %d = '%s'", self.chunker.stringNum, cursLeft.getString())
-        oTextCursTmp = cursLeft.getText().createTextCursorByRange(cursLeft)
-        simpleTextRanges.append(oTextCursTmp)
-        cursLeft.goRight(0, False)  # deselect
-        self.chunker.nextString()
-
-    def moveRight(self):
-        """Returns True on success, like cursor.goRight()."""
-        oVC = self.unoObjs.viewcursor
-        prevInText = InText(oVC)
-        #logger.debug("oVC moveRight")
-        if not oVC.goRight(1, False):
-            logger.warning("cannot go any further")
-            return False
-        #logger.debug(util.debug_tellNextChar(oVC))
-        nextInText = InText(oVC)
-        if not nextInText.inSameText(prevInText):
-            ## Going into a new text such as a TextTable.
-            logger.debug("Going into new text.")
-            self.traveler.cursLeft = oVC.getText().createTextCursorByRange(oVC)
-        return True
-
     def addRangeList(self, rangeList):
         """Convenience function to handle a list."""
         for aRange in rangeList:
@@ -468,6 +588,169 @@ class TxRanger:
         logger.debug(util.funcName('end'))
 
 
+class FormattingSplitter:
+    """Splits a text range into ranges that each have only one formatting.
+
+    Each text portion of a paragraph already has a single formatting,
+    so instead of moving the viewcursor through every character,
+    we enumerate the portions of the paragraphs in the range and clip them
+    to the range boundaries.  Nothing moves on the screen, and formatting
+    is compared once per portion rather than once per character.
+    """
+    CONTENT_PORTIONS = ("Text", "TextField")
+
+    def __init__(self, oSel):
+        self.oText = oSel.getText()
+        self.rangeStart = oSel.getStart()
+        self.rangeEnd = oSel.getEnd()
+        try:
+            if self.oText.compareRegionStarts(oSel.getEnd(), oSel) >= 0:
+                logger.debug("start of selection is on the right")
+                self.rangeStart, self.rangeEnd = (
+                    self.rangeEnd, self.rangeStart)
+        except (RuntimeException, IllegalArgumentException):
+            logger.warning("could not get range from selection")
+        self.tableName = ""
+        self.cellName = ""
+        try:
+            self.tableName = getContainerName(oSel, 'TextTable')
+            self.cellName = getContainerName(oSel, 'CellName')
+        except AttributeError:
+            # not in a table
+            pass
+        self.chunker = Chunker()
+        self.simpleTextRanges = []  # ranges that have only one formatting
+        self.runCursor = None  # the range currently being built
+        self.runFormatting = None  # formatting of runCursor
+        self.reachedStart = False
+        self.passedEnd = False
+
+    def split(self):
+        """Returns a list of text cursors."""
+        try:
+            cursor = self.oText.createTextCursorByRange(self.rangeStart)
+            cursor.gotoRange(self.rangeEnd, True)
+        except (RuntimeException, IllegalArgumentException):
+            raise exceptions.RangeError("Failed to go to text range.")
+        for oPar in iteruno.byEnum(cursor):
+            self._splitElement(oPar, True)
+            if self.passedEnd:
+                break
+        self._endRun()
+        return self.simpleTextRanges
+
+    def _splitElement(self, oPar, clip):
+        """:param clip: true if oPar may extend outside of the range"""
+        if oPar.supportsService("com.sun.star.text.Paragraph"):
+            self._splitParagraph(oPar, clip)
+        elif oPar.supportsService("com.sun.star.text.TextTable"):
+            self._splitTable(oPar, clip)
+
+    def _splitTable(self, oTable, clip):
+        logger.debug("table %s", oTable.getName())
+        self._endRun()
+        if clip and self.cellName and oTable.getName() == self.tableName:
+            # The range is inside of this table.
+            cellNames = [self.cellName]
+        else:
+            cellNames = oTable.getCellNames()
+            if clip and self.reachedStart:
+                # The whole table is inside of the range.
+                clip = False
+        for cellName in cellNames:
+            oCell = oTable.getCellByName(cellName)
+            for oPar in iteruno.byEnum(oCell):
+                self._splitElement(oPar, clip)
+                if clip and self.passedEnd:
+                    return
+
+    def _splitParagraph(self, oPar, clip):
+        for oPortion in iteruno.byEnum(oPar):
+            piece = oPortion
+            if clip:
+                piece = self._clipToRange(oPortion)
+                if piece is None:
+                    if self.passedEnd:
+                        break
+                    continue
+            if oPortion.TextPortionType in self.CONTENT_PORTIONS:
+                self._addPiece(piece, Formatting(oPortion))
+            elif piece.getString():
+                # something else such as a footnote anchor
+                self._endRun()
+            if clip and self.passedEnd:
+                break
+        logger.debug("at end of paragraph")
+        self._endRun()
+
+    def _clipToRange(self, oPortion):
+        """Returns a text cursor for the part of the portion that is inside
+        of the range, or None if no part of it is inside.
+        """
+        oText = self.oText
+        try:
+            if oText.compareRegionEnds(oPortion, self.rangeStart) >= 0:
+                return None
+            if oText.compareRegionStarts(oPortion, self.rangeEnd) <= 0:
+                self.passedEnd = True
+                return None
+            pieceStart = oPortion.getStart()
+            if oText.compareRegionStarts(oPortion, self.rangeStart) > 0:
+                pieceStart = self.rangeStart
+            pieceEnd = oPortion.getEnd()
+            if oText.compareRegionEnds(oPortion, self.rangeEnd) <= 0:
+                pieceEnd = self.rangeEnd
+                self.passedEnd = True
+        except IllegalArgumentException:
+            # The portion is in a different text, such as another table cell.
+            return None
+        self.reachedStart = True
+        piece = oText.createTextCursorByRange(pieceStart)
+        piece.gotoRange(pieceEnd, True)
+        return piece
+
+    def _addPiece(self, piece, formatting):
+        """Add the piece to the current range unless its formatting is
+        different.  The piece is expected to start where the current range
+        ends.
+        """
+        pieceLen = len(piece.getString())
+        if pieceLen == 0:
+            return
+        if (self.runCursor is not None
+                and not formatting.sameCharForm(self.runFormatting)):
+            logger.debug("found different formatting")
+            self._endRun()
+        if self.runCursor is None:
+            self.runCursor = piece.getText().createTextCursorByRange(
+                piece.getStart())
+            self.runFormatting = formatting
+        while pieceLen > self.chunker.roomLeft():
+            # Fill up this chunk and start another one.
+            roomLeft = self.chunker.roomLeft()
+            self.runCursor.goRight(roomLeft, True)
+            pieceLen -= roomLeft
+            nextStart = self.runCursor.getEnd()
+            self.chunker.stringLonger(roomLeft)
+            self._endRun()
+            self.runCursor = piece.getText().createTextCursorByRange(
+                nextStart)
+            self.runFormatting = formatting
+        self.runCursor.gotoRange(piece.getEnd(), True)
+        self.chunker.stringLonger(pieceLen)
+
+    def _endRun(self):
+        if self.runCursor is None:
+            return
+        logger.debug(
+            "String %d has %d characters", self.chunker.stringNum,
+            self.chunker.stringLen)
+        self.simpleTextRanges.append(self.runCursor)
+        self.runCursor = None
+        self.runFormatting = None
+        self.chunker.nextString()
+
+
 class Chunker:
     """Handle text in limited size chunks.
     The limit is pretty large, so most of the time there will probably just
@@ -482,11 +765,11 @@ class Chunker:
         self.stringLen = 0
         self.stringNum += 1
 
-    def stringLonger(self):
-        self.stringLen += 1
+    def stringLonger(self, numChars=1):
+        self.stringLen += numChars
 
-    def tooBig(self):
-        return self.stringLen >= self.MAX_STRING_LENGTH
+    def roomLeft(self):
+        return max(0, self.MAX_STRING_LENGTH - self.stringLen)
 
 
 class TxtRange:
@@ -583,33 +866,3 @@ def getContainerName(cursor, containerType):
         if cursor.TextFrame:
             return cursor.TextFrame.getName()
     return ""
-
-class InText:
-    """To hold cursor attributes about which text we are in."""
-    #CONTAINER_TYPES = ['CharAutoStyleName', 'TextTable', 'TextFrame', 'Cell',
-    #                   'TextSection', 'TextField', 'Footnote']
-    CONTAINER_TYPES = ['TextTable', 'CellName', 'TextFrame']
-
-    def __init__(self, cursor):
-        self.containers = {}
-        for container in self.CONTAINER_TYPES:
-            self.containers[container] = ""
-            if cursor is not None:
-                self.containers[container] = getContainerName(
-                    cursor, container)
-
-    def inSameText(self, otherFormatting):
-        for container in self.CONTAINER_TYPES:
-            if (self.containers[container] !=
-                    otherFormatting.containers[container]):
-                return False
-        return True
-
-    def describeComparison(self, otherFormatting):
-        for container in self.CONTAINER_TYPES:
-            if (self.containers[container] !=
-                    otherFormatting.containers[container]):
-                return "%s != %s" % (
-                    self.containers[container],
-                    otherFormatting.containers[container])
-        return "seem to be the same"
@@ -11,42 +11,6 @@ from lingt.utils import util
 
 logger = logging.getLogger("lingt.access.traveler")
 
-class Traveler:
-    """Cursors useful for traversing text."""
-    def __init__(self, unoObjs):
-        self.unoObjs = unoObjs
-        self.cursLeft = None  # starting from leftmost and going right
-        self.rangeRight = None  # to tell if we're finished traversing
-
-    def createCursors(self, selectionCursor):
-        text = selectionCursor.getText()
-        cursLeftmost = selectionCursor.getStart()
-        cursRightmost = selectionCursor.getEnd()
-        try:
-            if text.compareRegionStarts(
-                    selectionCursor.getEnd(), selectionCursor) >= 0:
-                logger.debug("start of selection is on the right")
-                # swap
-                cursLeftmost, cursRightmost = cursRightmost, cursLeftmost
-        except (RuntimeException, IllegalArgumentException):
-            logger.warning("could not get range from selection")
-        try:
-            cursTmp = text.createTextCursorByRange(cursLeftmost)
-        except (RuntimeException, IllegalArgumentException):
-            raise exceptions.RangeError("Failed to go to text range.")
-        cursTmp.gotoRange(cursRightmost, True)
-        logger.debug("text = '%s'", cursTmp.getString())
-
-        # We use the viewcursor because text cursors cannot goRight into tables
-        oVC = self.unoObjs.viewcursor
-        oVC.gotoRange(cursLeftmost, False)
-        #logger.debug(util.debug_tellNextChar(oVC))
-        self.cursLeft = oVC.getText().createTextCursorByRange(oVC)
-        self.rangeRight = RangeCompare(
-            text.createTextCursorByRange(cursRightmost),
-            self.unoObjs.viewcursor)
-
-
 class RangeJumper:
     """Jumps to a specific location in a range specified by a string.
     By bisecting the string, takes O(log n) to jump.
@@ -16,6 +16,7 @@ from com.sun.star.text.ControlCharacter import PARAGRAPH_BREAK
 
 from lingt.access.common import iteruno
 from lingt.app import exceptions
+from lingt.utils import util
 from lingt.utils.locale import theLocale
 
 logger = logging.getLogger("lingt.access.uservars")
@@ -39,6 +40,11 @@ class Prefix:
 class UserVars:
     """Access to the user defined properties of the document.
     These can be viewed using File > Properties > Custom Properties.
+
+    Each access normally takes several calls to Office.  When many
+    variables will be read, call beginSnapshot() to read all variables
+    with this prefix at once.  Changes are then kept in memory until
+    endSnapshot() is called.
     """
     def __init__(self, VAR_PREFIX, oDoc, otherLogger):
         """
@@ -50,6 +56,10 @@ class UserVars:
         self.otherLogger = otherLogger
         oDocProps = oDoc.getDocumentProperties()
         self.userProps = oDocProps.getUserDefinedProperties()
+        self.snapshot = None  # dict of values keyed by var name
+        self.snapshotNames = set()  # names that exist in the document
+        self.changedNames = set()
+        self.deletedNames = set()
 
     def userPropsInfo(self):
         return self.userProps.getPropertySetInfo()
@@ -67,6 +77,11 @@ class UserVars:
             stringVal = ""
         else:
             stringVal = str(val)
+        if self.snapshot is not None:
+            self.snapshot[varName] = stringVal
+            self.changedNames.add(varName)
+            self.deletedNames.discard(varName)
+            return
         if self.userPropsInfo().hasPropertyByName(varName):
             self.userProps.setPropertyValue(varName, stringVal)
         else:
@@ -76,6 +91,8 @@ class UserVars:
         """Returns the value of a user variable as a string"""
         varName = self.getVarName(baseVarName)
         self.otherLogger.debug("getUserVar %s", varName)
+        if self.snapshot is not None:
+            return self.snapshot.get(varName, "")
         if self.userPropsInfo().hasPropertyByName(varName):
             stringVal = self.userProps.getPropertyValue(varName)
             #self.otherLogger.debug("getUserVar =%s", stringVal)
@@ -114,6 +131,14 @@ class UserVars:
         """
         varName = self.VAR_PREFIX + varName
         self.otherLogger.debug("delUserVar %s", varName)
+        if self.snapshot is not None:
+            if varName not in self.snapshot:
+                self.otherLogger.debug("Property not found")
+                return False
+            del self.snapshot[varName]
+            self.changedNames.discard(varName)
+            self.deletedNames.add(varName)
+            return True
         if self.userPropsInfo().hasPropertyByName(varName):
             self.userProps.removeProperty(varName)
             self.otherLogger.debug("Property deleted")
@@ -121,6 +146,55 @@ class UserVars:
         self.otherLogger.debug("Property not found")
         return False
 
+    def beginSnapshot(self):
+        """Read all variables with this prefix from the document.
+        Until endSnapshot() is called, values are read and changed in memory
+        only.
+        """
+        self.snapshot = {}
+        for prop in self.userProps.getPropertyValues():
+            if prop.Name.startswith(self.VAR_PREFIX):
+                self.snapshot[prop.Name] = prop.Value
+        self.snapshotNames = set(self.snapshot)
+        self.changedNames = set()
+        self.deletedNames = set()
+        self.otherLogger.debug("Read %d user vars.", len(self.snapshot))
+
+    def endSnapshot(self):
+        """Write changed values to the document and stop using the
+        snapshot.
+        """
+        if self.snapshot is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self.snapshot = None
+
+    def flush(self):
+        """Write values that were changed in the snapshot to the document.
+        Values of variables that already exist are set with one call.
+        """
+        if self.snapshot is None:
+            return
+        self.otherLogger.debug(
+            "Writing %d changed user vars.", len(self.changedNames))
+        for varName in sorted(self.deletedNames & self.snapshotNames):
+            self.userProps.removeProperty(varName)
+        self.snapshotNames -= self.deletedNames
+        existingProps = []
+        for varName in sorted(self.changedNames):
+            stringVal = self.snapshot[varName]
+            if varName in self.snapshotNames:
+                existingProps.append(util.createProp(varName, stringVal))
+            else:
+                self.userProps.addProperty(varName, REMOVEABLE, stringVal)
+                self.snapshotNames.add(varName)
+        if existingProps:
+            self.userProps.setPropertyValues(tuple(existingProps))
+        self.changedNames = set()
+        self.deletedNames = set()
+
     def __deepcopy__(self, memo):
         """UserVar objects are only one per document, so return this one."""
         return self
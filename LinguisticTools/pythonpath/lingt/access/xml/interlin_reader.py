@@ -1,11 +1,14 @@
 """
 Read interlinear examples, typically used for grammar writeups.
 """
+import concurrent.futures
+import copy
 import logging
 import os
 import re
 import xml.dom.minidom
 import xml.parsers.expat
+from xml.etree import ElementTree
 
 from lingt.access.common.file_reader import FileReader
 from lingt.access.writer.uservars import InterlinTags
@@ -14,11 +17,126 @@ from lingt.app import exceptions
 from lingt.app.data import lingex_structs
 from lingt.app.data import wordlist_structs
 from lingt.ui.common.progressbar import ProgressRange
+from lingt.utils import procpool
 from lingt.utils import util
 
 logger = logging.getLogger("lingt.access.interlin_reader")
 
-class InterlinReader(FileReader):
+class InterlinFileParsing:
+    """Methods to read examples from a single interlinear file.
+    Classes that use this should set the attributes that ToolboxXML and
+    FieldworksXML expect to find in their mainReader.
+    """
+    # Files at least this large are read with a streaming parser instead of
+    # building a DOM of the entire file, which needs a lot of memory.
+    STREAMING_MIN_BYTES = 10 * 1024 * 1024
+
+    def parseFile(self, filepath, prefix, use_segnum, progressRange=None):
+        """Adds examples from the file to self.data.
+        Returns the file type.
+        """
+        logger.debug("Parsing file %s", filepath)
+        self.filepath = filepath
+        self.prefix = prefix
+        self.use_segnum = use_segnum
+        self.dom = None
+        if not os.path.exists(filepath):
+            raise exceptions.FileAccessError(
+                "Cannot find file %s", filepath)
+        if self.useStreaming(filepath):
+            return self._readStreaming(filepath, progressRange)
+        return self._readDom(filepath, progressRange)
+
+    def useStreaming(self, filepath):
+        return os.path.getsize(filepath) >= self.STREAMING_MIN_BYTES
+
+    def _readDom(self, filepath, progressRange):
+        try:
+            self.dom = xml.dom.minidom.parse(filepath)
+        except (xml.parsers.expat.ExpatError, IOError) as exc:
+            raise exceptions.FileAccessError(
+                "Error reading file %s\n\n%s",
+                filepath, str(exc).capitalize())
+        logger.debug("Parse finished.")
+        if progressRange:
+            progressRange.updatePart(1)
+        filetype = self.get_filetype(filepath, self.dom)
+        if progressRange:
+            progressRange.updatePart(2)
+        if filetype == "toolbox":
+            ToolboxXML(self).read()
+        elif filetype == "fieldworks":
+            FieldworksXML(self).read()
+        return filetype
+
+    def _readStreaming(self, filepath, progressRange):
+        """Read examples while parsing, without keeping the whole document
+        in memory.
+        """
+        logger.debug("Reading with streaming parser.")
+        try:
+            filetype = self.get_stream_filetype(filepath)
+            if progressRange:
+                progressRange.updatePart(1)
+            if filetype == "toolbox":
+                ToolboxStreamXML(self).read()
+            elif filetype == "fieldworks":
+                FieldworksStreamXML(self).read()
+        except (ElementTree.ParseError, IOError) as exc:
+            raise exceptions.FileAccessError(
+                "Error reading file %s\n\n%s",
+                filepath, str(exc).capitalize())
+        if progressRange:
+            progressRange.updatePart(2)
+        return filetype
+
+    def get_filetype(self, filepath, dom):
+        """Note to developer: Try to make it so that this function
+        can never silently fail, even if for example a JPEG file is attempted.
+        """
+        logger.debug(util.funcName('begin'))
+        if dom is None:
+            raise exceptions.FileAccessError("Error with file: %s", filepath)
+        docElem = dom.documentElement
+        docElemChild = None
+        if docElem.hasChildNodes():
+            if len(docElem.childNodes) >= 2:
+                docElemChild = docElem.childNodes[1]
+            else:
+                docElemChild = docElem.childNodes[0]
+        if not docElemChild:
+            raise exceptions.FileAccessError(
+                "File does not seem to be from Toolbox or FieldWorks: %s",
+                filepath)
+        filetype = self._filetype_from_tags(
+            filepath, docElem.nodeName, docElemChild.nodeName)
+        logger.debug("File type is %s", filetype)
+        return filetype
+
+    def get_stream_filetype(self, filepath):
+        """Like get_filetype() but reads only the beginning of the file
+        instead of requiring a DOM.
+        """
+        logger.debug(util.funcName('begin'))
+        docElemName, docElemChildName = xmlutil.iterparseRootTags(filepath)
+        filetype = self._filetype_from_tags(
+            filepath, docElemName, docElemChildName)
+        logger.debug("File type is %s", filetype)
+        return filetype
+
+    @staticmethod
+    def _filetype_from_tags(filepath, docElemName, docElemChildName):
+        if (docElemName == "database"
+              and re.match(r"[a-zA-Z0-9]+Group", docElemChildName)):
+            return "toolbox"
+        if (docElemName == "document"
+              and docElemChildName == "interlinear-text"):
+            return "fieldworks"
+        raise exceptions.FileAccessError(
+            "File does not seem to be from Toolbox or FieldWorks: %s",
+            filepath)
+
+class InterlinReader(FileReader, InterlinFileParsing):
     SUPPORTED_FORMATS = [
         ('flextext', "FieldWorks Interlinear XML (flextext)"),
         ('tbxint', "Toolbox Interlinear XML"),
@@ -35,6 +153,7 @@ class InterlinReader(FileReader):
         self.generateRefIDs = False
         self.prefix = ""
         self.use_segnum = False
+        self.fieldTags = {}
 
     def getSuggestions(self):
         return self.suggestions
@@ -57,37 +176,97 @@ class InterlinReader(FileReader):
         progressRange.partSize = 3
         self.suggestions = []
         self.duplicate_refnums = set()
+        if self.userVars:
+            # Otherwise the caller has set self.fieldTags,
+            # for example when reading in a worker process.
+            self.fieldTags = InterlinTags(self.userVars).loadUserVars()
+        filesRead = 0
+        if self.useParallel():
+            pool = procpool.getProcessPool(len(self.config.fileList))
+            if pool:
+                with pool:
+                    filesRead = self._readInParallel(pool, progressRange)
         list_index = 1   # 1-based index of current element in list
         for fileItem in self.config.fileList:
-            logger.debug("Parsing file %s", fileItem.filepath)
-            self.prefix = fileItem.prefix
-            self.use_segnum = fileItem.use_segnum
-            self.dom = None
-            if not os.path.exists(fileItem.filepath):
-                raise exceptions.FileAccessError(
-                    "Cannot find file %s", fileItem.filepath)
-            try:
-                self.dom = xml.dom.minidom.parse(fileItem.filepath)
-            except (xml.parsers.expat.ExpatError, IOError) as exc:
-                raise exceptions.FileAccessError(
-                    "Error reading file %s\n\n%s",
-                    fileItem.filepath, str(exc).capitalize())
-            logger.debug("Parse finished.")
-            progressRange.updatePart(1)
-            filetype = self.get_filetype(fileItem.filepath, self.dom)
-            progressRange.updatePart(2)
+            if list_index <= filesRead:
+                list_index += 1
+                continue
+            prevLen = len(self.data)
+            filetype = self.parseFile(
+                fileItem.filepath, fileItem.prefix, fileItem.use_segnum,
+                progressRange)
+            self._verifyFileRead(fileItem.filepath, filetype, prevLen)
+            progressRange.update(list_index)
+            list_index += 1
 
+    def useParallel(self):
+        """Generated ref numbers are not used in parallel mode,
+        because they would not be unique across processes.
+        """
+        return (self.config.parallelParsing
+                and len(self.config.fileList) > 1
+                and not self.generateRefIDs)
+
+    def _readInParallel(self, pool, progressRange):
+        """Parse each file in a worker process.
+        Results are merged in list order so that the results are the same
+        as reading the files one after another.
+        If the workers fail, for example because their python cannot import
+        lingt, then the remaining files should be read in this process.
+        Returns the number of files that were read.
+        """
+        workerConfig = copy.copy(self.config)
+        workerConfig.userVars = None
+        workerConfig.fileList = []
+        try:
+            futures = [
+                pool.submit(
+                    parseFileInWorker, fileItem.filepath, fileItem.prefix,
+                    fileItem.use_segnum, workerConfig, self.fieldTags,
+                    self.STREAMING_MIN_BYTES)
+                for fileItem in self.config.fileList]
+        except (concurrent.futures.BrokenExecutor, RuntimeError) as exc:
+            logger.warning("Could not start workers: %s", exc)
+            return 0
+        list_index = 1
+        for fileItem, future in zip(self.config.fileList, futures):
+            try:
+                filetype, fileData, fileDuplicates = future.result()
+            except exceptions.MessageError:
+                raise
+            except Exception as exc:
+                logger.warning(
+                    "Worker failed to read %s: %s", fileItem.filepath, exc)
+                for futureToCancel in futures:
+                    futureToCancel.cancel()
+                return list_index - 1
             prevLen = len(self.data)
-            if filetype == "toolbox":
-                ToolboxXML(self).read()
-            elif filetype == "fieldworks":
-                FieldworksXML(self).read()
-            logger.debug("Read %d examples.", len(self.data))
-            if len(self.data) == prevLen:
-                raise exceptions.DataNotFoundError(
-                    "Did not find any data in file %s", fileItem.filepath)
+            self._mergeFileData(fileData, fileDuplicates)
+            self._verifyFileRead(fileItem.filepath, filetype, prevLen)
             progressRange.update(list_index)
             list_index += 1
+        return len(futures)
+
+    def _mergeFileData(self, fileData, fileDuplicates):
+        """Add examples that were read separately from one file."""
+        addedSuggestion = False
+        for key, ex in fileData.items():
+            if key in self.data:
+                self.duplicate_refnums.add(key)
+            else:
+                self.data[key] = ex
+                if not addedSuggestion:
+                    self.suggestions.append(ex.refText)
+                    addedSuggestion = True
+        self.duplicate_refnums.update(fileDuplicates)
+
+    def _verifyFileRead(self, filepath, filetype, prevLen):
+        logger.debug("Read %d examples.", len(self.data))
+        if filetype == "toolbox":
+            ToolboxBaseline(self).verify_words_found()
+        if len(self.data) == prevLen:
+            raise exceptions.DataNotFoundError(
+                "Did not find any data in file %s", filepath)
 
     def grabWords(self, thingsToGrab):
         """Return values in a flat list of words."""
@@ -101,6 +280,8 @@ class InterlinReader(FileReader):
                     try:
                         newList = interlinEx.grabList(whatToGrab.whichOne)
                     except exceptions.LogicError as exc:
+                        if not self.msgbox:
+                            raise
                         self.msgbox.displayExc(exc)
                         return words
                     for text in newList:
@@ -111,37 +292,34 @@ class InterlinReader(FileReader):
         logger.debug("got %d words", len(words))
         return words
 
-    def get_filetype(self, filepath, dom):
-        """Note to developer: Try to make it so that this function
-        can never silently fail, even if for example a JPEG file is attempted.
-        """
-        logger.debug(util.funcName('begin'))
-        filetype = ""
-        if dom is None:
-            raise exceptions.FileAccessError("Error with file: %s", filepath)
-        docElem = dom.documentElement
-        docElemChild = None
-        if docElem.hasChildNodes():
-            if len(docElem.childNodes) >= 2:
-                docElemChild = docElem.childNodes[1]
-            else:
-                docElemChild = docElem.childNodes[0]
-        if not docElemChild:
-            raise exceptions.FileAccessError(
-                "File does not seem to be from Toolbox or FieldWorks: %s",
-                filepath)
-        if (docElem.nodeName == "database"
-              and re.match(r"[a-zA-Z0-9]+Group", docElemChild.nodeName)):
-            filetype = "toolbox"
-        elif (docElem.nodeName == "document"
-              and docElemChild.nodeName == "interlinear-text"):
-            filetype = "fieldworks"
-        else:
-            raise exceptions.FileAccessError(
-                "File does not seem to be from Toolbox or FieldWorks: %s",
-                filepath)
-        logger.debug("File type is %s", filetype)
-        return filetype
+class InterlinFileParser(InterlinFileParsing):
+    """Reads a single file without using UNO or user variables,
+    so that it can run in a worker process.
+    """
+    def __init__(self, config, fieldTags):
+        self.config = config
+        self.fieldTags = fieldTags
+        self.userVars = None
+        self.msgbox = None
+        self.data = {}
+        self.suggestions = []
+        self.duplicate_refnums = set()
+        self.generateRefIDs = False
+        self.dom = None
+        self.filepath = ""
+        self.prefix = ""
+        self.use_segnum = False
+
+def parseFileInWorker(filepath, prefix, use_segnum, config, fieldTags,
+                      streamingMinBytes):
+    """Called in a worker process.
+    Returns the file type, the examples dict and a set of ref numbers that
+    are duplicated within the file.
+    """
+    parser = InterlinFileParser(config, fieldTags)
+    parser.STREAMING_MIN_BYTES = streamingMinBytes
+    filetype = parser.parseFile(filepath, prefix, use_segnum)
+    return filetype, parser.data, parser.duplicate_refnums
 
 class ToolboxXML:
     """Toolbox XML seems to follow this rule:
@@ -150,8 +328,11 @@ class ToolboxXML:
     If there are other things associated with it,
     then they will also be in the group.
     """
+    access = xmlutil.DomAccess  # how to read the elements
+
     def __init__(self, mainReader):
         self.dom = mainReader.dom
+        self.filepath = mainReader.filepath
         self.data = mainReader.data
         self.suggestions = mainReader.suggestions
         self.duplicate_refnums = mainReader.duplicate_refnums
@@ -159,14 +340,16 @@ class ToolboxXML:
         self.config = mainReader.config
         self.generateRefIDs = mainReader.generateRefIDs
         self.prefix = mainReader.prefix
-        self.fieldTags = InterlinTags(mainReader.userVars).loadUserVars()
+        self.fieldTags = mainReader.fieldTags
         self.ex = None  # the current example
 
     def read(self):
         logger.debug("reading toolbox XML file")
+        self.readSentences(self.dom.getElementsByTagName(
+            self.fieldTags['ref'] + "Group"))
+
+    def readSentences(self, sentences):
         addedSuggestion = False
-        sentences = self.dom.getElementsByTagName(
-            self.fieldTags['ref'] + "Group")
         for sentence in sentences:
             self.ex = lingex_structs.LingInterlinExample()
             self.handleSentence(sentence)
@@ -179,15 +362,13 @@ class ToolboxXML:
                     if not addedSuggestion:
                         self.suggestions.append(self.ex.refText)
                         addedSuggestion = True
-        self.baseline.verify_words_found()
 
     def handleSentence(self, sentence):
-        self.ex.refText = xmlutil.getTextByTagName(
-            sentence, self.fieldTags['ref'])
-        self.ex.freeTrans = xmlutil.getTextByTagName(
-            sentence, self.fieldTags['ft'])
-        words = sentence.getElementsByTagName(self.baseline.word_group)
-        orthoText = xmlutil.getTextByTagName(sentence, self.baseline.ortho_tag)
+        index = self.access.ElementIndex(sentence)
+        self.ex.refText = index.getTextByTagName(self.fieldTags['ref'])
+        self.ex.freeTrans = index.getTextByTagName(self.fieldTags['ft'])
+        words = index.getElementsByTagName(self.baseline.word_group)
+        orthoText = index.getTextByTagName(self.baseline.ortho_tag)
         orthoWords = orthoText.split()
         for word in words:
             self.handleWord(word, len(words), orthoText, orthoWords)
@@ -198,26 +379,24 @@ class ToolboxXML:
             self.ex.refText = self.prefix + self.ex.refText
 
     def handleWord(self, word, num_words, orthoText, orthoWords):
-        wordText = xmlutil.getTextByTagName(word, self.baseline.word_tag)
-        wordGloss = xmlutil.getTextByTagName(word, self.fieldTags['wordGloss'])
+        wordIndex = self.access.ElementIndex(word)
+        wordText = wordIndex.getTextByTagName(self.baseline.word_tag)
+        wordGloss = wordIndex.getTextByTagName(self.fieldTags['wordGloss'])
         orthoWord = ""
         if orthoWords:
             if num_words == 1:
                 orthoWord = orthoText
             else:
                 orthoWord = orthoWords.pop(0)
-        morphemes = word.getElementsByTagName(self.baseline.morph_group)
+        morphemes = wordIndex.getElementsByTagName(self.baseline.morph_group)
         mergedMorphemes = MergedMorphemes()
         for morpheme in morphemes:
             morph = lingex_structs.LingInterlinMorph()
-            morph.text1 = xmlutil.getTextByTagName(
-                morpheme, self.fieldTags['morphTx1'])
-            morph.text2 = xmlutil.getTextByTagName(
-                morpheme, self.fieldTags['morphTx2'])
-            morph.gloss = xmlutil.getTextByTagName(
-                morpheme, self.fieldTags['morphGloss'])
-            morph.pos = xmlutil.getTextByTagName(
-                morpheme, self.fieldTags['morphPos'])
+            index = self.access.ElementIndex(morpheme)
+            morph.text1 = index.getTextByTagName(self.fieldTags['morphTx1'])
+            morph.text2 = index.getTextByTagName(self.fieldTags['morphTx2'])
+            morph.gloss = index.getTextByTagName(self.fieldTags['morphGloss'])
+            morph.pos = index.getTextByTagName(self.fieldTags['morphPos'])
             if self.config.separateMorphColumns:
                 ## store each morpheme separately
                 self.ex.appendMorphObj(morph)
@@ -240,7 +419,7 @@ class ToolboxBaseline:
         self.msgbox = mainReader.msgbox
         self.userVars = mainReader.userVars
         self.config = mainReader.config
-        self.fieldTags = InterlinTags(mainReader.userVars).loadUserVars()
+        self.fieldTags = mainReader.fieldTags
         self.data = mainReader.data
         self.word_group = ''
         self.morph_group = ''
@@ -282,28 +461,30 @@ class ToolboxBaseline:
             self.userVars.getVarName("SFMarker_WordText"), current_wordline,
             self.userVars.getVarName("SFM_Baseline"), other_wordline)
 
-def singleMorphemeWord(word):
+def singleMorphemeWord(wordIndex, access=xmlutil.DomAccess):
     """For words consisting of a single morpheme, get word-level
     attributes instead of morpheme-level.
+
+    :param wordIndex: type access.ElementIndex
     """
     morph = lingex_structs.LingInterlinMorph()
-    items = word.getElementsByTagName("item")
-    for item in items:
-        if item.attributes is None:
-            continue
-        itemType = item.getAttribute("type")
+    for item in wordIndex.getElementsByTagName("item"):
+        itemType = access.getAttribute(item, "type")
         if itemType == "gls":
             if morph.gloss and not morph.text1:
                 morph.text1 = morph.gloss
-            morph.gloss = xmlutil.getElemText(item)
+            morph.gloss = access.getElemText(item)
         elif itemType == "msa":
-            morph.pos = xmlutil.getElemText(item)
+            morph.pos = access.getElemText(item)
     return morph
 
 class FieldworksXML:
     """Parse Fieldworks XML file and store interlinear examples."""
+    access = xmlutil.DomAccess  # how to read the elements
+
     def __init__(self, mainReader):
         self.dom = mainReader.dom
+        self.filepath = mainReader.filepath
         self.data = mainReader.data
         self.suggestions = mainReader.suggestions
         self.duplicate_refnums = mainReader.duplicate_refnums
@@ -314,17 +495,19 @@ class FieldworksXML:
 
     def read(self):
         logger.debug("reading fieldworks XML file")
-        paragraphs = self.dom.getElementsByTagName("paragraph")
+        self.readParagraphs(self.dom.getElementsByTagName("paragraph"))
+
+    def readParagraphs(self, paragraphs):
         refTextPara = 1
         addedSuggestion = False
         for paragraph in paragraphs:
-            sentences = paragraph.getElementsByTagName("phrase")
+            sentences = self.getPhrases(paragraph)
             refTextSent = 1
             for sentence in sentences:
                 self.ex = lingex_structs.LingInterlinExample()
                 if not self.use_segnum:
                     self.ex.refText = "%s" % refTextPara
-                    if sentences.length > 1:
+                    if len(sentences) > 1:
                         self.ex.refText += ".%s" % refTextSent
                 self.handleSentence(sentence)
                 if self.ex.refText:
@@ -339,21 +522,21 @@ class FieldworksXML:
                 refTextSent += 1
             refTextPara += 1
 
+    def getPhrases(self, paragraph):
+        return self.access.getElementsByTagName(paragraph, "phrase")
+
     def handleSentence(self, sentence):
         logger.debug(util.funcName('begin'))
+        access = self.access
         if self.use_segnum:
-            for childNode in sentence.childNodes:
-                if not childNode.attributes:
-                    continue
-                if childNode.getAttribute("type") == "segnum":
-                    self.ex.refText = xmlutil.getElemText(childNode).strip()
+            for childNode in access.childElements(sentence):
+                if access.getAttribute(childNode, "type") == "segnum":
+                    self.ex.refText = access.getElemText(childNode).strip()
                     break
-        for childNode in sentence.childNodes:
-            if childNode.attributes is None:
-                continue
-            if childNode.getAttribute("type") == "gls":
-                self.ex.freeTrans = xmlutil.getElemText(childNode)
-        words = sentence.getElementsByTagName("word")
+        for childNode in access.childElements(sentence):
+            if access.getAttribute(childNode, "type") == "gls":
+                self.ex.freeTrans = access.getElemText(childNode)
+        words = access.getElementsByTagName(sentence, "word")
         for word in words:
             self.handleWord(word)
         if self.prefix:
@@ -366,11 +549,12 @@ class FieldworksXML:
         gloss = ""
         punct = None
         is_first_text = True
-        for childNode in word.childNodes:
-            if not childNode.attributes:
+        access = self.access
+        for childNode in access.childElements(word):
+            itemType = access.getAttribute(childNode, "type")
+            if not itemType:
                 continue
-            itemType = childNode.getAttribute("type")
-            elemText = xmlutil.getElemText(childNode)
+            elemText = access.getElemText(childNode)
             if itemType == "txt":
                 if is_first_text:
                     text1 = elemText
@@ -389,39 +573,36 @@ class FieldworksXML:
                 self.ex.appendWord(punct, punct)
             #logger.debug(util.funcName('return', args=punct))
             return
-        morphemes = word.getElementsByTagName("morph")
+        wordIndex = access.ElementIndex(word)
+        morphemes = wordIndex.getElementsByTagName("morph")
         if len(morphemes):
             self.handleWordMorphemes(morphemes)
         else:
-            self.ex.appendMorphObj(singleMorphemeWord(word))
+            self.ex.appendMorphObj(singleMorphemeWord(wordIndex, access))
         self.ex.appendWord(text1, text2, gloss)
         #logger.debug(util.funcName('end', args=text1))
 
     def handleWordMorphemes(self, morphemes):
         #logger.debug(util.funcName('begin'))
         mergedMorphemes = MergedMorphemes()
+        getElemText = self.access.getElemText
         for morpheme in morphemes:
-            items = morpheme.getElementsByTagName("item")
+            index = self.access.ElementIndex(morpheme)
             morph = lingex_structs.LingInterlinMorph()
-            is_first_text = True
-            for item in items:
-                if item.attributes is None:
-                    continue
-                itemType = item.getAttribute("type")
-                if itemType == "txt":
-                    elemText = xmlutil.getElemText(item)
-                    if is_first_text:
-                        morph.text1 = elemText
-                        is_first_text = False
-                    else:
-                        morph.text2 = elemText
-                elif itemType == "cf":
-                    # lex entry, typically same as morph text
-                    pass
-                elif itemType == "gls":
-                    morph.gloss = xmlutil.getElemText(item)
-                elif itemType == "msa":
-                    morph.pos = xmlutil.getElemText(item)
+            # When there are several items of a type, the first text is
+            # text1 and otherwise the last item is used.
+            # Type "cf" is the lex entry, typically same as morph text.
+            texts = index.getItemsByType("txt")
+            if texts:
+                morph.text1 = getElemText(texts[0])
+            if len(texts) > 1:
+                morph.text2 = getElemText(texts[-1])
+            glosses = index.getItemsByType("gls")
+            if glosses:
+                morph.gloss = getElemText(glosses[-1])
+            partsOfSpeech = index.getItemsByType("msa")
+            if partsOfSpeech:
+                morph.pos = getElemText(partsOfSpeech[-1])
 
             if self.config.separateMorphColumns:
                 ## store each morpheme separately
@@ -435,6 +616,33 @@ class FieldworksXML:
                 mergedMorphemes.getMorph(
                     self.config.get_showMorphemeBreaks()))
 
+class ToolboxStreamXML(ToolboxXML):
+    """Read Toolbox XML while it is being parsed, one sentence group at a
+    time, rather than from a DOM of the entire file.
+    Elements are of type xml.etree.ElementTree.Element.
+    """
+    access = xmlutil.EtreeAccess
+
+    def read(self):
+        logger.debug("streaming toolbox XML file")
+        self.readSentences(xmlutil.iterparseElements(
+            self.filepath, [self.fieldTags['ref'] + "Group"]))
+
+class FieldworksStreamXML(FieldworksXML):
+    """Read FieldWorks XML while it is being parsed, one paragraph at a
+    time, rather than from a DOM of the entire file.
+    A paragraph is the smallest unit that can be read this way,
+    because the ref number of its first phrase depends on whether there are
+    any other phrases.
+    Elements are of type xml.etree.ElementTree.Element.
+    """
+    access = xmlutil.EtreeAccess
+
+    def read(self):
+        logger.debug("streaming fieldworks XML file")
+        self.readParagraphs(
+            xmlutil.iterparseElements(self.filepath, ["paragraph"]))
+
 class MergedMorphemes(lingex_structs.LingInterlinMorph):
     """Merge morphemes into a single dash-separated string."""
     def __init__(self):
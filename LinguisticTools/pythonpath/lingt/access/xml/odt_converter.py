@@ -2,6 +2,9 @@
 Read and change an ODT file in XML format.
 Call SEC_wrapper to do engine-based conversion.
 
+Files with a large content.xml are read and changed with a streaming
+parser, so that the whole document does not need to be in memory.
+
 This module exports:
     OdtReader
     OdtChanger
@@ -13,6 +16,10 @@ import os
 import re
 import xml.dom.minidom
 import xml.parsers.expat
+import xml.sax
+import xml.sax.handler
+import xml.sax.saxutils
+import zipfile
 
 from lingt.access.common.file_reader import FileReader
 from lingt.access.xml import xmlutil
@@ -36,6 +43,10 @@ class OdtReader(FileReader):
 
     SUPPORTED_FORMATS = [("xml", "Unzipped Open Document Format (.odt)"),]
 
+    # If content.xml is at least this large, it is read and changed with a
+    # streaming parser instead of building a DOM of the entire file.
+    STREAMING_MIN_BYTES = 10 * 1024 * 1024
+
     def __init__(self, srcdir, scopeType, unoObjs):
         """
         :param srcdir: will read and write the same XML files
@@ -43,9 +54,11 @@ class OdtReader(FileReader):
         """
         FileReader.__init__(self, unoObjs)
         self.srcdir = srcdir
+        # If set, XML files are read from this .odt file instead of srcdir.
+        self.odtFilepath = ""
         self.defaultStyleItem = None
         self.stylesDom = None
-        self.contentDom = None
+        self.contentDom = None  # None when content.xml is streamed
         self.scopeType = scopeType
         self.stylesDict = {}  # keys style name, value ProcessingStyleItem
         self.styleReader = StyleReader(self.stylesDict, scopeType)
@@ -64,17 +77,84 @@ class OdtReader(FileReader):
                 "Searched by %s but did not find anything.", scope_string)
 
     def _read(self):
-        self.stylesDom = self.loadFile(
-            os.path.join(self.srcdir, 'styles.xml'))
-        self.progressBar.updatePercent(30)
+        self.stylesDom = self.loadXml('styles.xml')
+        self.updatePercent(30)
         self.readStylesFile(self.stylesDom)
-        self.progressBar.updatePercent(35)
+        self.updatePercent(35)
+
+        if self.useStreaming():
+            logger.debug("Reading content.xml with streaming parser.")
+            self.contentDom = None
+            self.parseXmlStream('content.xml', ContentReadHandler(self))
+        else:
+            self.contentDom = self.loadXml('content.xml')
+            self.updatePercent(45)
+            self.readContentFile(self.contentDom)
+        self.updatePercent(50)
+
+    def useStreaming(self):
+        return self.contentSize() >= self.STREAMING_MIN_BYTES
 
-        self.contentDom = self.loadFile(
-            os.path.join(self.srcdir, 'content.xml'))
-        self.progressBar.updatePercent(45)
-        self.readContentFile(self.contentDom)
-        self.progressBar.updatePercent(50)
+    def contentSize(self):
+        """Returns the uncompressed size of content.xml, or 0 if it cannot
+        be found, in which case loadXml() will report the problem.
+        """
+        try:
+            if self.odtFilepath:
+                with zipfile.ZipFile(self.odtFilepath, 'r') as zipper:
+                    return zipper.getinfo('content.xml').file_size
+            return os.path.getsize(os.path.join(self.srcdir, 'content.xml'))
+        except (KeyError, OSError):
+            return 0
+
+    def parseXmlStream(self, filename, handler):
+        """Sends SAX events of the XML file to handler.
+        Raises exceptions.FileAccessError.
+        """
+        logger.debug(util.funcName('begin', args=filename))
+        if self.odtFilepath:
+            with zipfile.ZipFile(self.odtFilepath, 'r') as zipper:
+                try:
+                    infile = zipper.open(filename)
+                except KeyError:
+                    raise exceptions.FileAccessError(
+                        "Error reading file %s\n\nCannot find %s",
+                        self.odtFilepath, filename)
+                with infile:
+                    parseStream(infile, handler, self.odtFilepath)
+        else:
+            filepath = os.path.join(self.srcdir, filename)
+            try:
+                infile = open(filepath, 'rb')
+            except OSError:
+                raise exceptions.FileAccessError(
+                    "Cannot find file %s", filepath)
+            with infile:
+                parseStream(infile, handler, filepath)
+        logger.debug(util.funcName('end'))
+
+    def loadXml(self, filename):
+        """Returns dom, raises exceptions.FileAccessError.
+        Raises zipfile.BadZipFile if the .odt file is not a zip file.
+        """
+        if not self.odtFilepath:
+            return self.loadFile(os.path.join(self.srcdir, filename))
+        logger.debug(util.funcName('begin', args=filename))
+        with zipfile.ZipFile(self.odtFilepath, 'r') as zipper:
+            try:
+                xmlBytes = zipper.read(filename)
+            except KeyError:
+                raise exceptions.FileAccessError(
+                    "Error reading file %s\n\nCannot find %s",
+                    self.odtFilepath, filename)
+        try:
+            dom = xml.dom.minidom.parseString(xmlBytes)
+        except xml.parsers.expat.ExpatError as exc:
+            raise exceptions.FileAccessError(
+                "Error reading file %s\n\n%s",
+                self.odtFilepath, str(exc).capitalize())
+        logger.debug(util.funcName('end'))
+        return dom
 
     def loadFile(self, filepath):
         """Returns dom, raises exceptions.FileAccessError."""
@@ -135,6 +215,258 @@ class OdtReader(FileReader):
         logger.debug(util.funcName('end'))
 
 
+def parseStream(infile, handler, filepath):
+    """Raises exceptions.FileAccessError if the XML is not well formed."""
+    parser = xml.sax.make_parser()
+    parser.setContentHandler(handler)
+    try:
+        parser.parse(infile)
+    except xml.sax.SAXParseException as exc:
+        raise exceptions.FileAccessError(
+            "Error reading file %s\n\n%s",
+            filepath, str(exc).capitalize())
+
+
+PARAGRAPH_TAGS = ("text:h", "text:p")
+
+class StreamElement:
+    """Just enough of a DOM element to be passed to StyleReader and
+    OdtChanger, built from SAX events.
+    """
+    def __init__(self, tagName, attributes):
+        self.tagName = tagName
+        self.attributes = dict(attributes)  # keeps the order of the file
+        self.childElements = []
+
+    def getAttribute(self, name):
+        return self.attributes.get(name, "")
+
+    def setAttribute(self, name, value):
+        self.attributes[name] = value
+
+    def getElementsByTagName(self, tagName):
+        """Descendants in document order, like minidom."""
+        elems = []
+        for child in self.childElements:
+            if child.tagName == tagName:
+                elems.append(child)
+            elems.extend(child.getElementsByTagName(tagName))
+        return elems
+
+
+class ParagraphTexts:
+    """Text of a paragraph and of its spans, collected while streaming."""
+    def __init__(self, styleItem):
+        self.styleItem = styleItem
+        self.texts = []
+        self.spans = []  # tuples (styleItem, list of texts)
+
+
+class ContentReadHandler(xml.sax.handler.ContentHandler):
+    """Reads content.xml in one pass, like OdtReader.readContentFile().
+
+    Paragraphs are added to the reader's data in document order rather
+    than all headings first.  Spans in a paragraph nested inside
+    another paragraph, for example in a footnote, are read once as part
+    of the innermost paragraph.
+    """
+    def __init__(self, reader):
+        xml.sax.handler.ContentHandler.__init__(self)
+        self.reader = reader
+        self.textChunks = []
+        self.textTargets = []  # for each open element, list or None
+        self.paragraphs = []  # open paragraphs, type ParagraphTexts
+        self.autoStyleElems = []  # open elements in office:automatic-styles
+        self.inAutoStyles = False
+        self.foundAutoStyles = False
+
+    def startElement(self, name, attrs):
+        self.flushText()
+        if self.inAutoStyles:
+            elem = StreamElement(name, attrs.items())
+            if self.autoStyleElems:
+                self.autoStyleElems[-1].childElements.append(elem)
+            self.autoStyleElems.append(elem)
+        elif name == "office:automatic-styles" and not self.foundAutoStyles:
+            self.inAutoStyles = True
+            self.foundAutoStyles = True
+        textTarget = None
+        if name in PARAGRAPH_TAGS:
+            paraTexts = ParagraphTexts(self.reader.stylesDict.get(
+                attrs.get("text:style-name", ""),
+                self.reader.defaultStyleItem))
+            self.paragraphs.append(paraTexts)
+            textTarget = paraTexts.texts
+        elif name == "text:span" and self.paragraphs:
+            paraTexts = self.paragraphs[-1]
+            spanStyleItem = self.reader.stylesDict.get(
+                attrs.get("text:style-name", ""), paraTexts.styleItem)
+            textTarget = []
+            paraTexts.spans.append((spanStyleItem, textTarget))
+        self.textTargets.append(textTarget)
+
+    def endElement(self, name):
+        self.flushText()
+        self.textTargets.pop()
+        if self.inAutoStyles:
+            if self.autoStyleElems:
+                elem = self.autoStyleElems.pop()
+                if not self.autoStyleElems:
+                    self.reader.styleReader.read_text_props(
+                        elem, BasicStyleType.AUTOMATIC)
+            else:
+                self.inAutoStyles = False
+        if name in PARAGRAPH_TAGS:
+            self.addParagraph(self.paragraphs.pop())
+
+    def characters(self, content):
+        self.textChunks.append(content)
+
+    def flushText(self):
+        """The parser may split text into several chunks."""
+        if not self.textChunks:
+            return
+        text = "".join(self.textChunks)
+        self.textChunks = []
+        if self.textTargets and self.textTargets[-1] is not None:
+            self.textTargets[-1].append(text)
+
+    def addParagraph(self, paraTexts):
+        styleItemAppender = StyleItemAppender(
+            self.reader.data, paraTexts.styleItem, self.reader.scopeType)
+        styleItemAppender.add_texts(paraTexts.texts)
+        for spanStyleItem, span_texts in paraTexts.spans:
+            styleItemAppender = StyleItemAppender(
+                self.reader.data, spanStyleItem, self.reader.scopeType)
+            styleItemAppender.add_texts(span_texts)
+
+
+class ContentChangeHandler(xml.sax.handler.ContentHandler):
+    """Writes content.xml while reading it, making the same changes as
+    OdtChanger.change_text() and change_styles().
+    The output is written the same way as minidom writexml().
+    """
+    def __init__(self, changer, outfile):
+        xml.sax.handler.ContentHandler.__init__(self)
+        self.changer = changer
+        self.outfile = outfile
+        self.num_changes = 0
+        self.startTagOpen = False  # whether ">" or "/>" still needs writing
+        self.textChunks = []
+        # For each open element, a tuple (StyleChange or None, is_span).
+        self.textChanges = []
+        self.paraStyleChanges = []  # for each open paragraph
+        self.styleDepth = 0  # number of open style:style elements
+
+    def startDocument(self):
+        self.outfile.write('<?xml version="1.0" encoding="utf-8"?>')
+
+    def startElement(self, name, attrs):
+        self.flushText()
+        self.closeStartTag(">")
+        elem = StreamElement(name, attrs.items())
+        if name == "style:font-face":
+            self.num_changes += self.changer.change_font_face(elem)
+        elif name == "style:text-properties" and self.styleDepth:
+            self.num_changes += self.changer.change_text_properties(elem)
+        elif name == "style:style":
+            self.styleDepth += 1
+        styleChange = None
+        if name in PARAGRAPH_TAGS:
+            styleChange = self.changer.paragraphStyleChange(
+                elem.getAttribute("text:style-name"))
+            self.paraStyleChanges.append(styleChange)
+        elif name == "text:span" and self.paraStyleChanges:
+            styleChange = self.changer.spanStyleChange(
+                elem.getAttribute("text:style-name"),
+                self.paraStyleChanges[-1])
+        self.textChanges.append((styleChange, name == "text:span"))
+        self.outfile.write("<" + name)
+        for attrName, value in elem.attributes.items():
+            self.outfile.write(' %s="' % attrName)
+            writeXmlData(self.outfile, value, True)
+            self.outfile.write('"')
+        self.startTagOpen = True
+
+    def endElement(self, name):
+        self.flushText()
+        if self.startTagOpen:
+            self.closeStartTag("/>")
+        else:
+            self.outfile.write("</%s>" % name)
+        self.textChanges.pop()
+        if name in PARAGRAPH_TAGS:
+            self.paraStyleChanges.pop()
+        elif name == "style:style":
+            self.styleDepth -= 1
+
+    def characters(self, content):
+        self.textChunks.append(content)
+
+    def processingInstruction(self, target, data):
+        self.flushText()
+        self.closeStartTag(">")
+        self.outfile.write("<?%s %s?>" % (target, data))
+
+    def closeStartTag(self, ending):
+        if self.startTagOpen:
+            self.outfile.write(ending)
+            self.startTagOpen = False
+
+    def flushText(self):
+        if not self.textChunks:
+            return
+        text = "".join(self.textChunks)
+        self.textChunks = []
+        if self.textChanges:
+            styleChange, is_span = self.textChanges[-1]
+            if styleChange:
+                if text in styleChange.converted_data:
+                    text = styleChange.converted_data[text]
+                    if not is_span:
+                        self.num_changes += 1
+                if is_span:
+                    # Counted like OdtChanger.change_text().
+                    self.num_changes += 1
+        self.closeStartTag(">")
+        writeXmlData(self.outfile, text, False)
+
+
+# Characters that some versions of minidom writexml() escape,
+# in addition to &, < and >.
+_OPTIONAL_ENTITIES = {
+    '"': "&quot;", "\r": "&#13;", "\n": "&#10;", "\t": "&#9;"}
+
+def _minidomEntities(attr):
+    """Returns the entities that the installed version of minidom
+    writexml() uses for text or for attribute values.
+    """
+    doc = xml.dom.minidom.Document()
+    entities = {}
+    for char, entity in _OPTIONAL_ENTITIES.items():
+        outfile = io.StringIO()
+        if attr:
+            elem = doc.createElement("a")
+            elem.setAttribute("b", char)
+            elem.writexml(outfile)
+        else:
+            doc.createTextNode(char).writexml(outfile)
+        if entity in outfile.getvalue():
+            entities[char] = entity
+    return entities
+
+_TEXT_ENTITIES = _minidomEntities(attr=False)
+_ATTR_ENTITIES = _minidomEntities(attr=True)
+
+def writeXmlData(outfile, data, attr):
+    """Escape characters the same way as minidom writexml(),
+    so that streaming output is the same as writexml() output.
+    """
+    if data:
+        outfile.write(xml.sax.saxutils.escape(
+            data, _ATTR_ENTITIES if attr else _TEXT_ENTITIES))
+
+
 def stylename_to_internal(stylename):
     """
     Returns the internal name of named style,
@@ -397,34 +729,104 @@ class OdtChanger:
         self.reader = reader
         self.styleChanges = styleChanges
         self.scopeType = reader.scopeType
+        # When reading from an .odt file, keys are filenames in the .odt
+        # and values are the changed XML.
+        self.changedFiles = {}
+        # Keys are style names in content.xml, values are StyleChange or None.
+        self.styleChangesByName = {}
+        self.defaultStyleChange = None
 
     def makeChanges(self):
         logger.debug(util.funcName('begin'))
+        self.lookupStyleChanges()
+        if self.reader.contentDom is None:
+            return self.makeChangesStreaming()
         num_changes = self.change_text(self.reader.contentDom)
         num_changes += self.change_styles(
             self.reader.contentDom, self.reader.stylesDom)
         if num_changes == 0:
             return num_changes
-        with io.open(os.path.join(self.reader.srcdir, 'styles.xml'),
-                     mode="wt", encoding="utf-8") as f:
-            self.reader.stylesDom.writexml(f, encoding="utf-8")
+        if self.reader.odtFilepath:
+            self.changedFiles = {
+                'styles.xml': self.reader.stylesDom.toxml(encoding="utf-8"),
+                'content.xml': self.reader.contentDom.toxml(encoding="utf-8"),
+                }
+            logger.debug(util.funcName('end'))
+            return num_changes
+        self.writeStylesFile()
         with io.open(os.path.join(self.reader.srcdir, 'content.xml'),
                      mode="wt", encoding="utf-8") as f:
             self.reader.contentDom.writexml(f, encoding="utf-8")
         logger.debug(util.funcName('end'))
         return num_changes
 
+    def makeChangesStreaming(self):
+        """Write content.xml while reading it again, changing text and
+        attributes along the way.
+        """
+        num_changes = self.change_styles(None, self.reader.stylesDom)
+        if self.reader.odtFilepath:
+            outfile = io.TextIOWrapper(
+                io.BytesIO(), encoding="utf-8", errors="xmlcharrefreplace",
+                newline="\n")
+        else:
+            tmpFilepath = os.path.join(self.reader.srcdir, 'content.xml.tmp')
+            outfile = io.open(tmpFilepath, mode="wt", encoding="utf-8")
+        try:
+            handler = ContentChangeHandler(self, outfile)
+            self.reader.parseXmlStream('content.xml', handler)
+            outfile.flush()
+            num_changes += handler.num_changes
+            if num_changes > 0 and self.reader.odtFilepath:
+                self.changedFiles = {
+                    'styles.xml': self.reader.stylesDom.toxml(
+                        encoding="utf-8"),
+                    'content.xml': outfile.buffer.getvalue(),
+                    }
+        finally:
+            outfile.close()
+        if not self.reader.odtFilepath:
+            if num_changes == 0:
+                os.remove(tmpFilepath)
+            else:
+                self.writeStylesFile()
+                os.replace(
+                    tmpFilepath,
+                    os.path.join(self.reader.srcdir, 'content.xml'))
+        logger.debug(util.funcName('end'))
+        return num_changes
+
+    def writeStylesFile(self):
+        with io.open(os.path.join(self.reader.srcdir, 'styles.xml'),
+                     mode="wt", encoding="utf-8") as f:
+            self.reader.stylesDom.writexml(f, encoding="utf-8")
+
+    def lookupStyleChanges(self):
+        """Find the StyleChange of each style once, rather than for each
+        paragraph and span.
+        """
+        self.styleChangesByName = {
+            xmlStyleName: self.effective_styleChange(styleItem)
+            for xmlStyleName, styleItem in self.reader.stylesDict.items()}
+        self.defaultStyleChange = self.effective_styleChange(
+            self.reader.defaultStyleItem)
+
+    def paragraphStyleChange(self, xmlStyleName):
+        return self.styleChangesByName.get(
+            xmlStyleName, self.defaultStyleChange)
+
+    def spanStyleChange(self, xmlStyleName, paraStyleChange):
+        return self.styleChangesByName.get(xmlStyleName, paraStyleChange)
+
     def change_text(self, dom):
         """Convert text in content.xml with EncConverters."""
         logger.debug(util.funcName('begin'))
         num_changes = 0
         for paragraph in xmlutil.getElementsByTagNames(
-                dom, ["text:h", "text:p"]):
+                dom, PARAGRAPH_TAGS):
             xmlStyleName = paragraph.getAttribute("text:style-name")
             #logger.debug("para style name %s", xmlStyleName)
-            paraStyleItem = self.reader.stylesDict.get(
-                xmlStyleName, self.reader.defaultStyleItem)
-            paraStyleChange = self.effective_styleChange(paraStyleItem)
+            paraStyleChange = self.paragraphStyleChange(xmlStyleName)
             if paraStyleChange:
                 logger.debug("Change for [%s]", xmlStyleName)
                 for para_child in paragraph.childNodes:
@@ -438,9 +840,8 @@ class OdtChanger:
             for span in paragraph.getElementsByTagName("text:span"):
                 xmlStyleName = span.getAttribute("text:style-name")
                 #logger.debug("span style name %s", xmlStyleName)
-                spanStyleItem = self.reader.stylesDict.get(
-                    xmlStyleName, paraStyleItem)
-                spanStyleChange = self.effective_styleChange(spanStyleItem)
+                spanStyleChange = self.spanStyleChange(
+                    xmlStyleName, paraStyleChange)
                 if spanStyleChange:
                     for span_child in span.childNodes:
                         if span_child.nodeType == span_child.TEXT_NODE:
@@ -454,38 +855,59 @@ class OdtChanger:
         return num_changes
 
     def change_styles(self, contentDom, stylesDom):
-        """Change fonts and named styles."""
+        """Change fonts and named styles.
+        :param contentDom: None if content.xml is changed while streaming
+        """
         num_changes = 0
         #TODO: Distinguish between automatic and named styles.
-        for style in (
+        fontFaces = stylesDom.getElementsByTagName("style:font-face")
+        styles = stylesDom.getElementsByTagName("style:default-style")
+        if contentDom is not None:
+            fontFaces = (
                 contentDom.getElementsByTagName("style:font-face") +
-                stylesDom.getElementsByTagName("style:font-face")):
-            fontName = style.getAttribute("style:name")
-            for styleChange in self.styleChanges:
-                if fontName == styleChange.styleItem.fontName:
-                    num_changes += setNodeAttribute(
-                        style, "style:name", styleChange.fontName)
-                    num_changes += setNodeAttribute(
-                        style, "svg:font-family", styleChange.fontName)
-        for style in (
-                contentDom.getElementsByTagName("style:style") +
-                stylesDom.getElementsByTagName("style:default-style")):
+                fontFaces)
+            styles = contentDom.getElementsByTagName("style:style") + styles
+        for style in fontFaces:
+            num_changes += self.change_font_face(style)
+        for style in styles:
             for textprop in style.getElementsByTagName(
                     "style:text-properties"):
-                fontName = textprop.getAttribute("style:font-name")
-                for styleChange in self.styleChanges:
-                    if fontName == styleChange.styleItem.fontName:
-                        num_changes += setNodeAttribute(
-                            textprop, "style:font-name", styleChange.fontName)
-                        #num_changes += setNodeAttribute(
-                        #   style, "style:parent-style-name",
-                        #   styleChange.fontType)
-                        #fontSize = textprop.getAttribute("fo:font-size")
-                        #if fontSize and styleChange.size.isSpecified():
-                        if styleChange.size.isSpecified():
-                            num_changes += setNodeAttribute(
-                                textprop, "fo:font-size",
-                                str(styleChange.size) + "pt")
+                num_changes += self.change_text_properties(textprop)
+        return num_changes
+
+    def change_font_face(self, style):
+        """Change a style:font-face element.
+        Returns number of changes made.
+        """
+        num_changes = 0
+        fontName = style.getAttribute("style:name")
+        for styleChange in self.styleChanges:
+            if fontName == styleChange.styleItem.fontName:
+                num_changes += setNodeAttribute(
+                    style, "style:name", styleChange.fontName)
+                num_changes += setNodeAttribute(
+                    style, "svg:font-family", styleChange.fontName)
+        return num_changes
+
+    def change_text_properties(self, textprop):
+        """Change a style:text-properties element.
+        Returns number of changes made.
+        """
+        num_changes = 0
+        fontName = textprop.getAttribute("style:font-name")
+        for styleChange in self.styleChanges:
+            if fontName == styleChange.styleItem.fontName:
+                num_changes += setNodeAttribute(
+                    textprop, "style:font-name", styleChange.fontName)
+                #num_changes += setNodeAttribute(
+                #   style, "style:parent-style-name",
+                #   styleChange.fontType)
+                #fontSize = textprop.getAttribute("fo:font-size")
+                #if fontSize and styleChange.size.isSpecified():
+                if styleChange.size.isSpecified():
+                    num_changes += setNodeAttribute(
+                        textprop, "fo:font-size",
+                        str(styleChange.size) + "pt")
         return num_changes
 
     def effective_styleChange(self, processingStyleItem):
@@ -36,6 +36,19 @@ class PhonReader(FileReader):
         self.filepath = config.filepath
         self.fieldHelper = None
         self.generateRefIDs = False
+        self.fieldTags = {}
+        self.experTransPhonemic = False
+        if userVars:
+            self.loadUserVars()
+
+    def loadUserVars(self):
+        """Settings are loaded when the reader is created rather than while
+        reading, so that a reader without user variables can be given the
+        same settings to read in a worker process.
+        """
+        self.fieldTags = PhonologyTags(self.userVars).loadUserVars()
+        self.experTransPhonemic = (
+            self.userVars.getInt("ExperTrans_Phonemic") == 1)
 
     def getSuggestions(self):
         return self.fieldHelper.suggestions
@@ -52,7 +65,7 @@ class PhonReader(FileReader):
 
     def _read(self):
         filetype = self.get_filetype()
-        self.progressBar.updatePercent(30)
+        self.updatePercent(30)
         logger.debug("Parsing file %s", self.filepath)
         if not os.path.exists(self.filepath):
             raise exceptions.FileAccessError(
@@ -64,7 +77,7 @@ class PhonReader(FileReader):
                 "Error reading file %s\n\n%s",
                 self.filepath, str(exc).capitalize())
         logger.debug("Parse finished.")
-        self.progressBar.updatePercent(60)
+        self.updatePercent(60)
         if filetype == 'paxml':
             self.read_paxml_file()
         elif filetype == 'lift':
@@ -86,6 +99,8 @@ class PhonReader(FileReader):
                     try:
                         newList = phonEx.grabList(whatToGrab.whichOne)
                     except exceptions.LogicError as exc:
+                        if not self.msgbox:
+                            raise
                         self.msgbox.displayExc(exc)
                         return words
                     for text in newList:
@@ -129,7 +144,8 @@ class PhonReader(FileReader):
         Modifies self.data
         """
         logger.debug("reading Phonology Assistant file")
-        PaXML(self.dom, self.fieldHelper, self.userVars).read()
+        PaXML(
+            self.dom, self.fieldHelper, self.experTransPhonemic).read()
         logger.debug("finished reading PA file")
 
     def read_toolbox_file(self):
@@ -137,13 +153,13 @@ class PhonReader(FileReader):
         Modifies self.data
         """
         logger.debug("reading Toolbox file")
-        fieldTags = PhonologyTags(self.userVars).loadUserVars()
         groups = self.dom.getElementsByTagName("phtGroup")
         logger.debug("%d pht groups.", len(groups))
         for group in groups:
             self.fieldHelper.reset()
-            for fieldName, tagName in fieldTags.items():
-                txt = xmlutil.getTextByTagName(group, tagName)
+            index = xmlutil.ElementIndex(group)
+            for fieldName, tagName in self.fieldTags.items():
+                txt = index.getTextByTagName(tagName)
                 if txt != "":
                     self.fieldHelper.add(fieldName, txt)
             if self.fieldHelper.hasContents():
@@ -166,7 +182,8 @@ class LiftXML:
                 self.fieldHelper.addEx()
 
     def handleEntry(self, entry):
-        lexical_units = entry.getElementsByTagName("lexical-unit")
+        index = xmlutil.ElementIndex(entry)
+        lexical_units = index.getElementsByTagName("lexical-unit")
         if len(lexical_units):
             lexical_unit = lexical_units[0]
             if self.config.isLexemePhonetic:
@@ -177,37 +194,39 @@ class LiftXML:
                 lexfield, xmlutil.getTextByWS(
                     lexical_unit, self.config.phoneticWS))
         if self.config.isLexemePhonetic:
-            citations = entry.getElementsByTagName("citation")
+            citations = index.getElementsByTagName("citation")
             if len(citations):
                 citation = citations[0]
                 self.fieldHelper.add(
                     'phonemic', xmlutil.getTextByWS(
                         citation, self.config.phoneticWS))
         else:
-            pronunciations = entry.getElementsByTagName("pronunciation")
+            pronunciations = index.getElementsByTagName("pronunciation")
             if len(pronunciations):
                 pronunciation = pronunciations[0]
                 self.fieldHelper.add(
                     'phonetic', xmlutil.getTextByWS(
                         pronunciation, self.config.phoneticWS))
-        senses = entry.getElementsByTagName("sense")
-        fields = entry.getElementsByTagName("field")
+        senses = index.getElementsByTagName("sense")
+        fields = index.getElementsByTagName("field")
+        senseIndex = None
         if len(senses):
-            sense = senses[0]
-            glossElems = sense.getElementsByTagName("gloss")
+            senseIndex = xmlutil.ElementIndex(senses[0])
+            glossElems = senseIndex.getElementsByTagName("gloss")
             if len(glossElems):
                 glossElem = glossElems[0]
                 self.fieldHelper.add(
                     'gloss', xmlutil.getTextByWS(glossElem, ""))
-        self.grabRefNumber(senses, fields)
+        self.grabRefNumber(senseIndex, fields)
 
-    def grabRefNumber(self, senses, fields):
+    def grabRefNumber(self, senseIndex, fields):
         """
         Look in several places for the ref number and take the best choice.
+
+        :param senseIndex: xmlutil.ElementIndex of the first sense, or None
         """
-        if len(senses):
-            sense = senses[0]
-            notes = sense.getElementsByTagName("note")
+        if senseIndex:
+            notes = senseIndex.getElementsByTagName("note")
             for note in notes:
                 if not note.attributes:
                     continue
@@ -248,10 +267,13 @@ class PaXML:
         'gloss' : "Gloss",
         'ref' : "Reference"}
 
-    def __init__(self, dom, fieldHelper, userVars):
+    def __init__(self, dom, fieldHelper, experTransPhonemic):
+        """:param experTransPhonemic: true to read experimental
+                                      transcriptions as phonemic
+        """
         self.dom = dom
         self.fieldHelper = fieldHelper
-        self.userVars = userVars
+        self.experTransPhonemic = experTransPhonemic
 
     def read(self):
         paRecords = self.dom.getElementsByTagName("PaRecords")
@@ -284,7 +306,7 @@ class PaXML:
                     if name == "Phonetic":
                         experimentalTrans = value
         if experimentalTrans:
-            if self.userVars.getInt("ExperTrans_Phonemic") == 1:
+            if self.experTransPhonemic:
                 self.fieldHelper.add('phonemic', experimentalTrans)
             else:
                 self.fieldHelper.add('phonetic', experimentalTrans)
@@ -22,6 +22,7 @@ import logging
 import os
 import xml.dom.minidom
 import xml.parsers.expat
+from grantjenks.tribool import Tribool
 
 from lingt.access.common.file_reader import FileReader
 from lingt.access.xml import xmlutil
@@ -56,7 +57,7 @@ class WordsReader(FileReader):
                 "Error reading file %s\n\n%s",
                 self.filepath, str(exc).capitalize())
         logger.debug("Parse finished.")
-        self.progressBar.updatePercent(60)
+        self.updatePercent(60)
         if self.fileconfig.filetype == 'spellingStatus':
             self.read_spellingStatus_file()
         else:
@@ -78,9 +79,9 @@ class WordsReader(FileReader):
             word.text = text
             word.source = self.filepath
             if state == "R":
-                word.isCorrect = True
+                word.isCorrect = Tribool('True')
             elif state == "W":
-                word.isCorrect = False
+                word.isCorrect = Tribool('False')
                 if not self.fileconfig.includeMisspellings:
                     continue
                 correction = xmlutil.getTextByTagName(status, "Correction")
@@ -3,6 +3,7 @@ Functions to help read XML files.
 """
 import itertools
 import logging
+from xml.etree import ElementTree
 
 logger = logging.getLogger("lingt.access.xmlutil")
 
@@ -63,3 +64,152 @@ def getElementsByTagNames(parent, tag_names):
     for tag_name in tag_names:
         iterables.append(parent.getElementsByTagName(tag_name))
     return itertools.chain.from_iterable(iterables)
+
+class ElementIndex:
+    """Descendants of a DOM element grouped by tag name, found in a single
+    pass, so that looking up several tag names in the same record
+    does not walk the record each time.
+    Lists are in document order, the same as getElementsByTagName().
+
+    FieldWorks item elements are also grouped by their type attribute,
+    for example "txt" or "gls".
+    """
+    def __init__(self, parent):
+        self.elemsByTag = {}
+        self.itemsByType = {}
+        stack = list(reversed(parent.childNodes))
+        while stack:
+            node = stack.pop()
+            if node.nodeType != node.ELEMENT_NODE:
+                continue
+            self.elemsByTag.setdefault(node.nodeName, []).append(node)
+            if node.nodeName == "item":
+                self.itemsByType.setdefault(
+                    node.getAttribute("type"), []).append(node)
+            if node.childNodes:
+                stack.extend(reversed(node.childNodes))
+
+    def getElementsByTagName(self, tagname):
+        return self.elemsByTag.get(tagname, [])
+
+    def getTextByTagName(self, tagname):
+        """Like the getTextByTagName() function of this module."""
+        elems = self.elemsByTag.get(tagname)
+        if not elems:
+            return ""
+        return getElemText(elems[0])
+
+    def getItemsByType(self, itemType):
+        return self.itemsByType.get(itemType, [])
+
+def getEtreeElemText(elem):
+    """Like getElemText() but for an xml.etree.ElementTree element.
+    Only text directly inside the element is included, not text of
+    child elements.
+    """
+    rc = [elem.text or ""]
+    for child in elem:
+        rc.append(child.tail or "")
+    return "".join(rc)
+
+def getEtreeElementsByTagName(parent, tagname):
+    """Like minidom's getElementsByTagName(), which unlike
+    ElementTree's iter() does not include the parent itself.
+    """
+    return [elem for elem in parent.iter(tagname) if elem is not parent]
+
+class EtreeElementIndex(ElementIndex):
+    """Like ElementIndex but for an xml.etree.ElementTree element."""
+    def __init__(self, parent):  # pylint: disable=super-init-not-called
+        self.elemsByTag = {}
+        self.itemsByType = {}
+        for elem in parent.iter():
+            if elem is parent:
+                continue
+            self.elemsByTag.setdefault(elem.tag, []).append(elem)
+            if elem.tag == "item":
+                self.itemsByType.setdefault(
+                    elem.get("type", ""), []).append(elem)
+
+    def getTextByTagName(self, tagname):
+        elems = self.elemsByTag.get(tagname)
+        if not elems:
+            return ""
+        return getEtreeElemText(elems[0])
+
+class DomAccess:
+    """How to read DOM elements.
+    EtreeAccess has the same methods for ElementTree elements, so that
+    code to read a file can work with either kind of element.
+    """
+    ElementIndex = ElementIndex
+    getElemText = staticmethod(getElemText)
+
+    @staticmethod
+    def getElementsByTagName(parent, tagname):
+        return parent.getElementsByTagName(tagname)
+
+    @staticmethod
+    def childElements(parent):
+        return [node for node in parent.childNodes
+                if node.nodeType == node.ELEMENT_NODE]
+
+    @staticmethod
+    def getAttribute(elem, attrName):
+        """Returns an empty string if the element has no such attribute."""
+        return elem.getAttribute(attrName)
+
+class EtreeAccess:
+    """Like DomAccess but for xml.etree.ElementTree elements."""
+    ElementIndex = EtreeElementIndex
+    getElemText = staticmethod(getEtreeElemText)
+    getElementsByTagName = staticmethod(getEtreeElementsByTagName)
+
+    @staticmethod
+    def childElements(parent):
+        return list(parent)
+
+    @staticmethod
+    def getAttribute(elem, attrName):
+        return elem.get(attrName, "")
+
+def iterparseRootTags(filepath):
+    """Returns the tag names of the document element and its first child
+    element, without reading any further into the file.
+    Either value is an empty string if not found.
+    """
+    tags = []
+    for dummy_event, elem in ElementTree.iterparse(
+            filepath, events=('start',)):
+        tags.append(elem.tag)
+        if len(tags) == 2:
+            break
+    tags.extend(["", ""])
+    return tags[0], tags[1]
+
+def iterparseElements(filepath, tagnames):
+    """Parse a large file without building a tree of the whole document.
+    Yields each element that has one of the specified tag names after its
+    end tag has been read.  After the caller is finished with it,
+    the element is cleared and detached to free memory.
+
+    An element nested inside of another yielded element is not yielded
+    separately; it is available as part of the outer element.
+
+    :param tagnames: collection of tag name strings
+    """
+    stack = []
+    for event, elem in ElementTree.iterparse(
+            filepath, events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            continue
+        stack.pop()
+        if elem.tag not in tagnames:
+            continue
+        if any(ancestor.tag in tagnames for ancestor in stack):
+            continue
+        yield elem
+        elem.clear()
+        if stack:
+            stack[-1].remove(elem)
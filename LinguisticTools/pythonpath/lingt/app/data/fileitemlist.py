@@ -400,6 +400,7 @@ class InterlinInputSettings(Syncable):
         self.showMorphGloss = True
         self.separateMorphColumns = False
         self.SFM_baseline_word1 = True  # typically the \tx line
+        self.parallelParsing = False  # parse files in worker processes
 
     def get_showMorphemeBreaks(self):
         return (self.showMorphText1
@@ -410,6 +411,7 @@ class InterlinInputSettings(Syncable):
         self.fileList.loadUserVars()
         if self.userVars.get("SFM_Baseline").lower() == "wordline2":
             self.SFM_baseline_word1 = False
+        self.parallelParsing = (self.userVars.getInt("ParallelParsing") == 1)
 
     def storeUserVars(self):
         pass
@@ -60,6 +60,10 @@ class MessageError(LingtError):
     def __str__(self):
         return interpolate_message(self.msg, self.msg_args)
 
+    def __reduce__(self):
+        """Allows exceptions to be sent back from worker processes."""
+        return (self.__class__, (self.msg,) + tuple(self.msg_args))
+
 
 class UserInterrupt(LingtError):
     """When the user presses Cancel to interrupt something."""
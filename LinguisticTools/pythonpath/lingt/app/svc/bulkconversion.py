@@ -8,13 +8,18 @@ This module exports:
     ConvPool
 """
 import collections
+import concurrent.futures
+import functools
 import logging
 
-from lingt.access.sec_wrapper import ConverterSettings, SEC_wrapper
+from lingt.access.sec_wrapper import (
+    ConverterSettings, SEC_wrapper, getConversionWorkers,
+    setupConversionCache, theConversionCache)
 from lingt.access.writer import doc_to_xml
 from lingt.access.writer import uservars
 from lingt.app import exceptions
 from lingt.app.data.bulkconv_structs import ScopeType
+from lingt.app.svc.dataconversion import displayResult
 from lingt.ui.common.messagebox import MessageBox
 from lingt.ui.common.progressbar import ProgressBar, ProgressRange
 from lingt.utils import util
@@ -33,6 +38,7 @@ class BulkConversion:
         self.userVars = uservars.UserVars(
             uservars.Prefix.BULK_CONVERSION, self.unoObjs.document, logger)
         self.msgbox = MessageBox(self.unoObjs)
+        setupConversionCache(self.unoObjs, self.userVars)
         self.convPool = ConvPool(
             self.userVars, self.msgbox, self.get_all_conv_names)
         self.fileItems = None  # FileItemList of BulkFileItem
@@ -40,6 +46,19 @@ class BulkConversion:
         self.outdir = ""
         self.askEach = False
         self.scopeType = ScopeType.FONT_WITH_STYLE
+        self.extractFiles = False
+        self.load_hidden_settings()
+
+    def load_hidden_settings(self):
+        """This hidden user variable must be set manually.
+        Extracting the files of each document into a folder can be useful
+        to look at the XML, but it is slower.
+        """
+        varname = 'ExtractOdtFiles'
+        if self.userVars.isEmpty(varname):
+            self.userVars.store(varname, "0")  # make sure it exists
+        else:
+            self.extractFiles = bool(self.userVars.getInt(varname))
 
     def scanFiles(self, fileItems, outdir, scopeType):
         """Sets self.styleItemList"""
@@ -52,17 +71,24 @@ class BulkConversion:
         progressBar.updateBeginning()
         progressRange = ProgressRange(
             ops=len(self.fileItems), pbar=progressBar)
-        #progressRange.partSize = 10
-        progressRange.partSize = 4
-        unique_styles = UniqueStyles(self.scopeType)
-        for fileItemIndex, fileItem in enumerate(self.fileItems):
+        fileEditors = []
+        for fileItem in self.fileItems:
             fileItem.fileEditor = doc_to_xml.DocToXml(
                 self.unoObjs, self.msgbox, fileItem, self.outdir,
-                self.scopeType, progressRange)
-            processingStylesFound = fileItem.fileEditor.read()
+                self.scopeType, self.extractFiles)
+            if fileItem.fileEditor.prepare():
+                fileEditors.append(fileItem.fileEditor)
+        results = runInThreads(
+            [fileEditor.readXml for fileEditor in fileEditors],
+            progressRange)
+        unique_styles = UniqueStyles(self.scopeType)
+        for fileEditor, (processingStylesFound, exc) in zip(
+                fileEditors, results):
+            if exc is not None:
+                # Files that need UNO to read are handled here.
+                processingStylesFound = fileEditor.recoverRead(exc)
             logger.debug("found %d styles", len(processingStylesFound))
             unique_styles.add(processingStylesFound)
-            progressRange.update(fileItemIndex)
         self.styleItemList.set_items(unique_styles)
         progressBar.updateFinishing()
         progressBar.close()
@@ -78,20 +104,37 @@ class BulkConversion:
         progressBar = ProgressBar(self.unoObjs, "Converting...")
         progressBar.show()
         progressBar.updateBeginning()
-        self.convert_vals()
+        theConversionCache.startRun()
+        try:
+            self.convert_vals()
+        finally:
+            self.convPool.shutdown_workers()
+        theConversionCache.save()
+        logger.debug(
+            "Conversion cache hits %d, misses %d",
+            *theConversionCache.getStats())
         progressBar.updatePercent(25)
 
         totalChanges = 0
         totalFilesChanged = 0
         #logger.debug(
         #   repr([repr(change) for change in self.getStyleChanges()]))
+        styleChanges = self.getStyleChanges()
         logger.debug(
-            repr([change.converter.convName
-                  for change in self.getStyleChanges()]))
-        for fileItem in self.fileItems:
-            numChanges = fileItem.fileEditor.makeChanges(
-                self.getStyleChanges())
-            if numChanges > 0:
+            repr([change.converter.convName for change in styleChanges]))
+        progressRange = ProgressRange(
+            start=25, stop=90, ops=len(self.fileItems), pbar=progressBar)
+        results = runInThreads(
+            [functools.partial(fileItem.fileEditor.writeChanges, styleChanges)
+             for fileItem in self.fileItems
+             if fileItem.fileEditor.odt_reader],
+            progressRange)
+        for numChanges, exc in results:
+            if isinstance(exc, exceptions.MessageError):
+                self.msgbox.displayExc(exc)
+            elif exc is not None:
+                raise exc
+            elif numChanges > 0:
                 totalChanges += numChanges
                 totalFilesChanged += 1
 
@@ -104,12 +147,13 @@ class BulkConversion:
         ## Display results
 
         if totalChanges == 0:
-            self.msgbox.display("No changes.")
+            displayResult(self.msgbox, theConversionCache, "No changes.")
         else:
             # add "s" if plural
             plural = "" if totalChanges == 1 else "s"
             pluralFiles = "" if totalFilesChanged == 1 else "s"
-            self.msgbox.display(
+            displayResult(
+                self.msgbox, theConversionCache,
                 "Made %d change%s to %d file%s.",
                 totalChanges, plural, totalFilesChanged, pluralFiles)
 
@@ -133,10 +177,11 @@ class BulkConversion:
             self.convPool.cleanup_unused()
             for styleItem in converter_styleItems[converter_settings]:
                 styleChange = styleItem.change
-                for inputText in styleItem.inputData:
-                    if inputText not in styleChange.converted_data:
-                        converted_val = sec_call.convert(inputText)
-                        styleChange.converted_data[inputText] = converted_val
+                inputTexts = list(dict.fromkeys(
+                    inputText for inputText in styleItem.inputData
+                    if inputText not in styleChange.converted_data))
+                styleChange.converted_data.update(
+                    zip(inputTexts, sec_call.convert_many(inputTexts)))
 
     def getStyleChanges(self):
         """Returns a list of all non-empty StyleChange objects for the list
@@ -156,6 +201,30 @@ class BulkConversion:
         return self.styleItemList.selected_item()
 
 
+def runInThreads(tasks, progressRange):
+    """Call each function of tasks in a worker thread.
+    The functions must not call UNO, but progress is updated here in the
+    main thread as each one finishes.
+    Returns a list of tuples (result, exception) in the same order as tasks.
+    """
+    results = [(None, None)] * len(tasks)
+    if not tasks:
+        return results
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        futureIndexes = {
+            executor.submit(task): taskIndex
+            for taskIndex, task in enumerate(tasks)}
+        for numDone, future in enumerate(
+                concurrent.futures.as_completed(futureIndexes), 1):
+            exc = future.exception()
+            if exc is None:
+                results[futureIndexes[future]] = (future.result(), None)
+            else:
+                results[futureIndexes[future]] = (None, exc)
+            progressRange.update(numDone)
+    return results
+
+
 class UniqueStyles:
     """Gets StyleItems from ProcessingStyleItems.
     Merges inputData of style items.
@@ -279,6 +348,9 @@ class ConvPool:
     but the ECDriver only holds one settings value for each name.
 
     Values are of type sec_wrapper.SEC_Wrapper.
+
+    If helper processes are configured, all converters in the pool share
+    them, and each batch of work tells the helper which converter to use.
     """
 
     def __init__(self, userVars, msgbox, get_all_conv_names=None):
@@ -286,6 +358,7 @@ class ConvPool:
         self.msgbox = msgbox
         self.get_all_conv_names = get_all_conv_names  # method
         self._secCallObjs = {}  # the main dict for this class
+        self.workers = getConversionWorkers(userVars)
 
     def selectConverter(self, key):
         """Returns ConverterSettings, or None if cancelled."""
@@ -336,6 +409,7 @@ class ConvPool:
                 #self.msgbox.displayExc(exc)
                 #raise exceptions.ChoiceProblem(
                 #    "Please select the converter again.")
+        secCall.workers = self.workers
         self[key] = secCall
         logger.debug(util.funcName('end'))
         return secCall
@@ -352,6 +426,11 @@ class ConvPool:
             if key not in convNames:
                 del self._secCallObjs[key]
 
+    def shutdown_workers(self):
+        """Stop helper processes.  They will be started again if needed."""
+        if self.workers is not None:
+            self.workers.shutdown()
+
     def __contains__(self, key):
         return key in self._secCallObjs
 
@@ -4,11 +4,12 @@ Main data conversion logic.
 This module exports:
     ConversionSettings
     DataConversion
+    displayResult
 """
 import logging
 from com.sun.star.uno import RuntimeException
 
-from lingt.access.sec_wrapper import SEC_wrapper
+from lingt.access.sec_wrapper import SEC_wrapper, setupConversionCache
 from lingt.access.calc.spreadsheet_output import SpreadsheetOutput
 from lingt.access.calc.spreadsheet_reader import SpreadsheetReader
 from lingt.access.draw.shapesearch import ShapeSearch
@@ -49,6 +50,7 @@ class DataConversion:
         self.styleFonts = styleFonts
         self.msgbox = MessageBox(self.unoObjs)
         self.secCall = SEC_wrapper(self.msgbox, userVars)
+        setupConversionCache(self.unoObjs, userVars)
         self.config = None
 
     def selectConverter(self):
@@ -146,6 +148,7 @@ class DataConversion:
         progressBar = ProgressBar(self.unoObjs, "Converting...")
         progressBar.show()
         progressBar.updateBeginning()
+        self.secCall.cache.startRun()
 
         ## Find the text ranges
 
@@ -192,30 +195,40 @@ class DataConversion:
             textChanger.setFontToChange(self.config.targetFont)
         numDataChanges, numStyleChanges = textChanger.doChanges(
             rangesFound, self.config.askEach)
+        self.finishCache()
 
         progressBar.updateFinishing()
         progressBar.close()
 
         ## Display results
 
-        paragraphsFound = len(rangesFound)
+        self.displayChanges(len(rangesFound), numDataChanges, numStyleChanges)
+
+    def displayChanges(self, paragraphsFound, numDataChanges,
+                       numStyleChanges):
+        """Display results of converting a Writer or Draw doc."""
+        cache = self.secCall.cache
         if paragraphsFound == 0:
             self.msgbox.display("Did not find scope of change.")
         elif numDataChanges == 0:
             if numStyleChanges == 0:
-                self.msgbox.display("No changes.")
+                displayResult(self.msgbox, cache, "No changes.")
             else:
                 plural = "" if numStyleChanges == 1 else "s"
                     # add "s" if plural
-                self.msgbox.display(
+                displayResult(
+                    self.msgbox, cache,
                     "No changes, but modified style of %d paragraph%s.",
                     numStyleChanges, plural)
         elif paragraphsFound == 1:
             plural = "" if numDataChanges == 1 else "s" # add "s" if plural
-            self.msgbox.display("Made %d change%s.", numDataChanges, plural)
+            displayResult(
+                self.msgbox, cache, "Made %d change%s.",
+                numDataChanges, plural)
         else:
             plural = "" if numDataChanges == 1 else "s" # add "s" if plural
-            self.msgbox.display(
+            displayResult(
+                self.msgbox, cache,
                 "Found %d paragraphs and made %d change%s.",
                 paragraphsFound, numDataChanges, plural)
 
@@ -228,6 +241,7 @@ class DataConversion:
         progressBar = ProgressBar(self.unoObjs, "Converting...")
         progressBar.show()
         progressBar.updateBeginning()
+        self.secCall.cache.startRun()
 
         ## Get list of words from source column
         #  (just strings are enough, no need for a special object)
@@ -249,28 +263,26 @@ class DataConversion:
 
         ## Convert
 
-        outList = []
         problems = False
         numDataChanges = 0
-        for inValue in inputList:
-            try:
-                outValue = self.secCall.convert(inValue)
-                outList.append(outValue)
-                if outValue != inValue:
-                    numDataChanges += 1
-            except exceptions.MessageError as exc:
-                self.msgbox.displayExc(exc)
-                problems = True
-                outList.append("")
-                break
+        try:
+            outList = self.secCall.convert_many(inputList)
+            numDataChanges = sum(
+                1 for inValue, outValue in zip(inputList, outList)
+                if outValue != inValue)
+        except exceptions.MessageError as exc:
+            self.msgbox.displayExc(exc)
+            problems = True
+        self.finishCache()
 
         ## Output results
 
-        outputter = SpreadsheetOutput(self.unoObjs)
-        try:
-            outputter.outputToColumn(destCol, outList, skipFirstRow)
-        except exceptions.DocAccessError:
-            self.msgbox.display("Error writing to spreadsheet.")
+        if not problems:
+            outputter = SpreadsheetOutput(self.unoObjs)
+            try:
+                outputter.outputToColumn(destCol, outList, skipFirstRow)
+            except exceptions.DocAccessError:
+                self.msgbox.display("Error writing to spreadsheet.")
 
         progressBar.updateFinishing()
         progressBar.close()
@@ -279,9 +291,18 @@ class DataConversion:
 
         if not problems:
             if numDataChanges == 0:
-                self.msgbox.display("No changes.")
+                displayResult(self.msgbox, self.secCall.cache, "No changes.")
             else:
-                self.msgbox.display("Successfully finished conversion.")
+                displayResult(
+                    self.msgbox, self.secCall.cache,
+                    "Successfully finished conversion.")
+
+    def finishCache(self):
+        """Save new results and log how many conversions were avoided."""
+        self.secCall.cache.save()
+        logger.debug(
+            "Conversion cache hits %d, misses %d",
+            *self.secCall.cache.getStats())
 
     def doConversions_draw(self):
         """For converting data in a Draw doc."""
@@ -292,6 +313,7 @@ class DataConversion:
         progressBar = ProgressBar(self.unoObjs, "Converting...")
         progressBar.show()
         progressBar.updateBeginning()
+        self.secCall.cache.startRun()
 
         ## Find the text ranges
 
@@ -328,29 +350,24 @@ class DataConversion:
         rangesFound.reverse()
         numDataChanges, numStyleChanges = textChanger.doChanges(
             rangesFound, self.config.askEach)
+        self.finishCache()
 
         progressBar.updateFinishing()
         progressBar.close()
 
         ## Display results
 
-        paragraphsFound = len(rangesFound)
-        if paragraphsFound == 0:
-            self.msgbox.display("Did not find scope of change.")
-        elif numDataChanges == 0:
-            if numStyleChanges == 0:
-                self.msgbox.display("No changes.")
-            else:
-                plural = "" if numStyleChanges == 1 else "s"
-                    # add "s" if plural
-                self.msgbox.display(
-                    "No changes, but modified style of %d paragraph%s.",
-                    numStyleChanges, plural)
-        elif paragraphsFound == 1:
-            plural = "" if numDataChanges == 1 else "s" # add "s" if plural
-            self.msgbox.display("Made %d change%s.", numDataChanges, plural)
-        else:
-            plural = "" if numDataChanges == 1 else "s" # add "s" if plural
-            self.msgbox.display(
-                "Found %d paragraphs and made %d change%s.",
-                paragraphsFound, numDataChanges, plural)
+        self.displayChanges(len(rangesFound), numDataChanges, numStyleChanges)
+
+
+def displayResult(msgbox, cache, message, *msg_args):
+    """Display the result of a conversion run, adding how many conversions
+    were taken from the cache during the run.
+    :param cache: type sec_wrapper.ConversionCache
+    """
+    message = exceptions.interpolate_message(message, msg_args)
+    hits, misses = cache.getStats()
+    if hits + misses > 0:
+        message += "\n" + exceptions.interpolate_message(
+            "Results taken from the cache: %d of %d.", (hits, hits + misses))
+    msgbox.display(message)
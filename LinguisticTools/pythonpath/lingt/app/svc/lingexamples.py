@@ -9,6 +9,7 @@ This module exports:
 import logging
 import re
 
+from lingt.access.common.example_cache import ExampleCache, getCacheFolder
 from lingt.access.writer import outputmanager
 from lingt.access.writer import search
 from lingt.access.writer import styles
@@ -263,6 +264,7 @@ class ExOperations:
         self.exUpdater = ExUpdater(
             unoObjs, self.outputManager, self.userVars.VAR_PREFIX)
         self.msgbox = MessageBox(unoObjs)
+        self.exampleCache = ExampleCache(getCacheFolder(unoObjs))
         self.examplesDict = None
         self.suggestions = []
         self.duplicate_refnums = []
@@ -290,15 +292,28 @@ class ExOperations:
             self.settings.reset()
         if self.examplesDict is None:
             logger.debug("Getting examples dict")
+            inconfig = self.settings.getInconfig()
+            if self.exType == EXTYPE_PHONOLOGY:
+                cacheKey = ExampleCache.phonologyKey(inconfig, self.userVars)
+            else:
+                cacheKey = ExampleCache.interlinKey(inconfig, self.userVars)
+            cached = self.exampleCache.load(cacheKey)
+            if cached:
+                (self.examplesDict, self.suggestions,
+                 self.duplicate_refnums) = cached
+                return
             if self.exType == EXTYPE_PHONOLOGY:
                 fileReader = PhonReader(
-                    self.unoObjs, self.userVars, self.settings.getInconfig())
+                    self.unoObjs, self.userVars, inconfig)
             else:
                 fileReader = InterlinReader(
-                    self.unoObjs, self.userVars, self.settings.getInconfig())
+                    self.unoObjs, self.userVars, inconfig)
             self.examplesDict = fileReader.read()
             self.suggestions = fileReader.getSuggestions()
             self.duplicate_refnums = fileReader.getDuplicateRefNumbers()
+            self.exampleCache.store(
+                cacheKey, self.examplesDict, self.suggestions,
+                self.duplicate_refnums)
 
     def insertEx(self, refTextRough, deleteRefNum, updatingEx):
         """Set updatingEx to True if updating the example."""
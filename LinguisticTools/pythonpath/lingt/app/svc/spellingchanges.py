@@ -23,9 +23,8 @@ def getChangeList(calcUnoObjs, columnOrder):
     colLetterWord = columnOrder.getColLetter('colWord')
     colLetterCorrection = columnOrder.getColLetter('colChange')
     reader = spreadsheet_reader.SpreadsheetReader(calcUnoObjs)
-    listFrom = reader.getColumnStringList(colLetterWord, skipFirstRow=True)
-    listTo = reader.getColumnStringListByLen(
-        colLetterCorrection, True, len(listFrom))
+    listFrom, listTo = reader.read_columns(
+        [colLetterWord, colLetterCorrection], skipFirstRow=True)
     changeList = []
     for fromVal, toVal in zip(listFrom, listTo):
         if (not fromVal) or (not toVal) or (toVal == fromVal):
@@ -17,7 +17,7 @@ from grantjenks.tribool import Tribool
 from lingt.access.calc import spreadsheet_reader
 from lingt.access.calc.spreadsheet_output import SpreadsheetOutput
 from lingt.access.calc.wordlist_io import WordlistIO
-from lingt.access.writer.textchanges import FindAndReplace
+from lingt.access.writer.textmodel import DocTextModel
 from lingt.access.writer.textsearch import TextSearch, TextSearchSettings
 from lingt.access.writer.traveler import RangeJumper
 from lingt.app import exceptions
@@ -264,60 +264,63 @@ def normalize(normForm, word):
 
 class GoodList:
     """List of words that are correctly spelled."""
+
+    # Forget normalized forms if there are more than this many, to limit
+    # memory use.
+    MAX_NORMALIZED = 100000
+
     def __init__(self, msgbox):
         self.suggestions = SpellingSuggestions(msgbox)
         self.wordList = []
-        self.insensitiveList = []  # case insensitive (unless matchCase)
+        self.insensitiveSet = set()  # case insensitive (unless matchCase)
         self.matchCase = False
         self.normForm = DEFAULT_NORM_FORM
         self.columnLetter = ""
         self.calcUnoObjs = None
         # used instead of a good list if applying corrections
         self.changeDict = {}
+        # Keys are words as found, values are normalized.
+        # The same words are typically checked many times in a document.
+        self.normalizedWords = {}
 
     def setCalcUnoObjs(self, calcUnoObjs):
         self.calcUnoObjs = calcUnoObjs
 
     def setGoodList(self, newList, matchCase, normForm, columnLetter):
         """Sets most of the attributes of this class."""
-        self.wordList = self.normalizeList(newList)
         self.matchCase = matchCase
         self.normForm = normForm
+        self.normalizedWords = {}
+        self.wordList = self.normalizeList(newList)
         self.columnLetter = columnLetter
         self.suggestions.setList(self.wordList)
         self.loadInsensitiveList()
 
     def add(self, wordSimplified):
+        """Add the word to the list and to the end of the column,
+        without rewriting the rest of the column.
+        """
         self.wordList.append(wordSimplified)
-        self.suggestions.setList(self.wordList)
-        self.loadInsensitiveList()
+        self.suggestions.addWord(wordSimplified)
+        self.insensitiveSet.add(self.firstLower(wordSimplified))
         spreadsheetOutput = SpreadsheetOutput(self.calcUnoObjs)
-        spreadsheetOutput.outputToColumn(
-            self.columnLetter, self.wordList)
+        # The first row is a heading, and rows are numbered from 1.
+        spreadsheetOutput.outputString(
+            self.columnLetter, len(self.wordList) + 1, wordSimplified)
 
     def loadInsensitiveList(self):
         if self.matchCase:
-            self.insensitiveList = self.wordList
+            self.insensitiveSet = set(self.wordList)
             return
-        self.insensitiveList = self.wordList[:]
-        for i, word in enumerate(self.wordList):
-            wordLower = self.firstLower(word)
-            if wordLower != word:
-                self.insensitiveList[i] = wordLower
+        self.insensitiveSet = {self.firstLower(word) for word in self.wordList}
 
     def firstLower(self, wordText):
-        """
-        Sets the initial character to lower case.
-        Returns True if a change was made.
-        """
+        """Returns the word with the initial character in lower case."""
         if self.matchCase or not wordText:
             return wordText
-        c = wordText[0]
-        if c in letters.CASE_CAPITALS:
-            # change first letter
-            i = letters.CASE_CAPITALS.index(c)
-            wordText = letters.CASE_LOWER[i] + wordText[1:]
-            return wordText
+        lowerChar = letters.LOWER_OF_CAPITAL.get(wordText[0])
+        if lowerChar:
+            return lowerChar + wordText[1:]
         return wordText
 
     def normalizeList(self, wordList):
@@ -325,8 +328,17 @@ class GoodList:
             normalize(self.normForm, word)
             for word in wordList]
 
+    def normalizeWord(self, word):
+        normalized = self.normalizedWords.get(word)
+        if normalized is None:
+            if len(self.normalizedWords) >= self.MAX_NORMALIZED:
+                self.normalizedWords = {}
+            normalized = normalize(self.normForm, word)
+            self.normalizedWords[word] = normalized
+        return normalized
+
     def __contains__(self, word):
-        return normalize(self.normForm, word) in self.insensitiveList
+        return self.normalizeWord(word) in self.insensitiveSet
 
 
 def getContext(tokens, wordTokenNum):
@@ -396,8 +408,7 @@ class WordAsker:
             return True
         if action == 'ChangeAll':
             self.rangeJumper.changeString(self.addPunct(changeTo))
-            replacer = FindAndReplace(self.unoObjs, False)
-            replacer.replace(wordText, changeTo)
+            self.changeAll(wordText, changeTo)
             return True
         if action == 'Add':
             self.goodList.add(self.removeAffixes(wordText))
@@ -405,6 +416,20 @@ class WordAsker:
         # user probably pressed Close or clicked the X to close the dialog
         raise exceptions.UserInterrupt()
 
+    def changeAll(self, wordText, changeTo):
+        """Change all other occurrences of the word in the document.
+        Like findAll(), whole words are matched regardless of case.
+        Returns the number of changes made.
+        """
+        textModel = DocTextModel(self.unoObjs)
+        textModel.load()
+        wordRegex = re.compile(
+            r"(?<!\w)" + re.escape(wordText) + r"(?!\w)", re.IGNORECASE)
+        edits = [
+            textModel.makeEdit(paraIndex, match.start(), match.end(), changeTo)
+            for paraIndex, match in textModel.finditer(wordRegex)]
+        return textModel.applyEdits(edits)
+
     def applyCorrection(self, wordText):
         """Returns True if a change was made."""
         newWord = self.goodList.changeDict[self.goodList.firstLower(wordText)]
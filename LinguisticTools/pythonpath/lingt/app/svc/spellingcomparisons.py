@@ -4,7 +4,10 @@ Logic for spelling comparisons.
 This module exports:
     SpellingCharClasses
     SpellingSuggestions
+    SimilarWordIndex
 """
+import bisect
+import itertools
 import logging
 import os
 from operator import itemgetter
@@ -115,17 +118,10 @@ class SpellingCharClasses:
             return
         words = wordsFromStrings(wordStrings)
 
-        charSetList = []
-        for charlist in self.charsComp:
-            if len(charlist) < 2:
-                # only useful to have at least two characters to compare
-                continue
-            charset = CharSet(charlist)
-            # treat each similarity set as if it were an individual character
-            wordChar = WordChar(charset, isCharset=True)
-            charSetList.append(wordChar)
-
-        numSimilarWords = compareAllWords(words, charSetList)
+        # Only useful to have at least two characters to compare.
+        charSets = [charlist for charlist in self.charsComp
+                    if len(charlist) >= 2]
+        numSimilarWords = compareAllWords(words, charSets)
 
         similarWordsStrings = [word.similarWords_str() for word in words]
         colLetter = columnOrder.getColLetter('colSimilar')
@@ -176,234 +172,304 @@ def levenshteinDistance(s1, s2):
         distances = newDistances
     return distances[-1]
 
+def makeCharMasks(text):
+    """Returns a dict for editDistance(), with a bit set for each position
+    where the character occurs in text.
+    """
+    charMasks = {}
+    for index, char in enumerate(text):
+        charMasks[char] = charMasks.get(char, 0) | (1 << index)
+    return charMasks
+
+def editDistance(charMasks, length, other):
+    """Returns the same result as levenshteinDistance(text, other) for
+    lowercase strings, but much faster, because each character of other
+    is compared against all of text at once using bit operations.
+    This is the algorithm of Myers (1999) as described by Hyyrö (2001).
+
+    :param charMasks: from makeCharMasks(text)
+    :param length: len(text)
+    """
+    if not length:
+        return len(other)
+    allBits = (1 << length) - 1
+    lastBit = 1 << (length - 1)
+    vertPos = allBits
+    vertNeg = 0
+    distance = length
+    for char in other:
+        matches = charMasks.get(char, 0)
+        vertChanges = matches | vertNeg
+        horizChanges = (((matches & vertPos) + vertPos) ^ vertPos) | matches
+        horizPos = vertNeg | (~(horizChanges | vertPos) & allBits)
+        horizNeg = vertPos & horizChanges
+        if horizPos & lastBit:
+            distance += 1
+        elif horizNeg & lastBit:
+            distance -= 1
+        horizPos = ((horizPos << 1) | 1) & allBits
+        horizNeg = (horizNeg << 1) & allBits
+        vertPos = horizNeg | (~(vertChanges | horizPos) & allBits)
+        vertNeg = horizPos & vertChanges
+    return distance
+
 class SpellingSuggestions:
     """Logic to find similar words based on edit distance."""
 
     def __init__(self, msgbox, limit=20):
         self.limit = limit
         self.msgbox = msgbox
-        self.listSorted = []  # sorted by word
-        self.listByLength = []  # sorted by length
-        self.wordToFind = ""
+        self.index = SimilarWordIndex()
+        self.pendingWords = None  # set of words not yet indexed
 
     def setList(self, datalist):
-        self.listSorted = datalist[:]
+        """The list is indexed when suggestions are first needed."""
         try:
-            self.listSorted = [word for word in self.listSorted
-                               if word.strip() != ""]
+            self.pendingWords = {
+                word for word in datalist if word.strip() != ""}
         except AttributeError:
             self.msgbox.display("Error reading the list.")
-            self.listSorted = []
-        self.listSorted.sort()
-        self.listByLength = sorted(self.listSorted, key=len)
+            self.pendingWords = set()
+
+    def addWord(self, word):
+        if word.strip() == "":
+            return
+        if self.pendingWords is not None:
+            self.pendingWords.add(word)
+        else:
+            self.index.add(word)
 
     def getSuggestions(self, wordToFind):
         """The main function to get similar words.
         Returns a list.
         """
-        self.wordToFind = wordToFind
-
-        ## Sort list by most likely first.
-
-        rank = {}
-        self._compareBySameBeginning(rank)
-        self._compareBySimilarLength(rank)
-        rankings = [rank[word]
-                    for word in self.listSorted]
-        rankedList = sorted(zip(self.listSorted, rankings), key=itemgetter(1))
-
-        ## Check edit distance starting with most likely candidates.
-
-        superStrings, similarStrings = self._checkEditDistance(rankedList)
-        suggestions = superStrings[:]
-        for word, dummy in similarStrings:
+        self._updateIndex()
+        suggestions = self.index.findSubSuperStrings(
+            wordToFind, self.limit // 2 + 1)
+        for word in self.index.findSimilar(wordToFind, self.limit):
             if word not in suggestions:
                 suggestions.append(word)
         return suggestions[:self.limit]
 
-    def _compareBySameBeginning(self, rank):
-        """Words with same beginning are likely to be misspellings.
-        Set rank values accordingly.
-        """
-        bestMatchingCount = 0
-        firstMatchingIndex = 0
-        lastMatchingIndex = 0
-        for list_i, wordSorted in enumerate(self.listSorted):
-            matchingCount = 0
-            for list_j, char in enumerate(self.wordToFind.lower()):
-                if (len(wordSorted) > list_j and
-                        wordSorted[list_j].lower() == char):
-                    matchingCount += 1
-                else:
-                    break
-            if matchingCount > bestMatchingCount:
-                firstMatchingIndex = list_i
-                lastMatchingIndex = list_i
-                bestMatchingCount = matchingCount
-            elif matchingCount == bestMatchingCount:
-                lastMatchingIndex = list_i
-            elif matchingCount < bestMatchingCount:
-                break
-        median_i = (firstMatchingIndex +
-                    (lastMatchingIndex - firstMatchingIndex) // 2)
-        for list_i, wordSorted in enumerate(self.listSorted):
-            rank[wordSorted] = abs(list_i - median_i)
-
-    def _compareBySimilarLength(self, rank):
-        """Words with same length are likely to be misspellings.
-        Adjust rank values accordingly.
+    def _updateIndex(self):
+        """Lists are often set again with only a word or two different,
+        so only the differences are indexed.
         """
-        bestDiff = 1000  # an arbitrary big number
-        firstBestIndex = 0
-        lastBestIndex = 0
-        for list_i, wordByLength in enumerate(self.listByLength):
-            diff = abs(len(self.wordToFind) - len(wordByLength))
-            if diff < bestDiff:
-                firstBestIndex = list_i
-                lastBestIndex = list_i
-                bestDiff = diff
-            elif diff == bestDiff:
-                lastBestIndex = list_i
-            elif diff > bestDiff:
-                break
-        median_i = firstBestIndex + (lastBestIndex - firstBestIndex) // 2
-        for list_i, wordByLength in enumerate(self.listByLength):
-            rank[wordByLength] += abs(list_i - median_i)
+        if self.pendingWords is None:
+            return
+        oldWords = self.index.words
+        for word in oldWords - self.pendingWords:
+            self.index.remove(word)
+        for word in self.pendingWords - oldWords:
+            self.index.add(word)
+        self.pendingWords = None
+
+
+class SimilarWordIndex:
+    """Finds words within a small edit distance without comparing
+    against every word in the list.  Case is ignored.
+
+    This is a symmetric delete index as used by SymSpell.  Each word is
+    stored under every string that can be made by deleting up to
+    MAX_DISTANCE characters from its beginning.  Two words within
+    MAX_DISTANCE edits of each other share at least one of these strings,
+    so only the words under the strings of the word to find need to
+    be compared.
+    """
+    MAX_DISTANCE = 2
+    PREFIX_LENGTH = 7  # limits the number of strings stored for long words
+    SEPARATOR = "\0"  # between words when searching for substrings
+
+    def __init__(self):
+        self.words = set()
+        self.wordsOfKey = {}  # keys are lowercase words, values lists
+        # Keys are strings with characters deleted, and values are a
+        # lowercase word or a list of them.
+        self.keysOfDeletes = {}
+        self.joinedKeys = None  # None when out of date
+        self.joinedKeyList = []
+        self.keyOffsets = []  # where each key starts in joinedKeys
+
+    def add(self, word):
+        if word in self.words:
+            return
+        self.words.add(word)
+        key = word.lower()
+        if key in self.wordsOfKey:
+            self.wordsOfKey[key].append(word)
+            return
+        self.wordsOfKey[key] = [word]
+        self.joinedKeys = None
+        for deleted in self._getDeletes(key):
+            entry = self.keysOfDeletes.get(deleted)
+            if entry is None:
+                self.keysOfDeletes[deleted] = key
+            elif isinstance(entry, list):
+                entry.append(key)
+            else:
+                self.keysOfDeletes[deleted] = [entry, key]
 
-    def _checkEditDistance(self, rankedList):
-        """Check edit distance by the order of the given list.
-        Don't go through the whole list unless needed.
+    def remove(self, word):
+        if word not in self.words:
+            return
+        self.words.remove(word)
+        key = word.lower()
+        wordsOfKey = self.wordsOfKey[key]
+        wordsOfKey.remove(word)
+        if wordsOfKey:
+            return
+        del self.wordsOfKey[key]
+        self.joinedKeys = None
+        for deleted in self._getDeletes(key):
+            entry = self.keysOfDeletes[deleted]
+            if isinstance(entry, list):
+                entry.remove(key)
+                if len(entry) == 1:
+                    self.keysOfDeletes[deleted] = entry[0]
+            else:
+                del self.keysOfDeletes[deleted]
+
+    def findSimilar(self, wordToFind, limit):
+        """Returns words within MAX_DISTANCE edits, closest first."""
+        key = wordToFind.lower()
+        candidates = set()
+        for deleted in self._getDeletes(key):
+            entry = self.keysOfDeletes.get(deleted)
+            if entry is None:
+                continue
+            if isinstance(entry, list):
+                candidates.update(entry)
+            else:
+                candidates.add(entry)
+        charMasks = makeCharMasks(key)
+        matches = []
+        for candidate in candidates:
+            if abs(len(candidate) - len(key)) > self.MAX_DISTANCE:
+                continue
+            distance = editDistance(charMasks, len(key), candidate)
+            if distance <= self.MAX_DISTANCE:
+                matches.append((distance, candidate))
+        matches.sort()
+        return self._wordsOfKeys(
+            [candidate for dummy, candidate in matches], limit)
+
+    def findSubSuperStrings(self, wordToFind, limit):
+        """Returns words for which subSuperString() is true,
+        closest in length first.
         """
-        superStrings = []
-        for rec in rankedList:
-            wordRanked = rec[0]
-            if subSuperString(self.wordToFind, wordRanked):
-                superStrings.append(wordRanked)
-            if len(superStrings) > self.limit // 2:
-                break
-        logger.debug("Found %d sub/super strings.", len(superStrings))
-        similarStrings = []
-        FAR_ENOUGH = 1000  # There's no need to check the whole list,
-                           # since the most likely are towards the front.
-        for list_i, rec in enumerate(rankedList):
-            wordRanked = rec[0]
-            editDistance = levenshteinDistance(self.wordToFind, wordRanked)
-            isBetterMatch = False
-            similarStrings_i = 0
-            for similarStrings_i, rec2 in enumerate(similarStrings):
-                dummy, dist = rec2
-                if editDistance < dist:
-                    isBetterMatch = True
-                    break
-            if isBetterMatch:
-                similarStrings.insert(similarStrings_i,
-                                      (wordRanked, editDistance))
-                if len(similarStrings) > self.limit:
-                    similarStrings.pop()
-            elif len(similarStrings) < self.limit:
-                similarStrings.append((wordRanked, editDistance))
-            if list_i > FAR_ENOUGH:
+        key = wordToFind.lower()
+        if len(key) <= 2:
+            return []
+        found = set()
+        joinedKeys = self._getJoinedKeys()
+        start = joinedKeys.find(key)
+        while start != -1:
+            key_i = bisect.bisect_right(self.keyOffsets, start) - 1
+            found.add(self.joinedKeyList[key_i])
+            start = joinedKeys.find(key, start + 1)
+        for begin in range(len(key) - 2):
+            for end in range(begin + 3, len(key) + 1):
+                if key[begin:end] in self.wordsOfKey:
+                    found.add(key[begin:end])
+        keys = sorted(found, key=lambda k: (abs(len(k) - len(key)), k))
+        return self._wordsOfKeys(keys, limit)
+
+    def _getDeletes(self, key):
+        deletes = {key[:self.PREFIX_LENGTH]}
+        newDeletes = deletes
+        for dummy in range(self.MAX_DISTANCE):
+            newDeletes = {
+                text[:char_i] + text[char_i + 1:]
+                for text in newDeletes
+                for char_i in range(len(text))}
+            deletes.update(newDeletes)
+        return deletes
+
+    def _getJoinedKeys(self):
+        """Searching one long string is much faster than searching each
+        word separately.
+        """
+        if self.joinedKeys is None:
+            self.joinedKeyList = list(self.wordsOfKey)
+            self.keyOffsets = list(itertools.accumulate(
+                (len(key) + len(self.SEPARATOR)
+                 for key in self.joinedKeyList[:-1]),
+                initial=0))
+            self.joinedKeys = self.SEPARATOR.join(self.joinedKeyList)
+        return self.joinedKeys
+
+    def _wordsOfKeys(self, keys, limit):
+        words = []
+        for key in keys:
+            words.extend(sorted(self.wordsOfKey[key]))
+            if len(words) >= limit:
                 break
-        return superStrings, similarStrings
+        return words[:limit]
 
 
-def compareAllWords(wordList, charSetList):
+def compareAllWords(wordList, charSets):
     """Compare all words in list against each other.
     Modifies param wordList to add similar words.
 
-    Running time is O(n log n) rather than O(n squared) because it
+    Running time is O(n) rather than O(n squared) because it
     compares word patterns rather than comparing actual words.
+
+    :param charSets: lists of similar characters or character sequences
     """
-    wordPatternHash, wordPatterns = getPatterns(wordList, charSetList)
-    numSimilarWords = 0
+    patternMaker = PatternMaker(charSets)
+    wordsOfPattern = {}  # keys are patterns, values are lists of WordInList
+    patternsOfWords = []  # patterns of each word in wordList
     for word in wordList:
-        if word in wordPatterns:
-            for pattern in wordPatterns[word]:
-                hashKey = pattern.getHashKey()
-                for similarWord in wordPatternHash[hashKey]:
-                    if similarWord.text != word.text:
-                        word.similarWords.append(similarWord.text)
-                        numSimilarWords += 1
+        patterns = patternMaker.getPatterns(word.text)
+        patternsOfWords.append(patterns)
+        for pattern in patterns:
+            wordsOfPattern.setdefault(pattern, []).append(word)
+    numSimilarWords = 0
+    for word, patterns in zip(wordList, patternsOfWords):
+        for pattern in patterns:
+            for similarWord in wordsOfPattern[pattern]:
+                if similarWord.text != word.text:
+                    word.similarWords.append(similarWord.text)
+                    numSimilarWords += 1
     return numSimilarWords
 
-def getPatterns(wordList, charSetList):
-    """Reduce each word to its basic pattern by merging similar characters."""
-    wordPatternHash = {}  # keys are patterns, values are list of
-                          # WordInList.  This lets us quickly
-                          # match up identical patterns.
-    wordPatterns = {}  # keys are words, values are patterns.
-                       # This is to remember what
-                       # the patterns for that word were.
-    for word in wordList:
-        for word_i in range(len(word.text)):
-            for charsetWordChar in charSetList:
-                for char2 in charsetWordChar.val.charList:
-                    list_j = word_i + len(char2)
-                    if word.text[word_i:list_j] == char2:
-                        newPattern = WordPattern(word.text)
-                        newPattern.replace(word_i, list_j, charsetWordChar)
-                        if word not in wordPatterns:
-                            wordPatterns[word] = []
-                        wordPatterns[word].append(newPattern)
-                        hashKey = newPattern.getHashKey()
-                        if hashKey not in wordPatternHash:
-                            wordPatternHash[hashKey] = []
-                        wordPatternHash[hashKey].append(word)
-    return wordPatternHash, wordPatterns
-
-class WordPattern:
-    """The pattern rather than the actual text of the word."""
-
-    def __init__(self, text):
-        self.charList = [WordChar(char) for char in text]
-
-    def replace(self, list_i, list_j, newWordChar):
-        if list_j == list_i + 1:
-            self.charList[list_i] = newWordChar
-        else:
-            self.charList = (
-                self.charList[:list_i] + newWordChar + self.charList[list_j:])
-
-    def getHashKey(self):
-        """
-        Returns a value that can be used as a dictionary key, and will be
-        unique if and only if the WordChar list it contains is unique.
-        """
-        return "".join(wordChar.getHashKey() for wordChar in self.charList)
-
 
+class PatternMaker:
+    """Reduce words to basic patterns by merging similar characters.
 
-class WordChar:
-    """Either a character in a string, or a CharSet in place of the
-    character.
+    Each pattern of a word is the word with one occurrence of a member of
+    a similarity set replaced by a code point that stands for the whole
+    set, so words that differ only by similar characters at one place
+    have a pattern in common.
     """
-    LITERAL = 0
-    CHARSET = 1
-
-    def __init__(self, newVal, isCharset=False):
-        if isCharset:
-            self.charType = self.CHARSET
-        else:
-            self.charType = self.LITERAL
-        self.val = newVal
-
-    def getHashKey(self):
-        """TESTME: What happens if there is a literal value "1" or "2"?  Does
-        it overwrite the charset with that ID?
-        """
-        if self.charType == self.CHARSET:
-            return str(self.val.charsetID)
-        if self.charType == self.LITERAL:
-            return self.val
-        return "0"
-
-
-class CharSet:
-    """Uniquely label a character list."""
-
-    instanceCount = 0
-
-    def __init__(self, newCharList):
-        self.charList = newCharList
-        CharSet.instanceCount += 1
-        self.charsetID = CharSet.instanceCount  # unique ID
+    # Supplementary Private Use Area-A, which is unlikely to be in words.
+    FIRST_SENTINEL = 0xF0000
+
+    def __init__(self, charSets):
+        """:param charSets: lists of similar characters or sequences"""
+        # Keys are first characters of set members, values are lists of
+        # tuples (member, sentinel), in the order of the sets.
+        self.membersOfFirstChar = {}
+        for charset_i, charset in enumerate(charSets):
+            sentinel = chr(self.FIRST_SENTINEL + charset_i)
+            for member in charset:
+                if member:
+                    self.membersOfFirstChar.setdefault(member[0], []).append(
+                        (member, sentinel))
+
+    def getPatterns(self, text):
+        """Returns a list of pattern strings."""
+        patterns = []
+        for char_i, char in enumerate(text):
+            members = self.membersOfFirstChar.get(char)
+            if not members:
+                continue
+            for member, sentinel in members:
+                if len(member) == 1:
+                    patterns.append(
+                        text[:char_i] + sentinel + text[char_i + 1:])
+                elif text.startswith(member, char_i):
+                    patterns.append(
+                        text[:char_i] + sentinel +
+                        text[char_i + len(member):])
+        return patterns
@@ -3,17 +3,23 @@ Make Word List in Calc.
 
 This module exports:
     WordList
+    WordCounter
+    harvestFileInWorker()
 """
+import concurrent.futures
+import copy
 import logging
 import re
 import unicodedata
 
+from grantjenks.tribool import Tribool
+
 from lingt.access.calc.spreadsheet_reader import CalcFileReader
 from lingt.access.calc.wordlist_io import WordlistIO
 from lingt.access.text.sfm_reader import SFM_Reader
 from lingt.access.writer.textsearch import TextSearchSettings
 from lingt.access.writer.doc_reader import DocReader
-from lingt.access.writer.uservars import Prefix, UserVars
+from lingt.access.writer.uservars import InterlinTags, Prefix, UserVars
 from lingt.access.xml.interlin_reader import InterlinReader
 from lingt.access.xml.phon_reader import PhonReader
 from lingt.access.xml.words_reader import WordsReader
@@ -23,11 +29,20 @@ from lingt.app.data import lingex_structs
 from lingt.app.data.wordlist_structs import WordInList, ColumnOrder
 from lingt.ui.common.messagebox import MessageBox
 from lingt.ui.common.progressbar import ProgressBar, ProgressRange
+from lingt.utils import procpool
 from lingt.utils import util
 
 logger = logging.getLogger("lingt.app.wordlist")
 
+WHITESPACE = re.compile(r'\s+')
+
 class WordList:
+    # File types that can be read without UNO, so they can be harvested in
+    # worker processes.  Toolbox interlinear files are not included
+    # because when no words are found, a message is displayed that needs
+    # user variables.
+    WORKER_FILETYPES = (
+        'spellingStatus', 'sfm', 'flextext', 'lift', 'tbxphn', 'paxml')
 
     def __init__(self, writerUnoObjs, fileItems, columnOrder, userVars):
         self.unoObjs = writerUnoObjs
@@ -43,22 +58,29 @@ class WordList:
         If outputToCalc is True, then output a word list in Calc.
         """
         logger.debug(util.funcName('begin'))
-        all_words_read = []
+        splitByWhitespace = True
+        if len(self.fileItems) > 0:
+            splitByWhitespace = self.fileItems[0].splitByWhitespace
+        wordCounter = WordCounter(punctToRemove, splitByWhitespace, normForm)
         self.progressBar = ProgressBar(self.unoObjs, "Reading...")
         self.progressBar.show()
         self.progressBar.updateBeginning()
         progressRange = ProgressRange(
             ops=len(self.fileItems), pbar=self.progressBar)
         try:
-            for fileItemIndex, fileItem in enumerate(self.fileItems):
-                try:
-                    new_words = self._harvestWords(fileItem)
-                    all_words_read.extend(new_words)
-                    logger.debug("Word count: %d", len(all_words_read))
-                except (exceptions.DataNotFoundError,
-                        exceptions.FileAccessError) as exc:
-                    self.msgbox.displayExc(exc)
-                progressRange.update(fileItemIndex)
+            pool = None
+            numWorkerFiles = len([
+                fileItem for fileItem in self.fileItems
+                if fileItem.filetype in self.WORKER_FILETYPES])
+            if numWorkerFiles > 1:
+                pool = procpool.getProcessPool(numWorkerFiles)
+            if pool:
+                with pool:
+                    self._harvestInParallel(pool, wordCounter, progressRange)
+            else:
+                for fileItemIndex, fileItem in enumerate(self.fileItems):
+                    self._countWords(fileItem, wordCounter)
+                    progressRange.update(fileItemIndex)
             self.progressBar.updateFinishing()
         finally:
             self.progressBar.close()
@@ -66,12 +88,7 @@ class WordList:
         self.progressBar.show()
         self.progressBar.updateBeginning()
         try:
-            splitByWhitespace = True
-            if len(self.fileItems) > 0:
-                splitByWhitespace = self.fileItems[0].splitByWhitespace
-            self.words = organizeList(
-                all_words_read, punctToRemove, splitByWhitespace, normForm,
-                self.progressBar)
+            self.words = wordCounter.getSortedWords()
             self.progressBar.updateFinishing()
         finally:
             self.progressBar.close()
@@ -91,6 +108,101 @@ class WordList:
         else:
             self.msgbox.display("Did not find any words for the list.")
 
+    def _countWords(self, fileItem, wordCounter):
+        """Harvest words from the file and add them to wordCounter.
+        Problems reading the file are displayed rather than raised.
+        """
+        try:
+            for word_read in self._harvestWords(fileItem):
+                wordCounter.add(
+                    word_read.text, word_read.source,
+                    word_read.isCorrect, word_read.correction)
+            logger.debug(
+                "Unique word count: %d", len(wordCounter.uniqueWords))
+        except (exceptions.DataNotFoundError,
+                exceptions.FileAccessError) as exc:
+            self.msgbox.displayExc(exc)
+
+    def _harvestInParallel(self, pool, wordCounter, progressRange):
+        """Harvest files that do not need UNO in worker processes,
+        while files that need UNO are read in this process.
+        Results are merged in list order so that the results are the same
+        as reading the files one after another.
+        """
+        counterArgs = (
+            wordCounter.punctToRemove, wordCounter.splitByWhitespace,
+            wordCounter.normForm)
+        futures = {}
+        for fileItemIndex, fileItem in enumerate(self.fileItems):
+            if fileItem.filetype in self.WORKER_FILETYPES:
+                try:
+                    futures[fileItemIndex] = pool.submit(
+                        harvestFileInWorker, self._workerFileItem(fileItem),
+                        self._workerSettings(fileItem), counterArgs)
+                except (concurrent.futures.BrokenExecutor,
+                        RuntimeError) as exc:
+                    logger.warning("Could not start worker: %s", exc)
+        fileCounters = {}
+        for fileItemIndex, fileItem in enumerate(self.fileItems):
+            if fileItemIndex not in futures:
+                fileCounters[fileItemIndex] = WordCounter(*counterArgs)
+                self._countWords(fileItem, fileCounters[fileItemIndex])
+        for fileItemIndex, fileItem in enumerate(self.fileItems):
+            if fileItemIndex in futures:
+                try:
+                    wordCounter.merge(futures[fileItemIndex].result())
+                except (exceptions.DataNotFoundError,
+                        exceptions.FileAccessError,
+                        exceptions.LogicError) as exc:
+                    self.msgbox.displayExc(exc)
+                except Exception as exc:
+                    # For example BrokenProcessPool if the worker python
+                    # cannot import uno.  Read the file here instead.
+                    logger.warning(
+                        "Worker failed to read %s: %s", fileItem.filepath,
+                        exc)
+                    self._countWords(fileItem, wordCounter)
+            else:
+                wordCounter.merge(fileCounters.pop(fileItemIndex).uniqueWords)
+            logger.debug(
+                "Unique word count: %d", len(wordCounter.uniqueWords))
+            progressRange.update(fileItemIndex)
+
+    @staticmethod
+    def _workerFileItem(fileItem):
+        """Returns a copy of the file item that does not refer to
+        user variables, so that it can be sent to a worker process.
+        """
+        workerItem = copy.copy(fileItem)
+        workerItem.userVars = None
+        workerItem.thingsToGrab = []
+        for whatToGrab in fileItem.thingsToGrab:
+            workerGrab = copy.copy(whatToGrab)
+            workerGrab.userVars = None
+            workerItem.thingsToGrab.append(workerGrab)
+        return workerItem
+
+    def _workerSettings(self, fileItem):
+        """Returns a tuple of reader config, field tags and whether
+        experimental transcriptions are phonemic, for settings that are
+        read from user variables.
+        """
+        fileType = fileItem.filetype
+        if fileType in InterlinReader.supportedNames():
+            config = copy.copy(self._interlinConfig(fileItem))
+            config.userVars = None
+            lingExFileItem = fileitemlist.LingExFileItem(None)
+            lingExFileItem.filepath = fileItem.filepath
+            config.fileList = [lingExFileItem]
+            return (
+                config, InterlinTags(self.userVars).loadUserVars(), False)
+        if fileType in PhonReader.supportedNames():
+            config = self._phonConfig(fileItem)
+            reader = PhonReader(self.unoObjs, self.userVars, config)
+            config.userVars = None
+            return config, reader.fieldTags, reader.experTransPhonemic
+        return None, {}, False
+
     def _harvestWords(self, fileItem):
         """Harvest words from the specified file."""
         fileType = fileItem.filetype  # short variable name
@@ -103,23 +215,11 @@ class WordList:
             reader = SFM_Reader(fileItem, self.unoObjs)
             words = reader.read()
         elif fileType in InterlinReader.supportedNames():
-            config = fileitemlist.InterlinInputSettings(self.userVars)
-            config.showMorphText2 = True
-            config.separateMorphColumns = True
-            lingExFileItem = fileitemlist.LingExFileItem(self.userVars)
-            lingExFileItem.filepath = fileItem.filepath
-            config.fileList.addItem(lingExFileItem)
+            config = self._interlinConfig(fileItem)
             reader = InterlinReader(self.unoObjs, self.userVars, config)
             words = reader.grabWords(fileItem.thingsToGrab)
         elif fileType in PhonReader.supportedNames():
-            config = lingex_structs.PhonInputSettings(self.userVars)
-            config.filepath = fileItem.filepath
-            config.phoneticWS = fileItem.writingSystem
-            config.isLexemePhonetic = True
-            phonUserVars = UserVars(
-                Prefix.PHONOLOGY, self.unoObjs.document, logger)
-            if phonUserVars.get("FlexLexeme") == 'phonemic':
-                config.isLexemePhonetic = False
+            config = self._phonConfig(fileItem)
             reader = PhonReader(self.unoObjs, self.userVars, config)
             words = reader.grabWords(fileItem.thingsToGrab)
         elif fileType in DocReader.supportedNames():
@@ -133,6 +233,26 @@ class WordList:
             words = reader.read()
         return words
 
+    def _interlinConfig(self, fileItem):
+        config = fileitemlist.InterlinInputSettings(self.userVars)
+        config.showMorphText2 = True
+        config.separateMorphColumns = True
+        lingExFileItem = fileitemlist.LingExFileItem(self.userVars)
+        lingExFileItem.filepath = fileItem.filepath
+        config.fileList.addItem(lingExFileItem)
+        return config
+
+    def _phonConfig(self, fileItem):
+        config = lingex_structs.PhonInputSettings(self.userVars)
+        config.filepath = fileItem.filepath
+        config.phoneticWS = fileItem.writingSystem
+        config.isLexemePhonetic = True
+        phonUserVars = UserVars(
+            Prefix.PHONOLOGY, self.unoObjs.document, logger)
+        if phonUserVars.get("FlexLexeme") == 'phonemic':
+            config.isLexemePhonetic = False
+        return config
+
 
     def _generateCalcList(self):
         """Generate list in calc."""
@@ -160,68 +280,122 @@ class WordList:
         msgbox.display("Made list of %d words.", len(self.words))
 
 
-def organizeList(wordList, punctToRemove, splitByWhitespace, normForm,
-                 progressBar):
-    """All types of words are likely to be harvested.
-    Clean up and organize the list.
+class WordCounter:
+    """Clean up and group words as they are harvested.
+    Only one WordInList is created for each unique word, rather than one
+    for each occurrence, because all types of words are likely to be
+    harvested, and there may be millions of them.
     """
-    # split by whitespace
-    for word_read in wordList[:]:   # iterate over a copy
-        text = word_read.text
+    # Forget cleaned forms if there are more than this many, to limit
+    # memory use.
+    MAX_CLEANED = 100000
+
+    def __init__(self, punctToRemove, splitByWhitespace, normForm):
+        self.punctToRemove = re.sub(r"\s+", "", punctToRemove)
+        logger.debug("punctToRemove %r", self.punctToRemove)
+        self.splitByWhitespace = splitByWhitespace
+        self.normForm = normForm
+        self.uniqueWords = {}  # keys are text, values are WordInList
+        # Keys are text as read, values are text without outer punctuation
+        # and normalized.  Most words occur many times.
+        self.cleanedTexts = {}
+
+    def add(self, text, source, isCorrect, correction):
+        """Add text read from a source such as a file.
+        The text may contain several words.
+        """
+        for part in self.splitText(text):
+            cleanText = self.cleanedTexts.get(part)
+            if cleanText is None:
+                if len(self.cleanedTexts) >= self.MAX_CLEANED:
+                    self.cleanedTexts = {}
+                cleanText = self.cleanText(part)
+                self.cleanedTexts[part] = cleanText
+            if not cleanText:
+                continue
+            word = self.uniqueWords.get(cleanText)
+            if word is None:
+                word = WordInList()
+                word.text = cleanText
+                word.isCorrect = isCorrect
+                word.correction = correction
+                self.uniqueWords[cleanText] = word
+            word.occurrences += 1
+            word.sources[source] = word.sources.get(source, 0) + 1
+
+    def merge(self, uniqueWords):
+        """Add words that were counted separately, for example by a worker
+        process.  Words that were already counted keep their spelling
+        status.
+        """
+        for text, otherWord in uniqueWords.items():
+            word = self.uniqueWords.get(text)
+            if word is None:
+                # Values from worker processes are plain True, False or None.
+                otherWord.isCorrect = Tribool(otherWord.isCorrect)
+                self.uniqueWords[text] = otherWord
+                continue
+            word.occurrences += otherWord.occurrences
+            for source, count in otherWord.sources.items():
+                word.sources[source] = word.sources.get(source, 0) + count
+
+    def splitText(self, text):
+        """Returns a list of parts separated by whitespace."""
         text = text.strip()
-        if re.search(r'\s', text):
-            text_parts = re.split(r'\s+', text)
-            if not splitByWhitespace:
-                text_parts = [" ".join(text_parts)]
-            for i, part in enumerate(text_parts):
-                if i == 0:
-                    word_read.text = part
-                else:
-                    newWord = WordInList()
-                    newWord.text = part
-                    newWord.source = word_read.source
-                    newWord.isCorrect = word_read.isCorrect
-                    newWord.correction = word_read.correction
-                    wordList.append(newWord)
-    logger.debug("Word count: %d", len(wordList))
-    progressBar.updatePercent(40)
-
-    # remove outer punctuation and normalize
-    punctToRemove = re.sub(r"\s+", "", punctToRemove)
-    logger.debug("punctToRemove %r", punctToRemove)
-    for word_read in wordList:
-        word_read.text = word_read.text.strip()  # remove whitespace
-        word_read.text = word_read.text.strip(punctToRemove)
-        if normForm != 'None':
-            word_read.text = unicodedata.normalize(normForm, word_read.text)
-        #logger.debug("text is now '%s'", word_read.text)
-    progressBar.updatePercent(60)
-
-    # group equal words
-    unique_words = {}
-    for word_read in wordList:
-        text = word_read.text
-        if not text:
-            continue
-        if text in unique_words:
-            word = unique_words[text]
-        else:
-            word = WordInList()
-            word.text = text
-            word.isCorrect = word_read.isCorrect
-            word.correction = word_read.correction
-            unique_words[text] = word
-        word.occurrences += 1
-        if word_read.source in word.sources:
-            word.sources[word_read.source] += 1
-        else:
-            word.sources[word_read.source] = 1
-    logger.debug("Word count: %d", len(unique_words))
-
-    # sort
-    progressBar.updatePercent(80)
-    sorted_words = []
-    for text in sorted(unique_words):
-        sorted_words.append(unique_words[text])
-    logger.debug("Word count: %d", len(sorted_words))
-    return sorted_words
+        if not WHITESPACE.search(text):
+            return [text]
+        text_parts = WHITESPACE.split(text)
+        if not self.splitByWhitespace:
+            return [" ".join(text_parts)]
+        return text_parts
+
+    def cleanText(self, text):
+        """Remove outer punctuation and normalize."""
+        text = text.strip().strip(self.punctToRemove)
+        if self.normForm != 'None':
+            text = unicodedata.normalize(self.normForm, text)
+        return text
+
+    def getSortedWords(self):
+        sorted_words = [
+            self.uniqueWords[text] for text in sorted(self.uniqueWords)]
+        logger.debug("Word count: %d", len(sorted_words))
+        return sorted_words
+
+
+
+def harvestFileInWorker(fileItem, readerSettings, counterArgs):
+    """Called in a worker process.
+    Returns the words of the file counted by WordCounter, keyed by text.
+
+    :param fileItem: WordListFileItem that does not refer to user variables
+    :param readerSettings: tuple from WordList._workerSettings()
+    :param counterArgs: tuple of arguments to create a WordCounter
+    """
+    config, fieldTags, experTransPhonemic = readerSettings
+    fileType = fileItem.filetype
+    if fileType in WordsReader.supportedNames():
+        words = WordsReader(fileItem, None).read()
+    elif fileType in SFM_Reader.supportedNames():
+        words = SFM_Reader(fileItem, None).read()
+    elif fileType in InterlinReader.supportedNames():
+        reader = InterlinReader(None, None, config)
+        reader.fieldTags = fieldTags
+        words = reader.grabWords(fileItem.thingsToGrab)
+    elif fileType in PhonReader.supportedNames():
+        reader = PhonReader(None, None, config)
+        reader.fieldTags = fieldTags
+        reader.experTransPhonemic = experTransPhonemic
+        words = reader.grabWords(fileItem.thingsToGrab)
+    else:
+        raise exceptions.LogicError("Unexpected file type %s", fileType)
+    wordCounter = WordCounter(*counterArgs)
+    for word_read in words:
+        wordCounter.add(
+            word_read.text, word_read.source, word_read.isCorrect,
+            word_read.correction)
+    for word in wordCounter.uniqueWords.values():
+        # Tribool objects cannot be sent between processes, because
+        # unpickling would change the value of a shared Tribool instance.
+        word.isCorrect = word.isCorrect.value
+    return wordCounter.uniqueWords
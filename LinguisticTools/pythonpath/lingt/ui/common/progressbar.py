@@ -3,6 +3,7 @@ Display a progress bar to the user.
 
 This module exports:
     ProgressBar
+    NullProgressBar
     ProgressRange
     ProgressRanges
 """
@@ -14,20 +15,24 @@ from lingt.utils.locale import theLocale
 
 logger = logging.getLogger("lingt.ui.progressbar")
 
-
-def snooze():
-    """Wait a short time so the user can see the bar."""
-    time.sleep(0.1)
-
-
 class ProgressBar:
+    """Shows progress in the status bar of a document window.
+    Each update is a call to Office that also repaints the bar,
+    so values are only sent if enough time has passed since the last one.
+    A value that is held back is sent by the next update after that time,
+    or by flush().
+    """
     MAXVAL = 100
+    MIN_INTERVAL = 0.05  # seconds between updates of the displayed bar
+
     def __init__(self, genericUnoObjs, title):
         self.unoObjs = genericUnoObjs
         theLocale.loadUnoObjs(genericUnoObjs)
         self.titleText = theLocale.getText(title)
         self.progress = None
         self.val = 0   # needed because self.progress.Value is write-only
+        self.lastUpdateTime = 0.0
+        self.pendingVal = None  # value that has not been displayed yet
 
     def show(self):
         logger.debug(util.funcName('begin'))
@@ -36,22 +41,41 @@ class ProgressBar:
         logger.debug("ProgressBar show() Finished")
 
     def updateBeginning(self):
-        """Sets to 10% and waits a short time so the user can see it."""
-        self.val = 10
-        self.progress.setValue(self.val)
-        snooze()
+        """Sets to 10%."""
+        self.setValue(10, force=True)
 
     def updateFinishing(self):
         """Sets to 100%."""
-        self.val = self.MAXVAL
-        self.progress.setValue(self.val)
-        snooze()
+        self.setValue(self.MAXVAL, force=True)
 
     def updatePercent(self, percent):
         """Set the percentage finished.  Maximum value is 100."""
         logger.debug("ProgressBar updatePercent %d", percent)
-        self.val = percent
-        self.progress.setValue(self.val)
+        self.setValue(percent)
+
+    def setValue(self, val, force=False):
+        """:param force: true to display the value even if the bar was
+                         updated very recently
+        """
+        self.val = val
+        now = time.monotonic()
+        if force or now - self.lastUpdateTime >= self.MIN_INTERVAL:
+            self._display(val, now)
+        else:
+            self.pendingVal = val
+
+    def flush(self):
+        """Display the latest value if it was held back.
+        Call this before a step that takes a long time, so that the bar
+        does not stay at an older value during the step.
+        """
+        if self.pendingVal is not None:
+            self._display(self.pendingVal, time.monotonic())
+
+    def _display(self, val, now):
+        self.progress.setValue(val)
+        self.lastUpdateTime = now
+        self.pendingVal = None
 
     def getPercent(self):
         return self.val
@@ -64,6 +88,29 @@ class ProgressBar:
         self.progress.end()
 
 
+class NullProgressBar(ProgressBar):
+    """Keeps track of progress without displaying anything,
+    for example when reading files in a worker process or in tests.
+    """
+    def __init__(self):
+        # pylint: disable=super-init-not-called
+        self.unoObjs = None
+        self.titleText = ""
+        self.progress = None
+        self.val = 0
+        self.lastUpdateTime = 0.0
+        self.pendingVal = None
+
+    def show(self):
+        pass
+
+    def setValue(self, val, force=False):
+        self.val = val
+
+    def close(self):
+        pass
+
+
 class ProgressRange:
     """
     Calculates a range of percentages for a progress bar.
@@ -77,6 +124,8 @@ class ProgressRange:
         self.startPercent = start
         self.stopPercent = stop
         self.totalOperations = ops
+        if pbar is None:
+            pbar = NullProgressBar()
         self.progressBar = pbar
         self.prevPct = 0
         # Split up each operation into several smaller parts.
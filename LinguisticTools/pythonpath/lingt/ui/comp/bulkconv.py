@@ -52,24 +52,29 @@ class DlgBulkConversion:
             return
         ctrl_getter = dutil.ControlGetter(dlg)
         app = BulkConversion(self.unoObjs)
-        self.step1Form = FormStep1(ctrl_getter, app)
-        self.step1Form.start_working()
-        self.step2Form = FormStep2(ctrl_getter, app)
-        self.step2Form.start_working()
-        stepper = DlgStepper(dlg)
-        advancer = AdvanceHandler(
-            ctrl_getter, stepper, self.step1Form, self.step2Form)
-        advancer.start_working()
-        closingButtons = ClosingButtons(ctrl_getter, dlg.endExecute)
-        closingButtons.start_working()
-
-        ## Display the dialog
-
-        dlg.execute()
-        if stepper.on_step1():
-            self.step1Form.store_results()
-        if stepper.on_step2():
-            self.step2Form.store_results()
+        # There may be hundreds of variables for style changes.
+        app.userVars.beginSnapshot()
+        try:
+            self.step1Form = FormStep1(ctrl_getter, app)
+            self.step1Form.start_working()
+            self.step2Form = FormStep2(ctrl_getter, app)
+            self.step2Form.start_working()
+            stepper = DlgStepper(dlg)
+            advancer = AdvanceHandler(
+                ctrl_getter, stepper, self.step1Form, self.step2Form)
+            advancer.start_working()
+            closingButtons = ClosingButtons(ctrl_getter, dlg.endExecute)
+            closingButtons.start_working()
+
+            ## Display the dialog
+
+            dlg.execute()
+            if stepper.on_step1():
+                self.step1Form.store_results()
+            if stepper.on_step2():
+                self.step2Form.store_results()
+        finally:
+            app.userVars.endSnapshot()
         if closingButtons.convertOnClose:
             try:
                 app.doConversions()
@@ -295,6 +295,9 @@ CASE_LOWER = [
         "\uA73D","\uA74F","\uA761","\uA769","\uA76B","\uA76D","\uA76F",
         "\uA78C","\uAB53","\uA7B5","\uA7B7"]
 
+# Lookups are much faster than searching CASE_CAPITALS.
+LOWER_OF_CAPITAL = dict(zip(CASE_CAPITALS, CASE_LOWER))
+
 # Blocks are either Standard ("Western"), Complex Text Layout (CTL),
 # or Chinese/Japanese/Korean (CJK also known as "Asian").
 # Punctuation can be used for all types so it does not determine the type,
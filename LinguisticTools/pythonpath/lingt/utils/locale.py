@@ -1171,6 +1171,12 @@ class Locale:
             'fr' :
             "%d exemple%s a été remplasé.",
         },
+        "Results taken from the cache: %d of %d." : {
+            'es' :
+            "Resultados tomados de la caché: %d de %d.",
+            'fr' :
+            "Résultats pris du cache : %d sur %d.",
+        },
         "Spell check finished." : {
             'es' :
             "Spell check finished.",
@@ -0,0 +1,69 @@
+"""
+Run pure python work such as parsing files in separate processes.
+
+Inside of Office, sys.executable is typically the soffice program rather
+than a python interpreter, so worker processes need to be started with
+a python executable that is found separately.
+Callers should be prepared for getProcessPool() to return None,
+in which case the work should be done in the current process instead.
+
+This module exports:
+    getProcessPool()
+    findPythonExecutable()
+"""
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+
+logger = logging.getLogger("lingt.utils.procpool")
+
+def findPythonExecutable():
+    """Returns the path of a python interpreter, or None if not found."""
+    executable = sys.executable or ""
+    if os.path.basename(executable).lower().startswith("python"):
+        return executable
+    if executable:
+        # Office on Windows and macOS includes python in its program folder.
+        for filename in ("python.exe", "python", "python3"):
+            filepath = os.path.join(os.path.dirname(executable), filename)
+            if os.path.isfile(filepath):
+                return filepath
+    for command in ("python3", "python"):
+        filepath = shutil.which(command)
+        if filepath:
+            return filepath
+    return None
+
+def getProcessPool(numTasks, minWorkers=2, initializer=None, initargs=()):
+    """Returns a concurrent.futures.ProcessPoolExecutor that the caller
+    should shut down when finished, for example by using a with statement.
+    Returns None if there is no reason to use more than one process or if
+    worker processes cannot be started.
+
+    :param numTasks: number of independent tasks that will be submitted
+    :param minWorkers: use 1 to get a pool even if there is only one
+                       processor, for example to keep work that may crash
+                       out of the Office process
+    :param initializer: called at the start of each worker process
+    """
+    maxWorkers = min(numTasks, os.cpu_count() or 1)
+    if maxWorkers < minWorkers:
+        return None
+    executable = findPythonExecutable()
+    if not executable:
+        logger.warning("Could not find python to start worker processes.")
+        return None
+    try:
+        mpContext = multiprocessing.get_context('spawn')
+        mpContext.set_executable(executable)
+        pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=maxWorkers, mp_context=mpContext,
+            initializer=initializer, initargs=initargs)
+    except (OSError, ValueError) as exc:
+        logger.warning("Could not start worker processes: %s", exc)
+        return None
+    logger.debug("Using %d worker processes.", maxWorkers)
+    return pool
@@ -0,0 +1,58 @@
+"""
+Compare writing rows to Calc in as few blocks as possible with
+the earlier approach of writing 25 rows per call.
+
+Office needs to be running and listening on a socket, as described in
+README_testing.txt.  Then run from the tests folder:
+    PYTHONPATH=../pythonpath python3 benchmarks/calc_output_benchmark.py
+"""
+import random
+import time
+
+from lingt.access.calc.spreadsheet_output import SpreadsheetOutput
+from lingt.utils import util
+
+NUM_ROWS = 60000
+WORD_CHARS = "abdegiklmnoprstuyāēīōūŋ"
+
+class ChunkedOutput(SpreadsheetOutput):
+    """How rows were written before they were written in blocks."""
+    CHUNK_SIZE = 25
+
+    def blockBounds(self, rows):
+        return [
+            (i1, min(i1 + self.CHUNK_SIZE, len(rows)))
+            for i1 in range(0, len(rows), self.CHUNK_SIZE)]
+
+def makeRows(rand, count):
+    """Rows like those of a word list."""
+    rows = []
+    for row_i in range(count):
+        word = "".join(
+            rand.choice(WORD_CHARS) for dummy in range(rand.randint(2, 10)))
+        rows.append((word, rand.randint(1, 500), "", "", "text%d.sfm" % (
+            row_i % 30)))
+    return rows
+
+def run_benchmark():
+    unoObjs = util.UnoObjs(
+        util.UnoObjs.getCtxFromSocket(), loadDocObjs=False)
+    rows = makeRows(random.Random(1), NUM_ROWS)
+    print("%d rows of %d columns" % (NUM_ROWS, len(rows[0])))
+    print("%-16s %8s %10s" % ("output", "calls", "write ms"))
+    timings = []
+    for outputClass in (ChunkedOutput, SpreadsheetOutput):
+        calcUnoObjs = SpreadsheetOutput(unoObjs).createSpreadsheet()
+        outputter = outputClass(calcUnoObjs)
+        calls = []
+        startTime = time.perf_counter()
+        outputter.outputRows('A', 1, rows, calls.append)
+        writeTime = time.perf_counter() - startTime
+        timings.append(writeTime)
+        calcUnoObjs.document.close(True)
+        print("%-16s %8d %10.1f" % (
+            outputClass.__name__, len(calls), writeTime * 1000))
+    print("speedup %.0fx" % (timings[0] / timings[1]))
+
+if __name__ == '__main__':
+    run_benchmark()
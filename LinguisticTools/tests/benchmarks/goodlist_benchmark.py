@@ -0,0 +1,80 @@
+"""
+Compare checking words against a spelling GoodList backed by a set
+with the earlier approach of searching a list.
+
+Office does not need to be running, but lingt.app.svc.spellingchecks
+imports uno, so use a python that can import uno, for example:
+    PYTHONPATH=../pythonpath python3 benchmarks/goodlist_benchmark.py
+"""
+import random
+import time
+
+from lingt.app.svc.spellingchecks import GoodList, normalize
+from lingt.utils import letters
+
+NUM_WORDS = 50000
+NUM_TOKENS = 20000
+WORD_CHARS = "abdegiklmnoprstuyāēīōūŋ"
+
+class ListGoodList(GoodList):
+    """How GoodList searched for words before it used sets."""
+
+    def loadInsensitiveList(self):
+        self.insensitiveSet = [self.firstLower(word) for word in self.wordList]
+
+    def firstLower(self, wordText):
+        if self.matchCase or not wordText:
+            return wordText
+        c = wordText[0]
+        if c in letters.CASE_CAPITALS:
+            i = letters.CASE_CAPITALS.index(c)
+            return letters.CASE_LOWER[i] + wordText[1:]
+        return wordText
+
+    def __contains__(self, word):
+        return normalize(self.normForm, word) in self.insensitiveSet
+
+def makeWords(rand, count):
+    words = set()
+    while len(words) < count:
+        words.add("".join(
+            rand.choice(WORD_CHARS) for dummy in range(rand.randint(2, 10))))
+    return list(words)
+
+def checkTokens(goodList, tokens):
+    """Like SpellingChecker.changeTextRange() for words without affixes."""
+    numSuspect = 0
+    for token in tokens:
+        wordLower = goodList.firstLower(token)
+        if wordLower not in goodList:
+            numSuspect += 1
+    return numSuspect
+
+def run_benchmark():
+    rand = random.Random(1)
+    words = makeWords(rand, NUM_WORDS)
+    # Most words in a document are correct, and many are repeated.
+    vocabulary = rand.sample(words, 3000) + makeWords(rand, 300)
+    tokens = [
+        word.capitalize() if rand.random() < 0.1 else word
+        for word in rand.choices(vocabulary, k=NUM_TOKENS)]
+    print("%d words in list, %d tokens" % (NUM_WORDS, NUM_TOKENS))
+    print("%-12s %10s %10s %8s" % (
+        "GoodList", "load ms", "check ms", "suspect"))
+    timings = []
+    for goodListClass in (ListGoodList, GoodList):
+        goodList = goodListClass(msgbox=None)
+        startTime = time.perf_counter()
+        goodList.setGoodList(words, False, 'NFD', "A")
+        loadTime = time.perf_counter() - startTime
+        startTime = time.perf_counter()
+        numSuspect = checkTokens(goodList, tokens)
+        checkTime = time.perf_counter() - startTime
+        timings.append(checkTime)
+        print("%-12s %10.1f %10.1f %8d" % (
+            goodListClass.__name__, loadTime * 1000, checkTime * 1000,
+            numSuspect))
+    print("speedup %.0fx" % (timings[0] / timings[1]))
+
+if __name__ == '__main__':
+    run_benchmark()
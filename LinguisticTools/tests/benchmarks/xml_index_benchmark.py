@@ -0,0 +1,56 @@
+"""
+Compare looking up fields of each record by repeated calls to
+getElementsByTagName() with looking them up in an xmlutil.ElementIndex.
+
+Office is not needed.  Run from the tests folder, for example:
+    PYTHONPATH=../pythonpath python3 benchmarks/xml_index_benchmark.py
+"""
+import os
+import timeit
+import xml.dom.minidom
+
+from lingt.access.xml import xmlutil
+
+DATAFILES_FOLDER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "datafiles")
+
+# Records and the fields that the readers look up in each of them.
+CASES = [
+    ("TbxIntHunt06.xml", "refGroup", ["ref", "ft", "tx", "tor"]),
+    ("TbxIntHunt06.xml", "mbGroup", ["mb", "mor", "ge", "ps"]),
+    ("TbxPhonCorpus.xml", "phtGroup", ["phm", "pht", "ge", "ref"]),
+    ("FWlexicon.lift", "entry", [
+        "lexical-unit", "citation", "pronunciation", "sense", "field"]),
+    ]
+REPEAT = 5
+NUMBER = 200
+
+def lookupRepeated(records, tagnames):
+    for record in records:
+        for tagname in tagnames:
+            xmlutil.getTextByTagName(record, tagname)
+
+def lookupIndexed(records, tagnames):
+    for record in records:
+        index = xmlutil.ElementIndex(record)
+        for tagname in tagnames:
+            index.getTextByTagName(tagname)
+
+def run_benchmark():
+    print("%-20s %-10s %12s %12s %8s" % (
+        "file", "record", "repeated ms", "indexed ms", "speedup"))
+    for filename, recordTag, tagnames in CASES:
+        dom = xml.dom.minidom.parse(os.path.join(DATAFILES_FOLDER, filename))
+        records = dom.getElementsByTagName(recordTag)
+        timings = []
+        for func in (lookupRepeated, lookupIndexed):
+            best = min(timeit.repeat(
+                lambda func=func: func(records, tagnames),
+                repeat=REPEAT, number=NUMBER))
+            timings.append(best / NUMBER * 1000)
+        print("%-20s %-10s %12.3f %12.3f %7.1fx" % (
+            filename, recordTag, timings[0], timings[1],
+            timings[0] / timings[1]))
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,111 @@
+"""
+Test storing and loading linguistic examples on disk.
+"""
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from lingt.access.common.example_cache import ExampleCache
+from lingt.access.writer.uservars import Prefix, UserVars
+from lingt.access.xml import interlin_reader
+from lingt.app.data.fileitemlist import InterlinInputSettings, LingExFileItem
+from lingt.utils import util
+
+from lingttest.utils import testutil
+
+logger = logging.getLogger("lingttest.example_cache_test")
+
+def getSuite():
+    suite = unittest.TestSuite()
+    for method_name in (
+            'testStoreAndLoad',
+            'testFileChanged',
+            'testSettingsChanged',
+            'testMaxEntries',
+        ):
+        suite.addTest(ExampleCacheTestCase(method_name))
+    return suite
+
+class ExampleCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.unoObjs = testutil.unoObjsForCurrentDoc()
+        self.userVars = UserVars(
+            Prefix.INTERLINEAR, self.unoObjs.document, logger)
+        self.tempDir = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.tempDir, "Sena Int.flextext")
+        shutil.copy(
+            os.path.join(util.TESTDATA_FOLDER, "Sena Int.flextext"),
+            self.filepath)
+        fileItem = LingExFileItem(self.userVars)
+        fileItem.filepath = self.filepath
+        self.config = InterlinInputSettings(None)
+        self.config.fileList = [fileItem]
+        self.cache = ExampleCache(os.path.join(self.tempDir, "cache"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def _readAndStore(self):
+        key = ExampleCache.interlinKey(self.config, self.userVars)
+        xmlReader = interlin_reader.InterlinReader(
+            self.unoObjs, self.userVars, self.config)
+        exampleDict = xmlReader.read()
+        self.cache.store(
+            key, exampleDict, xmlReader.getSuggestions(),
+            xmlReader.getDuplicateRefNumbers())
+        return key
+
+    def testStoreAndLoad(self):
+        key = ExampleCache.interlinKey(self.config, self.userVars)
+        self.assertIsNone(self.cache.load(key))
+        self._readAndStore()
+        exampleDict, suggestions, duplicate_refnums = self.cache.load(key)
+        self.assertIn("1.2", exampleDict)
+        interlinEx = exampleDict["1.2"]
+        self.assertEqual(interlinEx.freeTrans, "[1.2 ft]")
+        self.assertEqual(interlinEx.wordList[2].text1, "yathu")
+        self.assertEqual(suggestions, ["1.1"])
+        self.assertEqual(duplicate_refnums, set())
+
+    def testFileChanged(self):
+        key = self._readAndStore()
+        self.assertIsNotNone(self.cache.load(key))
+        with open(self.filepath, 'a') as outfile:
+            outfile.write("\n")
+        self.assertIsNone(self.cache.load(key))
+
+    def testSettingsChanged(self):
+        key = self._readAndStore()
+        self.config.fileList[0].prefix = "ABC"
+        newKey = ExampleCache.interlinKey(self.config, self.userVars)
+        self.assertNotEqual(key, newKey)
+        self.assertIsNone(self.cache.load(newKey))
+        self._readAndStore()
+        self.assertIsNotNone(self.cache.load(newKey))
+        self.assertIsNone(self.cache.load(key))
+        # The entry for the old settings was replaced.
+        self.assertEqual(len(os.listdir(self.cache.folder)), 1)
+
+    def testMaxEntries(self):
+        self.cache.MAX_ENTRIES = 2
+        keys = []
+        for fileNum in range(3):
+            filepath = os.path.join(self.tempDir, "file%d.txt" % fileNum)
+            with open(filepath, 'w') as outfile:
+                outfile.write("abc")
+            key = ('test', ((filepath,),))
+            self.cache.store(key, {"1": fileNum}, ["1"], set())
+            # Make sure each entry has a different time.
+            entryTime = fileNum * 10
+            os.utime(self.cache._entryPath(key), (entryTime, entryTime))
+            keys.append(key)
+        self.cache._prune()
+        self.assertEqual(len(os.listdir(self.cache.folder)), 2)
+        self.assertIsNone(self.cache.load(keys[0]))
+        self.assertEqual(self.cache.load(keys[2])[0], {"1": 2})
+
+if __name__ == '__main__':
+    testutil.run_suite(getSuite())
@@ -5,7 +5,10 @@ import os
 import logging
 import shutil
 import unittest
+from unittest import mock
+import zipfile
 
+from lingt.access.writer import doc_to_xml
 from lingt.access.xml import odt_converter
 from lingt.app.data.bulkconv_structs import ScopeType
 from lingt.app.svc.bulkconversion import UniqueStyles
@@ -17,10 +20,30 @@ logger = logging.getLogger("lingttest.odt_converter_test")
 
 REPLACED_VAL = "__REPLACED_VAL__"
 
+# Scope type, style to change, and expected number of changed values.
+WRITER_DATASETS = [
+    (ScopeType.PARASTYLE, "Heading 3", 1),
+    (ScopeType.PARASTYLE, "My Heading Style", 1),
+    (ScopeType.PARASTYLE, "Preformatted Text", 1),
+    (ScopeType.PARASTYLE, "My Preformatted Text", 1),
+    (ScopeType.CHARSTYLE, "Emphasis", 1),
+    (ScopeType.CHARSTYLE, "My Emphasis", 1),
+    (ScopeType.CHARSTYLE, "Source Text", 1),
+    (ScopeType.FONT_WITH_STYLE, "DejaVu Sans", 1),
+    (ScopeType.FONT_WITHOUT_STYLE, "DejaVu Sans", 1),
+    (ScopeType.FONT_WITH_STYLE, "Verdana", 0),
+    (ScopeType.FONT_WITHOUT_STYLE, "Verdana", 1),
+    (ScopeType.WHOLE_DOC, None, 9),
+    ]
+
 def getSuite():
     suite = unittest.TestSuite()
     suite.addTest(BulkReaderTestCase('testReader'))
     suite.addTest(BulkWriterTestCase('testWriter'))
+    for method_name in ('testReadAndCopy', 'testCopyFallback'):
+        suite.addTest(OdtZipTestCase(method_name))
+    for method_name in ('testFolder', 'testOdtFile'):
+        suite.addTest(StreamingTestCase(method_name))
     return suite
 
 class BulkReaderTestCase(unittest.TestCase):
@@ -65,21 +88,7 @@ class BulkWriterTestCase(unittest.TestCase):
             shutil.copy(os.path.join(srcdir, filename), self.outdir)
 
     def testWriter(self):
-        dataSets = [
-            (ScopeType.PARASTYLE, "Heading 3", 1),
-            (ScopeType.PARASTYLE, "My Heading Style", 1),
-            (ScopeType.PARASTYLE, "Preformatted Text", 1),
-            (ScopeType.PARASTYLE, "My Preformatted Text", 1),
-            (ScopeType.CHARSTYLE, "Emphasis", 1),
-            (ScopeType.CHARSTYLE, "My Emphasis", 1),
-            (ScopeType.CHARSTYLE, "Source Text", 1),
-            (ScopeType.FONT_WITH_STYLE, "DejaVu Sans", 1),
-            (ScopeType.FONT_WITHOUT_STYLE, "DejaVu Sans", 1),
-            (ScopeType.FONT_WITH_STYLE, "Verdana", 0),
-            (ScopeType.FONT_WITHOUT_STYLE, "Verdana", 1),
-            (ScopeType.WHOLE_DOC, None, 9),
-            ]
-        for dataSet in dataSets:
+        for dataSet in WRITER_DATASETS:
             self._do_dataset(dataSet)
 
     def _do_dataset(self, dataSet):
@@ -98,6 +107,138 @@ class BulkWriterTestCase(unittest.TestCase):
         debug_msg = ScopeType.TO_STRING[scopeType] + "/" + str(style_to_find)
         self.assertEqual(count, num_expected, msg=debug_msg)
 
+class OdtZipTestCase(unittest.TestCase):
+    """Read and write XML inside of the .odt file without unzipping it."""
+
+    def setUp(self):
+        self.unoObjs = testutil.unoObjsForCurrentDoc()
+        self.srcpath = os.path.join(
+            util.TESTDATA_FOLDER, "TestDataConversion.odt")
+        self.outpath = testutil.output_path("TestDataConversion_copy.odt")
+        if os.path.exists(self.outpath):
+            os.remove(self.outpath)
+
+    def testReadAndCopy(self):
+        scopeType = ScopeType.WHOLE_DOC
+        reader = odt_converter.OdtReader(None, scopeType, self.unoObjs)
+        reader.odtFilepath = self.srcpath
+        unique_styles = UniqueStyles(scopeType)
+        unique_styles.add(reader.read())
+        styleChanges = []
+        for item in unique_styles.get_values():
+            getStyleChange(item, styleChanges)
+        changer = odt_converter.OdtChanger(reader, styleChanges)
+        self.assertGreater(changer.makeChanges(), 0)
+        self.assertEqual(
+            sorted(changer.changedFiles), ['content.xml', 'styles.xml'])
+        with zipfile.ZipFile(self.outpath, 'x') as zipOut:
+            doc_to_xml.copy_odt(self.srcpath, zipOut, changer.changedFiles)
+
+        with zipfile.ZipFile(self.srcpath) as zipIn, zipfile.ZipFile(
+                self.outpath) as zipOut:
+            self.assertIsNone(zipOut.testzip())
+            outInfos = zipOut.infolist()
+            self.assertEqual(outInfos[0].filename, "mimetype")
+            self.assertEqual(outInfos[0].compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(
+                sorted(info.filename for info in outInfos),
+                sorted(zipIn.namelist()))
+            for info in outInfos:
+                if info.filename in changer.changedFiles:
+                    continue
+                self.assertEqual(
+                    info.CRC, zipIn.getinfo(info.filename).CRC,
+                    msg=info.filename)
+            self.assertIn(
+                REPLACED_VAL, zipOut.read('content.xml').decode('utf-8'))
+
+    def testCopyFallback(self):
+        """If the zipfile module changes so that the compressed data cannot
+        be copied directly, the files should still be copied.
+        """
+        with mock.patch.object(
+                doc_to_xml, 'RAW_COPY_ATTRS', ('fp', 'notAnAttribute')):
+            with zipfile.ZipFile(self.outpath, 'x') as zipOut:
+                self.assertFalse(doc_to_xml.can_copy_raw(zipOut, zipOut))
+                doc_to_xml.copy_odt(self.srcpath, zipOut, {})
+        with zipfile.ZipFile(self.srcpath) as zipIn, zipfile.ZipFile(
+                self.outpath) as zipOut:
+            self.assertIsNone(zipOut.testzip())
+            self.assertEqual(zipOut.namelist()[0], "mimetype")
+            for info in zipIn.infolist():
+                self.assertEqual(
+                    zipOut.read(info.filename), zipIn.read(info),
+                    msg=info.filename)
+
+class StreamingTestCase(unittest.TestCase):
+    """Reading and changing content.xml with the streaming parser should
+    give the same results as with minidom.
+    """
+    def setUp(self):
+        self.unoObjs = testutil.unoObjsForCurrentDoc()
+        self.srcdir = os.path.join(util.TESTDATA_FOLDER, "all_scope_types")
+
+    def testFolder(self):
+        for scopeType, style_to_find, dummy_num_expected in WRITER_DATASETS:
+            results = []
+            for streaming in (False, True):
+                outdir = testutil.output_path(
+                    "all_scope_types_stream" if streaming
+                    else "all_scope_types_dom")
+                if os.path.exists(outdir):
+                    shutil.rmtree(outdir)
+                os.makedirs(outdir)
+                for filename in ("content.xml", "styles.xml"):
+                    shutil.copy(os.path.join(self.srcdir, filename), outdir)
+                reader = self._make_reader(outdir, scopeType, streaming)
+                num_changes, dummy_changer = self._change(
+                    reader, scopeType, style_to_find)
+                filedata = []
+                for filename in ("content.xml", "styles.xml"):
+                    with open(os.path.join(outdir, filename), 'rb') as infile:
+                        filedata.append(infile.read())
+                results.append((num_changes, filedata))
+            debug_msg = (
+                ScopeType.TO_STRING[scopeType] + "/" + str(style_to_find))
+            self.assertEqual(results[0], results[1], msg=debug_msg)
+
+    def testOdtFile(self):
+        for filename in ("TestDataConversion.odt", "styles and fonts.odt",
+                         "search nested items.odt"):
+            srcpath = os.path.join(util.TESTDATA_FOLDER, filename)
+            for scopeType in (ScopeType.WHOLE_DOC, ScopeType.FONT_WITH_STYLE):
+                results = []
+                for streaming in (False, True):
+                    reader = self._make_reader(None, scopeType, streaming)
+                    reader.odtFilepath = srcpath
+                    num_changes, changer = self._change(
+                        reader, scopeType, None)
+                    results.append((num_changes, changer.changedFiles))
+                debug_msg = filename + "/" + ScopeType.TO_STRING[scopeType]
+                self.assertGreater(results[0][0], 0, msg=debug_msg)
+                self.assertEqual(results[0], results[1], msg=debug_msg)
+
+    def _make_reader(self, srcdir, scopeType, streaming):
+        reader = odt_converter.OdtReader(srcdir, scopeType, self.unoObjs)
+        if streaming:
+            reader.STREAMING_MIN_BYTES = 0
+        else:
+            reader.STREAMING_MIN_BYTES = float('inf')
+        return reader
+
+    def _change(self, reader, scopeType, style_to_find):
+        """Changes all styles if style_to_find is None."""
+        unique_styles = UniqueStyles(scopeType)
+        unique_styles.add(reader.read())
+        self.assertEqual(
+            reader.contentDom is None, reader.STREAMING_MIN_BYTES == 0)
+        styleChanges = []
+        for item in unique_styles.get_values():
+            if style_to_find is None or str(item) == style_to_find:
+                getStyleChange(item, styleChanges)
+        changer = odt_converter.OdtChanger(reader, styleChanges)
+        return changer.makeChanges(), changer
+
 def getStyleChanges(styleItems, style_to_find):
     styleChanges = []
     for item in styleItems:
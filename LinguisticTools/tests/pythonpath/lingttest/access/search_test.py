@@ -6,12 +6,14 @@ import os
 import unittest
 
 from lingt.access.writer.doc_reader import DocReader
-from lingt.access.writer.textsearch import TextSearch
+from lingt.access.writer.textsearch import (
+    SearchCondition, TextSearch, TextSearchSettings)
 from lingt.app.data import fileitemlist
 from lingt.ui.common.progressbar import ProgressBar
 from lingt.utils import util
 
 from lingttest.utils import testutil
+from lingttest.utils.testutil import PARAGRAPH_BREAK
 
 logger = logging.getLogger("lingttest.search_test")
 
@@ -20,6 +22,8 @@ def getSuite():
     for method_name in (
             'test1_selection',
             'test2_wholeDoc',
+            'test3_formattingChanges',
+            'test4_multipleScopes',
         ):
         suite.addTest(SearchTestCase(method_name))
     return suite
@@ -58,6 +62,56 @@ class SearchTestCase(unittest.TestCase):
         self.assertEqual(len(self.textSearch.getRanges()), 20)
         #self.displayRanges()  # uncomment for debugging
 
+    def test3_formattingChanges(self):
+        oText = self.unoObjs.text
+        oVC = self.unoObjs.viewcursor
+        oVC.gotoEnd(False)
+        oText.insertControlCharacter(oVC, PARAGRAPH_BREAK, 0)
+        oText.insertString(oVC, "abc def ghi", 0)
+        cursor = oText.createTextCursorByRange(oVC.getEnd())
+        cursor.goLeft(7, False)
+        cursor.goRight(3, True)
+        cursor.setPropertyValue("CharStyleName", "Emphasis")
+        oVC.goLeft(len("abc def ghi"), True)  # select
+        self.textSearch = TextSearch(self.unoObjs, self.progressBar)
+        self.textSearch.scopeSelection()
+        oVC.goRight(0, False)  # deselect
+        self.assertEqual(
+            [txtRange.sel.getString()
+             for txtRange in self.textSearch.getRanges()],
+            ["abc ", "def", " ghi"])
+
+    def test4_multipleScopes(self):
+        oText = self.unoObjs.text
+        oVC = self.unoObjs.viewcursor
+        oVC.gotoEnd(False)
+        oText.insertControlCharacter(oVC, PARAGRAPH_BREAK, 0)
+        oText.insertString(oVC, "abc def ghi", 0)
+        oVC.setPropertyValue("ParaStyleName", "Heading 9")
+        cursor = oText.createTextCursorByRange(oVC.getEnd())
+        cursor.goLeft(7, False)
+        cursor.goRight(3, True)
+        cursor.setPropertyValue("CharStyleName", "Emphasis")
+        conditions = []
+        for scopeType, style in (
+                (SearchCondition.PARASTYLE, "Heading 9"),
+                (SearchCondition.CHARSTYLE, "Emphasis")):
+            searchConfig = TextSearchSettings()
+            searchConfig.style = style
+            conditions.append(SearchCondition(scopeType, searchConfig))
+        self.textSearch = TextSearch(
+            self.unoObjs, self.progressBar, checkForFormatting=False)
+        rangeLists = self.textSearch.scopeMultiple(conditions)
+        self.assertEqual(len(rangeLists), 2)
+        paraStrings, charStrings = [
+            [txtRange.sel.getString() for txtRange in rangeList]
+            for rangeList in rangeLists]
+        self.assertIn("abc def ghi", paraStrings)
+        self.assertIn("def", charStrings)
+        self.assertEqual(
+            len(self.textSearch.getRanges()),
+            len(paraStrings) + len(charStrings))
+
     def displayRanges(self):
         """Show where each range is located in the document.
         Do not use for automated testing because it will add more ranges,
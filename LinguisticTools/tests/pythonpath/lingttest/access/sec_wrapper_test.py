@@ -0,0 +1,221 @@
+"""
+Test converting many strings at once with SEC_wrapper.convert_many(),
+remembering results with ConversionCache,
+and converting in helper processes with ConversionWorkers.
+
+Uses the stub library in tests/stub_ecdriver, which must be built first,
+so that SIL Converters does not need to be installed.
+"""
+import ctypes
+import logging
+import os
+import platform
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from lingt.access import sec_wrapper
+from lingt.access.sec_wrapper import (
+    ConversionCache, ConversionWorkers, ConverterSettings, SEC_wrapper,
+    setupConversionCache)
+from lingt.app.exceptions import FileAccessError
+from lingt.utils import util
+
+from lingttest.utils import testutil
+
+logger = logging.getLogger("lingttest.sec_wrapper_test")
+
+STUB_LIBRARY = os.path.join(
+    os.path.dirname(util.TESTDATA_FOLDER), "stub_ecdriver", "libecdriver.so")
+
+def getSuite():
+    suite = unittest.TestSuite()
+    for method_name in (
+            'testConvertMany',
+            'testSeparatorChanged',
+            'testLongStrings',
+            'testCache',
+            'testPersistentCache',
+            'testWorkers',
+        ):
+        suite.addTest(SecWrapperTestCase(method_name))
+    suite.addTest(CacheSetupTestCase('testTurnPersistenceOff'))
+    return suite
+
+@unittest.skipIf(
+    platform.system() == "Windows" or not os.path.exists(STUB_LIBRARY),
+    "Stub ECDriver library is not built.")
+class SecWrapperTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.library = ctypes.cdll.LoadLibrary(STUB_LIBRARY)
+        self.secCall = SEC_wrapper(None, None)
+        self.secCall.loadFunctions(self.library)
+        self.secCall.cache = ConversionCache()
+
+    def setConverter(self, convName, forward=True):
+        conv_settings = ConverterSettings(None)
+        conv_settings.convName = convName
+        conv_settings.forward = forward
+        self.secCall.setConverter(conv_settings)
+
+    def callCount(self):
+        return self.library.StubConvertStringCount()
+
+    def testConvertMany(self):
+        self.setConverter("capsTest.tec")
+        inputStrings = ["abc", "", "déf", "line1\nline2", "xyz"]
+        countBefore = self.callCount()
+        results = self.secCall.convert_many(inputStrings)
+        self.assertEqual(self.callCount() - countBefore, 1)
+        self.assertEqual(
+            results, ["ABC", "", "DéF", "LINE1\nLINE2", "XYZ"])
+        self.assertEqual(
+            results,
+            [self.secCall.convert(inputStr) for inputStr in inputStrings])
+        self.assertEqual(self.secCall.convert_many([]), [])
+
+        self.setConverter("capsTest.tec", forward=False)
+        self.assertEqual(self.secCall.convert_many(["AB", "Cd"]), ["ab", "cd"])
+
+    def testSeparatorChanged(self):
+        """The converter changes the separator, so each string
+        must be converted separately.
+        """
+        self.setConverter("Stub-NoControls")
+        inputStrings = ["abc", "def", "ghi"]
+        countBefore = self.callCount()
+        results = self.secCall.convert_many(inputStrings)
+        self.assertEqual(results, ["ABC", "DEF", "GHI"])
+        self.assertEqual(
+            self.callCount() - countBefore, 1 + len(inputStrings))
+
+    def testLongStrings(self):
+        """Results should not get truncated, and batches should be
+        split up.
+        """
+        self.setConverter("capsTest.tec")
+        longStr = "ab" * sec_wrapper.MIN_BUFFER_SIZE
+        self.assertEqual(self.secCall.convert(longStr), longStr.upper())
+        inputStrings = [
+            "%04d" % num + "x" * 1000
+            for num in range(sec_wrapper.BATCH_MAX_CHARS // 500)]
+        countBefore = self.callCount()
+        results = self.secCall.convert_many(inputStrings)
+        self.assertEqual(
+            results, [inputStr.upper() for inputStr in inputStrings])
+        self.assertGreater(self.callCount() - countBefore, 1)
+
+    def testCache(self):
+        self.setConverter("capsTest.tec")
+        inputStrings = ["ab", "cd", "ab", "ab"]
+        countBefore = self.callCount()
+        results = self.secCall.convert_many(inputStrings)
+        self.assertEqual(results, ["AB", "CD", "AB", "AB"])
+        self.assertEqual(self.callCount() - countBefore, 1)
+        self.assertEqual(self.secCall.cache.getStats(), (2, 2))
+
+        countBefore = self.callCount()
+        self.assertEqual(self.secCall.convert("cd"), "CD")
+        self.assertEqual(self.secCall.convert_many(inputStrings), results)
+        self.assertEqual(self.callCount(), countBefore)
+
+        # Different settings should not use the same results.
+        self.setConverter("capsTest.tec", forward=False)
+        self.assertEqual(self.secCall.convert("Ab"), "ab")
+        self.setConverter("capsTest.tec")
+        self.assertEqual(self.secCall.convert("Ab"), "AB")
+
+        cache = ConversionCache(maxEntries=2)
+        for sInput in ("a", "b", "c"):
+            cache.put(("conv", True, 0), sInput, sInput.upper())
+        self.assertIsNone(cache.get(("conv", True, 0), "a"))
+        self.assertEqual(cache.get(("conv", True, 0), "c"), "C")
+
+        # The converter may change between runs, for example by editing
+        # its map file.
+        cache.startRun()
+        self.assertEqual(cache.getStats(), (0, 0))
+        self.assertIsNone(cache.get(("conv", True, 0), "c"))
+
+    def testPersistentCache(self):
+        tempDir = tempfile.mkdtemp()
+        try:
+            self.secCall.cache.usePersistence(tempDir)
+            self.setConverter("capsTest.tec")
+            self.secCall.convert_many(["ab", "cd"])
+            self.secCall.cache.save()
+
+            self.secCall.cache = ConversionCache()
+            self.secCall.cache.usePersistence(tempDir)
+            countBefore = self.callCount()
+            self.assertEqual(
+                self.secCall.convert_many(["cd", "ab"]), ["CD", "AB"])
+            self.assertEqual(self.callCount(), countBefore)
+        finally:
+            shutil.rmtree(tempDir)
+
+    def testWorkers(self):
+        workers = ConversionWorkers(2, STUB_LIBRARY)
+        if not workers.start():
+            self.skipTest("Could not start helper processes.")
+        self.secCall.workers = workers
+        try:
+            self.setConverter("capsTest.tec")
+            inputStrings = ["word%d" % num for num in range(250)]
+            countBefore = self.callCount()
+            results = self.secCall.convert_many(inputStrings)
+            self.assertEqual(
+                results, [inputStr.upper() for inputStr in inputStrings])
+            # The calls were made in the helper processes.
+            self.assertEqual(self.callCount(), countBefore)
+
+            # A crashing converter should not stop this process.
+            self.setConverter("Stub-Crash")
+            with self.assertRaises(FileAccessError):
+                self.secCall.convert_many(["abc"])
+            self.assertIsNone(workers.pool)
+
+            # Helper processes should get started again.
+            self.setConverter("capsTest.tec")
+            self.assertEqual(self.secCall.convert_many(["def"]), ["DEF"])
+        finally:
+            workers.shutdown()
+
+
+class CacheSetupTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ConversionCache()
+        patcher = mock.patch.object(
+            sec_wrapper, 'theConversionCache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(
+            sec_wrapper, 'getCacheFolder', return_value="cacheFolder")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def testTurnPersistenceOff(self):
+        userVars = mock.Mock()
+        userVars.isEmpty.return_value = False
+        userVars.getInt.return_value = 1
+        setupConversionCache(None, userVars)
+        self.assertEqual(self.cache.persistFolder, "cacheFolder")
+
+        userVars.getInt.return_value = 0
+        setupConversionCache(None, userVars)
+        self.assertIsNone(self.cache.persistFolder)
+
+        userVars.getInt.return_value = 1
+        setupConversionCache(None, userVars)
+        self.assertEqual(self.cache.persistFolder, "cacheFolder")
+        userVars.isEmpty.return_value = True
+        userVars.getInt.return_value = 0
+        setupConversionCache(None, userVars)
+        self.assertIsNone(self.cache.persistFolder)
+        userVars.store.assert_called_once_with('PersistConversions', "0")
+
+if __name__ == '__main__':
+    testutil.run_suite(getSuite())
@@ -0,0 +1,80 @@
+"""
+Test writing rows to Calc in blocks and reading several columns at once.
+"""
+import logging
+import unittest
+
+from lingt.access.calc.spreadsheet_output import SpreadsheetOutput
+from lingt.access.calc.spreadsheet_reader import SpreadsheetReader
+
+from lingttest.utils import testutil
+
+logger = logging.getLogger("lingttest.spreadsheet_output_test")
+
+def getSuite():
+    suite = unittest.TestSuite()
+    for method_name in (
+            'testBlockBounds',
+            'testOutputRows',
+            'testReadColumns',
+        ):
+        suite.addTest(SpreadsheetOutputTestCase(method_name))
+    return suite
+
+class SpreadsheetOutputTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.calcUnoObjs = testutil.blankSpreadsheet()
+
+    def testBlockBounds(self):
+        outputter = SpreadsheetOutput(self.calcUnoObjs)
+        rows = [("abc", 1)] * 10
+        self.assertEqual(outputter.blockBounds(rows), [(0, 10)])
+        self.assertEqual(outputter.blockBounds([]), [(0, 0)])
+        # Each row counts as 2 values + 3 characters + 8 for the number.
+        outputter.BLOCK_CHARS = 13 * 4
+        self.assertEqual(
+            outputter.blockBounds(rows), [(0, 4), (4, 8), (8, 10)])
+        outputter.BLOCK_CHARS = 1
+        self.assertEqual(
+            outputter.blockBounds(rows[:3]), [(0, 1), (1, 2), (2, 3)])
+
+    def testOutputRows(self):
+        outputter = SpreadsheetOutput(self.calcUnoObjs)
+        outputter.BLOCK_CHARS = 100
+        rows = [("word%d" % row_i, row_i) for row_i in range(50)]
+        rowsDone = []
+        outputter.outputRows('B', 1, rows, rowsDone.append)
+        self.assertGreater(len(rowsDone), 1)
+        self.assertEqual(rowsDone[-1], len(rows))
+        oRange = self.calcUnoObjs.sheet.getCellRangeByName("A1:C51")
+        dataArray = oRange.getDataArray()
+        self.assertEqual(dataArray[0], ("", "", ""))
+        for row_i, row in enumerate(rows):
+            self.assertEqual(dataArray[row_i + 1], ("",) + row)
+
+        outputter.outputToColumn('A', ["x", "y"], skipFirstRow=False)
+        oRange = self.calcUnoObjs.sheet.getCellRangeByName("A1:A3")
+        self.assertEqual(
+            oRange.getDataArray(), (("x",), ("y",), ("",)))
+
+    def testReadColumns(self):
+        reader = SpreadsheetReader(self.calcUnoObjs)
+        self.assertEqual(reader.read_columns(['A', 'C'], True), [[], []])
+        outputter = SpreadsheetOutput(self.calcUnoObjs)
+        outputter.outputRows('A', 0, [
+            ("Word", "Other", "Count"),
+            ("a", "", 1),
+            ("b", "", 2),
+            ("", "", 3)])
+        self.assertEqual(
+            reader.read_columns(['C', 'A'], True),
+            [[1, 2, 3], ["a", "b", ""]])
+        self.assertEqual(
+            reader.read_columns(['A', 'B'], False),
+            [["Word", "a", "b"], ["Other", "", ""]])
+        self.assertEqual(reader.read_columns(['B'], True), [[]])
+        self.assertEqual(reader.getColumnStringList('A', True), ["a", "b"])
+
+if __name__ == '__main__':
+    testutil.run_suite(getSuite())
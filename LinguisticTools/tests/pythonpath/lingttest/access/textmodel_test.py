@@ -0,0 +1,112 @@
+import logging
+import re
+import unittest
+
+from lingt.access.writer.textmodel import DocTextModel
+from lingt.app import exceptions
+
+from lingttest.utils import testutil
+from lingttest.utils.testutil import PARAGRAPH_BREAK
+
+logger = logging.getLogger("lingttest.textmodel_test")
+
+def getSuite():
+    suite = unittest.TestSuite()
+    for method_name in (
+            'testLoad',
+            'testCompareFindAll',
+            'testApplyEdits',
+        ):
+        suite.addTest(TextModelTestCase(method_name))
+    return suite
+
+class TextModelTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.unoObjs = testutil.unoObjsForCurrentDoc()
+        testutil.blankWriterDoc(self.unoObjs)
+        oText = self.unoObjs.text
+        oVC = self.unoObjs.viewcursor
+        oText.insertString(oVC, "abc def ghi", 0)
+        oText.insertControlCharacter(oVC, PARAGRAPH_BREAK, 0)
+        oText.insertString(oVC, "def jkl", 0)
+        oVC.gotoStart(False)
+        oVC.goRight(len("abc "), False)
+        oVC.goRight(len("def"), True)
+        oVC.setPropertyValue("CharStyleName", "Emphasis")
+        oVC.goRight(0, False)  # deselect
+        self.textModel = DocTextModel(
+            self.unoObjs, attrNames=('CharStyleName', 'CharLocale'))
+        self.textModel.load()
+
+    def testLoad(self):
+        self.assertEqual(
+            [para.text for para in self.textModel.paragraphs],
+            ["abc def ghi", "def jkl"])
+        self.assertEqual(len(self.textModel.paragraphs[0].portions), 3)
+        self.assertEqual(self.textModel.count(re.compile(r"\bdef\b")), 2)
+        portion = self.textModel.paragraphs[0].portionAt(5)
+        self.assertEqual(portion.start, 4)
+        self.assertEqual(
+            self.textModel.getAttrs(portion)['CharStyleName'], "Emphasis")
+        self.assertEqual(
+            sorted(self.textModel.getAttrs(portion)),
+            ['CharLocale', 'CharStyleName'])
+
+    def testCompareFindAll(self):
+        """Counts should be the same as searching the document with
+        findAll(), which includes headers, and which finds words that are
+        interrupted by a bookmark.
+        """
+        document = self.unoObjs.document
+        pageStyles = document.getStyleFamilies().getByName("PageStyles")
+        oStyle = pageStyles.getByName(self.unoObjs.viewcursor.PageStyleName)
+        oStyle.HeaderIsOn = True
+        oStyle.HeaderText.setString("def in header")
+        oText = self.unoObjs.text
+        oCursor = oText.createTextCursor()
+        oCursor.gotoEnd(False)
+        oCursor.goLeft(len("f jkl"), False)
+        bookmark = document.createInstance("com.sun.star.text.Bookmark")
+        bookmark.setName("testMark")
+        oText.insertTextContent(oCursor, bookmark, False)
+        self.textModel.load()
+        for word in ("def", "jkl", "header", "abc def"):
+            search = document.createSearchDescriptor()
+            search.SearchString = word
+            search.SearchCaseSensitive = False
+            search.SearchWords = True
+            wordRegex = re.compile(
+                r"(?<!\w)" + re.escape(word) + r"(?!\w)", re.IGNORECASE)
+            self.assertEqual(
+                self.textModel.count(wordRegex),
+                document.findAll(search).getCount(), msg=word)
+        self.assertEqual(self.textModel.count(re.compile(r"\bdef\b")), 3)
+
+    def testApplyEdits(self):
+        edits = [
+            self.textModel.makeEdit(
+                paraIndex, match.start(), match.end(), "x")
+            for paraIndex, match in self.textModel.finditer(
+                re.compile(r"\bdef\b"))]
+        edits.append(self.textModel.makeEdit(0, 0, len("abc"), "yz"))
+        # overlaps the change to "def"
+        edits.append(self.textModel.makeEdit(0, 2, 5, "overlap"))
+        self.assertEqual(self.textModel.applyEdits(edits), 3)
+        self.textModel.load()
+        self.assertEqual(
+            [para.text for para in self.textModel.paragraphs],
+            ["yz x ghi", "x jkl"])
+        portion = self.textModel.paragraphs[0].portionAt(len("yz "))
+        self.assertEqual(
+            self.textModel.getAttrs(portion)['CharStyleName'], "Emphasis")
+        with self.assertRaises(exceptions.LogicError):
+            self.textModel.makeEdit(1, 2, 100, "x")
+
+    @classmethod
+    def tearDownClass(cls):
+        unoObjs = testutil.unoObjsForCurrentDoc()
+        testutil.blankWriterDoc(unoObjs)
+
+if __name__ == '__main__':
+    testutil.run_suite(getSuite())
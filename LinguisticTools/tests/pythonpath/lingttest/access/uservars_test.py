@@ -12,7 +12,8 @@ def getSuite():
     for method_name in (
             'testWriter',
             'testCalc',
-            'testDraw'):
+            'testDraw',
+            'testSnapshot'):
         suite.addTest(UserVarsTestCase(method_name))
     return suite
 
@@ -36,6 +37,45 @@ class UserVarsTestCase(unittest.TestCase):
         self.unoObjs = testutil.unoObjsForCurrentDrawing()
         self.testUserVars()
 
+    def testSnapshot(self):
+        testutil.blankWriterDoc()
+        self.unoObjs = testutil.unoObjsForCurrentDoc()
+        userVars = UserVars(
+            Prefix.TESTING, self.unoObjs.document, logger)
+        userVars.store("TestVar_1", "hamburger")
+        userVars.store("TestVar_2", "fries")
+        otherVars = UserVars(
+            Prefix.SPELLING, self.unoObjs.document, logger)
+        otherVars.store("TestVar_1", "other")
+
+        userVars.beginSnapshot()
+        self.assertEqual(userVars.get("TestVar_1"), "hamburger")
+        self.assertEqual(userVars.get("TestVar_3"), "")
+        self.assertEqual(userVars.getInt("TestVar_3"), 0)
+        userVars.store("TestVar_1", "pizza")
+        userVars.store("TestVar_3", 3)
+        self.assertTrue(userVars.delete("TestVar_2"))
+        self.assertFalse(userVars.delete("TestVar_4"))
+        self.assertEqual(userVars.get("TestVar_1"), "pizza")
+        self.assertEqual(userVars.getInt("TestVar_3"), 3)
+
+        # Not written to the document yet.
+        docVars = UserVars(
+            Prefix.TESTING, self.unoObjs.document, logger)
+        self.assertEqual(docVars.get("TestVar_1"), "hamburger")
+        self.assertEqual(docVars.get("TestVar_2"), "fries")
+        self.assertEqual(docVars.get("TestVar_3"), "")
+
+        userVars.endSnapshot()
+        self.assertEqual(docVars.get("TestVar_1"), "pizza")
+        self.assertEqual(docVars.get("TestVar_2"), "")
+        self.assertEqual(docVars.get("TestVar_3"), "3")
+        self.assertEqual(otherVars.get("TestVar_1"), "other")
+
+        # After the snapshot, changes are written immediately.
+        userVars.store("TestVar_1", "salad")
+        self.assertEqual(docVars.get("TestVar_1"), "salad")
+
     def testUserVars(self):
         userVars = UserVars(
             Prefix.TESTING, self.unoObjs.document, logger)
@@ -1,6 +1,9 @@
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
 import os
 import logging
 import unittest
+from unittest import mock
 
 from lingt.access.xml import interlin_reader
 from lingt.access.xml import phon_reader
@@ -24,7 +27,10 @@ def getSuite():
             'testTbx',
             'testTbxOrth',
             'testFw',
-            'testFlexText'):
+            'testFlexText',
+            'testStreaming',
+            'testParallel',
+            'testWorkerFails'):
         suite.addTest(InterlinTestCase(method_name))
     for method_name in (
             'testPhonFieldHelper',
@@ -282,6 +288,129 @@ class InterlinTestCase(unittest.TestCase):
         self.assertEqual(morph2.pos, "Poss:assocpx")
         self.assertEqual(morph2.text2, "")
 
+    def testStreaming(self):
+        """The streaming parser should read the same data as the DOM."""
+        for filename in (
+                "TbxIntHunt06.xml", "FWtextPigFox.xml", "Sena Int.flextext"):
+            for separateMorphColumns in (True, False):
+                results = []
+                for streamingMinBytes in (
+                        interlin_reader.InterlinReader.STREAMING_MIN_BYTES,
+                        0):
+                    fileItem = LingExFileItem(self.userVars)
+                    fileItem.filepath = os.path.join(
+                        util.TESTDATA_FOLDER, filename)
+                    fileItem.prefix = "ABC"
+                    config = InterlinInputSettings(None)
+                    config.fileList = [fileItem]
+                    config.separateMorphColumns = separateMorphColumns
+                    xmlReader = interlin_reader.InterlinReader(
+                        self.unoObjs, self.userVars, config)
+                    xmlReader.STREAMING_MIN_BYTES = streamingMinBytes
+                    exampleDict = xmlReader.read()
+                    results.append((
+                        {key: exampleAsTuple(interlinEx)
+                         for key, interlinEx in exampleDict.items()},
+                        xmlReader.getSuggestions(),
+                        xmlReader.getDuplicateRefNumbers()))
+                self.assertEqual(results[0], results[1], msg=filename)
+                self.assertIsNone(xmlReader.dom)
+
+    def testParallel(self):
+        """Parsing in worker processes should give the same results,
+        including duplicates across files.
+        """
+        results = []
+        for parallelParsing in (False, True):
+            config = InterlinInputSettings(None)
+            config.fileList = []
+            for filename in (
+                    "Sena Int.flextext", "FWtextPigFox.xml",
+                    "TbxIntHunt06.xml"):
+                fileItem = LingExFileItem(self.userVars)
+                fileItem.filepath = os.path.join(
+                    util.TESTDATA_FOLDER, filename)
+                config.fileList.append(fileItem)
+            config.parallelParsing = parallelParsing
+            xmlReader = interlin_reader.InterlinReader(
+                self.unoObjs, self.userVars, config)
+            exampleDict = xmlReader.read()
+            results.append((
+                [(key, exampleAsTuple(interlinEx))
+                 for key, interlinEx in exampleDict.items()],
+                xmlReader.getSuggestions(),
+                xmlReader.getDuplicateRefNumbers()))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[1][1], ["1.1", "2", "Hunt01"])
+        self.assertEqual(results[1][2], {"1.1", "1.2"})
+
+    def testWorkerFails(self):
+        """If a worker process fails, then the files it did not read should
+        be read in this process instead, giving the same results.
+        """
+        results = []
+        for pool in (None, BrokenPool(numWorking=0, brokenOnSubmit=True),
+                     BrokenPool(numWorking=0, brokenOnSubmit=False),
+                     BrokenPool(numWorking=1, brokenOnSubmit=False)):
+            config = InterlinInputSettings(None)
+            config.fileList = []
+            for filename in ("Sena Int.flextext", "TbxIntHunt06.xml"):
+                fileItem = LingExFileItem(self.userVars)
+                fileItem.filepath = os.path.join(
+                    util.TESTDATA_FOLDER, filename)
+                config.fileList.append(fileItem)
+            config.parallelParsing = pool is not None
+            xmlReader = interlin_reader.InterlinReader(
+                self.unoObjs, self.userVars, config)
+            with mock.patch.object(
+                    interlin_reader.procpool, 'getProcessPool',
+                    return_value=pool):
+                exampleDict = xmlReader.read()
+            results.append((
+                [(key, exampleAsTuple(interlinEx))
+                 for key, interlinEx in exampleDict.items()],
+                xmlReader.getSuggestions()))
+        for result in results[1:]:
+            self.assertEqual(result, results[0])
+
+
+class BrokenPool:
+    """Acts like a process pool whose workers could not import uno.
+    The first few tasks are run in this process and succeed.
+    """
+    def __init__(self, numWorking, brokenOnSubmit):
+        self.numWorking = numWorking
+        self.brokenOnSubmit = brokenOnSubmit
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *dummy_args):
+        return False
+
+    def submit(self, func, *args):
+        future = concurrent.futures.Future()
+        if self.numWorking > 0:
+            self.numWorking -= 1
+            future.set_result(func(*args))
+            return future
+        exc = BrokenProcessPool(
+            "A process in the process pool was terminated abruptly.")
+        if self.brokenOnSubmit:
+            raise exc
+        future.set_exception(exc)
+        return future
+
+def exampleAsTuple(interlinEx):
+    """Make the example comparable, for testing."""
+    return (
+        interlinEx.refText,
+        interlinEx.freeTrans,
+        [(word.text1, word.text2, word.gloss,
+          [(morph.text1, morph.text2, morph.gloss, morph.pos)
+           for morph in word.morphList])
+         for word in interlinEx.wordList])
+
 
 class TestHelpersTestCase(unittest.TestCase):
 
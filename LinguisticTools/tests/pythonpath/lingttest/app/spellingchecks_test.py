@@ -22,7 +22,11 @@ def getSuite():
         DlgSpellingReplace, methodName="makeDlg")
     testutil.modifyMsgboxDisplay()
     suite = unittest.TestSuite()
-    suite.addTest(SpellingChecksTestCase('testAffixesEN'))
+    for method_name in (
+            'testAffixesEN',
+            'testChangeAll',
+        ):
+        suite.addTest(SpellingChecksTestCase(method_name))
     return suite
 
 class SpellingChecksTestCase(unittest.TestCase):
@@ -69,6 +73,18 @@ class SpellingChecksTestCase(unittest.TestCase):
         wordListDoc.document.close(True)
         self.unoObjs.window.setFocus()  # so that getCurrentController() works
 
+    def testChangeAll(self):
+        testutil.blankWriterDoc(self.unoObjs)
+        self.set_writer_contents()
+        oText = self.unoObjs.text
+        oText.insertString(self.unoObjs.viewcursor, "JUMPED jumpeda", 0)
+        asker = spellingchecks.WordAsker(self.unoObjs, None)
+        self.assertEqual(asker.changeAll("jumped", "leaped"), 3)
+        docText = oText.getString()
+        self.assertNotIn("jumped", docText.lower())
+        self.assertEqual(docText.count("leaped"), 3)
+        self.assertIn("jumpeda", docText)
+
     def set_writer_contents(self):
         oText = self.unoObjs.text
         oVC = self.unoObjs.viewcursor
@@ -0,0 +1,115 @@
+import logging
+import random
+import unittest
+
+from lingt.app.data.wordlist_structs import WordInList
+from lingt.app.svc import spellingcomparisons
+from lingt.app.svc.spellingcomparisons import (
+    SimilarWordIndex, SpellingSuggestions)
+from lingt.ui.common.messagebox import MessageBox
+
+from lingttest.utils import testutil
+
+logger = logging.getLogger("lingttest.spellingcomparisons_test")
+
+def getSuite():
+    suite = unittest.TestSuite()
+    for method_name in (
+            'testEditDistance',
+            'testIndex',
+            'testSuggestions',
+            'testCompareAllWords',
+        ):
+        suite.addTest(SpellingSuggestionsTestCase(method_name))
+    return suite
+
+class SpellingSuggestionsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.unoObjs = testutil.unoObjsForCurrentDoc()
+        self.random = random.Random(5)
+
+    def randomWords(self, count):
+        letters = "abdeiklmnoprstuāé"
+        return list({
+            "".join(self.random.choice(letters)
+                    for dummy in range(self.random.randint(1, 10)))
+            for dummy in range(count)})
+
+    def testEditDistance(self):
+        words = self.randomWords(200)
+        for dummy in range(500):
+            text = self.random.choice(words)
+            other = self.random.choice(words)
+            self.assertEqual(
+                spellingcomparisons.editDistance(
+                    spellingcomparisons.makeCharMasks(text), len(text),
+                    other),
+                spellingcomparisons.levenshteinDistance(text, other),
+                msg=(text, other))
+
+    def testIndex(self):
+        """Results should be the same as comparing every word."""
+        words = self.randomWords(1000)
+        index = SimilarWordIndex()
+        for word in words:
+            index.add(word)
+        for word in words[:100]:
+            index.remove(word)
+        words = words[100:]
+        for dummy in range(100):
+            wordToFind = self.random.choice(words)
+            char_i = self.random.randrange(len(wordToFind))
+            wordToFind = (
+                wordToFind[:char_i] + "x" + wordToFind[char_i + 1:]).upper()
+            expected = [
+                word for word in words
+                if spellingcomparisons.levenshteinDistance(
+                    wordToFind, word) <= index.MAX_DISTANCE]
+            self.assertEqual(
+                sorted(index.findSimilar(wordToFind, len(words))),
+                sorted(expected), msg=wordToFind)
+            expected = [
+                word for word in words
+                if spellingcomparisons.subSuperString(wordToFind, word)]
+            self.assertEqual(
+                sorted(index.findSubSuperStrings(wordToFind, len(words))),
+                sorted(expected), msg=wordToFind)
+
+    def testSuggestions(self):
+        suggestions = SpellingSuggestions(MessageBox(self.unoObjs), limit=4)
+        suggestions.setList(
+            ["cat", "cart", "care", "dog", "Cast", "catalog", " "])
+        self.assertEqual(
+            suggestions.getSuggestions("cat"),
+            ["cat", "catalog", "cart", "Cast"])
+        suggestions.setList(["cart", "care", "dog"])
+        self.assertEqual(
+            suggestions.getSuggestions("cat"), ["cart", "care"])
+        suggestions.addWord("bat")
+        self.assertEqual(
+            suggestions.getSuggestions("cat"), ["bat", "cart", "care"])
+
+    def testCompareAllWords(self):
+        words = []
+        for text in ("pat", "bat", "bad", "pad", "kat", "kkat", "bat"):
+            word = WordInList()
+            word.text = text
+            words.append(word)
+        charSets = [["p", "b"], ["t", "d"], ["k", "kk"]]
+        numSimilar = spellingcomparisons.compareAllWords(words, charSets)
+        self.assertEqual(
+            [word.similarWords for word in words], [
+                ["bat", "bat", "pad"],
+                ["pat", "bad"],
+                ["pad", "bat", "bat"],
+                ["bad", "pat"],
+                ["kkat"],
+                ["kat"],
+                ["pat", "bad"],
+            ])
+        self.assertEqual(numSimilar, 14)
+
+
+if __name__ == '__main__':
+    testutil.run_suite(getSuite())
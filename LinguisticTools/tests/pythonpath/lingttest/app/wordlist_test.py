@@ -7,15 +7,20 @@ See also:
     lingttest.ui.wordlistfile_test
     lingttest.app.spellingchecks_test  # tests empty list
 """
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
 import logging
 import os
 import unittest
 
+from grantjenks.tribool import Tribool
+
 from lingt.access.calc.spreadsheet_reader import SpreadsheetReader
 from lingt.access.writer.uservars import Prefix, UserVars
-from lingt.app.data import fileitemlist
+from lingt.app.data import fileitemlist, lingex_structs
 from lingt.app.data.wordlist_structs import ColumnOrder, WhatToGrab
-from lingt.app.svc.wordlist import WordList
+from lingt.app.svc.wordlist import WordCounter, WordList, harvestFileInWorker
+from lingt.ui.common.progressbar import ProgressRange
 from lingt.utils import util
 
 from lingttest.utils import testutil
@@ -27,7 +32,16 @@ FILEPATH = os.path.join(util.TESTDATA_FOLDER, "styles and fonts.odt")
 def getSuite():
     testutil.modifyMsgboxDisplay()
     suite = unittest.TestSuite()
-    suite.addTest(WordListTestCase('test1_paragraphStyles'))
+    for method_name in (
+            'test1_paragraphStyles',
+            'test2_workerFails',
+        ):
+        suite.addTest(WordListTestCase(method_name))
+    for method_name in (
+            'testCounts',
+            'testMergeFromWorker',
+        ):
+        suite.addTest(WordCounterTestCase(method_name))
     return suite
 
 class WordListTestCase(unittest.TestCase):
@@ -75,12 +89,107 @@ class WordListTestCase(unittest.TestCase):
             for testString in notExpectedStrings:
                 self.assertNotIn(testString, stringList, msg=repr(styleNames))
 
+    def test2_workerFails(self):
+        """If a worker process cannot read a file, then the file should
+        be read in this process instead.
+        """
+        fileItemList = fileitemlist.FileItemList(
+            fileitemlist.WordListFileItem, self.userVars)
+        for dummy in range(2):
+            fileItem = fileitemlist.WordListFileItem(self.userVars)
+            fileItem.filetype = 'lift'
+            fileItem.filepath = os.path.join(
+                util.TESTDATA_FOLDER, "FWlexicon.lift")
+            whatToGrab = WhatToGrab(None)
+            whatToGrab.grabType = WhatToGrab.FIELD
+            whatToGrab.whichOne = 'gl'
+            fileItem.thingsToGrab.append(whatToGrab)
+            fileItemList.addItem(fileItem, allowDuplicates=True)
+        wordList = WordList(
+            self.unoObjs, fileItemList, ColumnOrder(self.userVars),
+            self.userVars)
+        for pool in (BrokenPool(brokenOnSubmit=False),
+                     BrokenPool(brokenOnSubmit=True)):
+            counter = WordCounter("", True, 'NFD')
+            wordList._harvestInParallel(pool, counter, ProgressRange(ops=2))
+            words = {word.text: word for word in counter.getSortedWords()}
+            self.assertEqual(sorted(words), ["father", "wife"])
+            self.assertEqual(words["wife"].occurrences, 2)
+
     @classmethod
     def tearDownClass(cls):
         unoObjs = util.UnoObjs(
             testutil.stored.getContext(), loadDocObjs=False)
         testutil.blankWriterDoc(unoObjs)
 
+class BrokenPool:
+    """Acts like a process pool whose workers could not import uno."""
+    def __init__(self, brokenOnSubmit):
+        self.brokenOnSubmit = brokenOnSubmit
+
+    def submit(self, *dummy_args):
+        exc = BrokenProcessPool(
+            "A process in the process pool was terminated abruptly.")
+        if self.brokenOnSubmit:
+            raise exc
+        future = concurrent.futures.Future()
+        future.set_exception(exc)
+        return future
+
+class WordCounterTestCase(unittest.TestCase):
+
+    def testCounts(self):
+        for splitByWhitespace, expected in (
+                (True, [("a", 2, {"f2": 2}),
+                        ("dog", 2, {"f1": 1, "f2": 1}),
+                        ("My", 1, {"f1": 1})]),
+                (False, [("a dog", 1, {"f2": 1}),
+                         ("a  dog", 0, {}),
+                         ("My dog", 1, {"f1": 1}),
+                         ("a", 1, {"f2": 1})])):
+            counter = WordCounter(". ?", splitByWhitespace, 'NFD')
+            for text, source in (
+                    (" My dog.", "f1"), ("a\tdog?", "f2"), ("..", "f1"),
+                    ("a", "f2")):
+                counter.add(text, source, Tribool('Indeterminate'), "")
+            words = {word.text: word for word in counter.getSortedWords()}
+            for text, occurrences, sources in expected:
+                if not occurrences:
+                    self.assertNotIn(text, words)
+                    continue
+                self.assertEqual(words[text].occurrences, occurrences)
+                self.assertEqual(words[text].sources, sources)
+            self.assertEqual(list(words), sorted(words))
+
+    def testMergeFromWorker(self):
+        """Call the worker function in this process, which should give the
+        same results as in a worker process.
+        """
+        filepath = os.path.join(util.TESTDATA_FOLDER, "FWlexicon.lift")
+        fileItem = fileitemlist.WordListFileItem(None)
+        fileItem.filetype = 'lift'
+        fileItem.filepath = filepath
+        whatToGrab = WhatToGrab(None)
+        whatToGrab.grabType = WhatToGrab.FIELD
+        whatToGrab.whichOne = 'gl'
+        fileItem.thingsToGrab.append(whatToGrab)
+        config = lingex_structs.PhonInputSettings(None)
+        config.filepath = filepath
+        counterArgs = ("", True, 'NFD')
+        uniqueWords = harvestFileInWorker(
+            fileItem, (config, {}, False), counterArgs)
+        self.assertEqual(sorted(uniqueWords), ["father", "wife"])
+
+        counter = WordCounter(*counterArgs)
+        counter.add("wife", "f1", Tribool('True'), "")
+        counter.merge(uniqueWords)
+        words = {word.text: word for word in counter.getSortedWords()}
+        self.assertEqual(words["wife"].occurrences, 2)
+        self.assertEqual(words["wife"].sources, {"f1": 1, filepath: 1})
+        self.assertIs(words["wife"].isCorrect, Tribool('True'))
+        self.assertEqual(words["father"].occurrences, 1)
+        self.assertIs(words["father"].isCorrect, Tribool('Indeterminate'))
+
 def getColumnStringList(unoObjs, col="A"):
     doclist = unoObjs.getOpenDocs(util.UnoObjs.DOCTYPE_CALC)
     wordListDoc = doclist[0]
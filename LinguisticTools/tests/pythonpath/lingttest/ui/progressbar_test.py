@@ -0,0 +1,99 @@
+"""
+Test that progress bar updates are limited by time rather than by sleeping.
+"""
+import logging
+import time
+import unittest
+
+from lingt.ui.common import progressbar
+
+from lingttest.utils import testutil
+
+logger = logging.getLogger("lingttest.progressbar_test")
+
+def getSuite():
+    suite = unittest.TestSuite()
+    for method_name in (
+            'testThrottle',
+            'testFlush',
+            'testNullProgressBar',
+        ):
+        suite.addTest(ProgressBarTestCase(method_name))
+    return suite
+
+class RecordingIndicator:
+    """Records values instead of showing them in the status bar."""
+    def __init__(self):
+        self.values = []
+
+    def setValue(self, val):
+        self.values.append(val)
+
+    def end(self):
+        pass
+
+class ProgressBarTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.unoObjs = testutil.unoObjsForCurrentDoc()
+
+    def testThrottle(self):
+        progressBar = progressbar.ProgressBar(self.unoObjs, "Testing...")
+        progressBar.show()
+        progressBar.close()
+        indicator = RecordingIndicator()
+        progressBar.progress = indicator
+        progressBar.MIN_INTERVAL = 60
+        startTime = time.perf_counter()
+        progressBar.updateBeginning()
+        for percent in range(20, 90):
+            progressBar.updatePercent(percent)
+        self.assertEqual(progressBar.getPercent(), 89)
+        progressBar.updateFinishing()
+        self.assertLess(time.perf_counter() - startTime, 0.1)
+        self.assertEqual(indicator.values, [10, 100])
+
+        progressBar.MIN_INTERVAL = 0
+        progressBar.updatePercent(50)
+        self.assertEqual(indicator.values, [10, 100, 50])
+
+    def testFlush(self):
+        """The last value held back should be displayed by flush()."""
+        progressBar = progressbar.ProgressBar(self.unoObjs, "Testing...")
+        indicator = RecordingIndicator()
+        progressBar.progress = indicator
+        progressBar.MIN_INTERVAL = 60
+        progressBar.updateBeginning()
+        progressBar.updatePercent(30)
+        progressBar.updatePercent(40)
+        self.assertEqual(indicator.values, [10])
+        progressBar.flush()
+        self.assertEqual(indicator.values, [10, 40])
+        progressBar.flush()
+        self.assertEqual(indicator.values, [10, 40])
+
+        # Once enough time has passed, the next value is displayed.
+        progressBar.updatePercent(50)
+        progressBar.MIN_INTERVAL = 0
+        progressBar.updatePercent(60)
+        self.assertEqual(indicator.values, [10, 40, 60])
+        progressBar.flush()
+        self.assertEqual(indicator.values, [10, 40, 60])
+
+    def testNullProgressBar(self):
+        progressBar = progressbar.NullProgressBar()
+        progressBar.show()
+        progressBar.updateBeginning()
+        progressRange = progressbar.ProgressRange(
+            start=20, stop=80, ops=3, pbar=progressBar)
+        progressRange.update(1)
+        self.assertEqual(progressBar.getPercent(), 40)
+        progressBar.updateFinishing()
+        self.assertEqual(progressBar.getPercent(), 100)
+        progressBar.close()
+
+        # Ranges without a bar do not display anything either.
+        progressbar.ProgressRange(ops=2).update(1)
+
+if __name__ == '__main__':
+    testutil.run_suite(getSuite())
@@ -9,15 +9,20 @@ import uno  # pylint: disable=import-error
 from lingttest.utils import testutil
 
 from lingttest.access import ex_updater_test
+from lingttest.access import example_cache_test
 from lingttest.access import odt_converter_test
 from lingttest.access import search_test
+from lingttest.access import sec_wrapper_test
+from lingttest.access import spreadsheet_output_test
 from lingttest.access import tables_test
 from lingttest.access import textchanges_test
+from lingttest.access import textmodel_test
 from lingttest.access import uservars_test
 from lingttest.access import xml_readers_test
 from lingttest.app import convpool_test
 from lingttest.app import fileitemlist_test
 from lingttest.app import spellingchecks_test
+from lingttest.app import spellingcomparisons_test
 from lingttest.app import visual_test_interlin
 from lingttest.app import visual_test_phonology
 from lingttest.app import wordlist_test
@@ -32,6 +37,7 @@ from lingttest.ui import dlg_bulkstep2_test
 from lingttest.ui import dlg_dataconv_test
 from lingttest.ui import dlg_interlinsettings_test
 from lingttest.ui import messagebox_test
+from lingttest.ui import progressbar_test
 from lingttest.ui import wordlistfile_test
 
 from lingt.utils import util
@@ -40,17 +46,23 @@ def get_master_suite():
     masterSuite = unittest.TestSuite()
     for module in (
             ex_updater_test,
+            example_cache_test,
             tables_test,
             search_test,
+            sec_wrapper_test,
+            spreadsheet_output_test,
             textchanges_test,
+            textmodel_test,
             uservars_test,
             xml_readers_test,
 
             fileitemlist_test,
             spellingchecks_test,
+            spellingcomparisons_test,
             convpool_test,
 
             messagebox_test,
+            progressbar_test,
             dlg_bulkstep1_test,
             dlg_interlinsettings_test,
             dlg_dataconv_test,
@@ -119,18 +131,30 @@ def run_module_suite(module):
 def run_ex_updater_test():
     run_module_suite(ex_updater_test)
 
+def run_example_cache_test():
+    run_module_suite(example_cache_test)
+
 def run_odt_converter_test():
     run_module_suite(odt_converter_test)
 
 def run_search_test():
     run_module_suite(search_test)
 
+def run_sec_wrapper_test():
+    run_module_suite(sec_wrapper_test)
+
+def run_spreadsheet_output_test():
+    run_module_suite(spreadsheet_output_test)
+
 def run_tables_test():
     run_module_suite(tables_test)
 
 def run_textchanges_test():
     run_module_suite(textchanges_test)
 
+def run_textmodel_test():
+    run_module_suite(textmodel_test)
+
 def run_uservars_test():
     run_module_suite(uservars_test)
 
@@ -143,6 +167,9 @@ def run_fileitemlist_test():
 def run_spellingchecks_test():
     run_module_suite(spellingchecks_test)
 
+def run_spellingcomparisons_test():
+    run_module_suite(spellingcomparisons_test)
+
 def run_convpool_test():
     run_module_suite(convpool_test)
 
@@ -188,6 +215,9 @@ def run_dlg_interlinsettings_test():
 def run_messagebox_test():
     run_module_suite(messagebox_test)
 
+def run_progressbar_test():
+    run_module_suite(progressbar_test)
+
 def run_wordlistfile_test():
     run_module_suite(wordlistfile_test)
 
@@ -195,14 +225,19 @@ def run_wordlistfile_test():
 g_exportedScripts = (
     aaa_run_all_tests,
     run_ex_updater_test,
+    run_example_cache_test,
     run_odt_converter_test,
     run_search_test,
+    run_sec_wrapper_test,
+    run_spreadsheet_output_test,
     run_tables_test,
     run_textchanges_test,
+    run_textmodel_test,
     run_uservars_test,
     run_xml_readers_test,
     run_fileitemlist_test,
     run_spellingchecks_test,
+    run_spellingcomparisons_test,
     run_convpool_test,
     run_visual_test_interlin,
     run_visual_test_phonology,
@@ -218,5 +253,6 @@ g_exportedScripts = (
     run_dlg_dataconv_test,
     run_dlg_interlinsettings_test,
     run_messagebox_test,
+    run_progressbar_test,
     run_wordlistfile_test,
     )
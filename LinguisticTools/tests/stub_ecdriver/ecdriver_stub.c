@@ -0,0 +1,109 @@
+/*
+ * A stand-in for libecdriver.so that does not need SIL Converters.
+ * It is only for testing how SEC_wrapper calls the library.
+ *
+ * Build on Linux:
+ *     gcc -shared -fPIC -o libecdriver.so ecdriver_stub.c
+ *
+ * Converters:
+ *     capsTest.tec     -- forward makes ASCII letters upper case,
+ *                         reverse makes them lower case
+ *     Any-Lower        -- makes ASCII letters lower case
+ *     Stub-NoControls  -- like capsTest.tec, but also changes control
+ *                         characters other than newline to "?"
+ *     Stub-Crash       -- aborts the process
+ */
+#include <ctype.h>
+#include <stdlib.h>
+#include <string.h>
+
+#define NAME_SIZE 1024
+
+static char currentName[NAME_SIZE] = "";
+static int currentForward = 1;
+static int callCount = 0;
+
+int IsEcInstalled(void)
+{
+    return 1;
+}
+
+int EncConverterSelectConverter(
+    char *sConverterName, int *bDirectionForward, unsigned short *eNormOutputForm)
+{
+    /* There is no dialog, so act as if the user pressed Cancel. */
+    return -1;
+}
+
+int EncConverterInitializeConverter(
+    const char *sConverterName, int bDirectionForward,
+    unsigned short eNormOutputForm)
+{
+    if (sConverterName == NULL || sConverterName[0] == '\0')
+        return -7;  /* NameNotFound */
+    strncpy(currentName, sConverterName, NAME_SIZE - 1);
+    currentName[NAME_SIZE - 1] = '\0';
+    currentForward = bDirectionForward;
+    return 0;
+}
+
+int EncConverterAddConverter(
+    const char *sConverterName, const char *sConverterSpec,
+    unsigned short eConversionType, const char *sLeftEncoding,
+    const char *sRightEncoding, unsigned short eProcessType)
+{
+    return 0;
+}
+
+int EncConverterConvertString(
+    const char *sConverterName, const char *sInput, char *sOutput,
+    int nOutputLen)
+{
+    int upper = 1;
+    int noControls = 0;
+    int i;
+    callCount++;
+    if (strcmp(sConverterName, "capsTest.tec") == 0) {
+        upper = currentForward;
+    } else if (strcmp(sConverterName, "Any-Lower") == 0) {
+        upper = 0;
+    } else if (strcmp(sConverterName, "Stub-NoControls") == 0) {
+        upper = currentForward;
+        noControls = 1;
+    } else if (strcmp(sConverterName, "Stub-Crash") == 0) {
+        abort();
+    } else {
+        return -7;  /* NameNotFound */
+    }
+    if (nOutputLen <= 0)
+        return -17;  /* NotEnoughBuffer */
+    /* Like ECDriver, silently truncate the result to fit the buffer. */
+    for (i = 0; sInput[i] != '\0' && i < nOutputLen - 1; i++) {
+        unsigned char c = (unsigned char)sInput[i];
+        if (noControls && c < 0x20 && c != '\n')
+            c = '?';
+        else if (c < 0x80)
+            c = upper ? toupper(c) : tolower(c);
+        sOutput[i] = (char)c;
+    }
+    sOutput[i] = '\0';
+    return 0;
+}
+
+int EncConverterConverterDescription(
+    const char *sConverterName, char *sDescription, int nDescriptionLen)
+{
+    strncpy(sDescription, "Stub converter", nDescriptionLen - 1);
+    sDescription[nDescriptionLen - 1] = '\0';
+    return 0;
+}
+
+void Cleanup(void)
+{
+}
+
+/* Not in the real library.  Lets tests count calls to ConvertString. */
+int StubConvertStringCount(void)
+{
+    return callCount;
+}